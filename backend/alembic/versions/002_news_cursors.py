@@ -0,0 +1,31 @@
+"""Add news_cursors for incremental news ingestion
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2024-02-01 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Per-query high-water marks: the newest publishedAt and URL seen
+    op.create_table('news_cursors',
+        sa.Column('query', sa.String(length=200), nullable=False),
+        sa.Column('last_published_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('last_url', sa.Text(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('query')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('news_cursors')
@@ -0,0 +1,31 @@
+"""Add stream_checkpoints for the Reddit streaming daemon
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2024-02-15 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Per-stream resume points: the newest committed item and its creation time
+    op.create_table('stream_checkpoints',
+        sa.Column('stream', sa.String(length=200), nullable=False),
+        sa.Column('last_id', sa.String(length=20), nullable=False),
+        sa.Column('last_created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('stream')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('stream_checkpoints')
@@ -0,0 +1,68 @@
+"""Make stock_mentions unique on (source, source_id, ticker)
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2024-03-01 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+# Rows per duplicate-cleanup batch; each batch commits on its own
+CLEANUP_BATCH_SIZE = 50000
+
+# News rows used to store a missing article URL as "", which would make every such
+# row of a ticker one natural key; NULLs never collide, so they all survive the cleanup
+NULL_EMPTY_SOURCE_IDS = sa.text("""
+    UPDATE stock_mentions SET source_id = NULL
+    WHERE id >= :low AND id < :high AND source_id = ''
+""")
+
+# Keep the first-saved copy of every mention and delete later re-scrapes
+DELETE_DUPLICATES = sa.text("""
+    DELETE FROM stock_mentions m
+    WHERE m.id >= :low AND m.id < :high
+      AND EXISTS (
+          SELECT 1 FROM stock_mentions o
+          WHERE o.source = m.source
+            AND o.source_id = m.source_id
+            AND o.ticker = m.ticker
+            AND o.id < m.id
+      )
+""")
+
+
+def upgrade() -> None:
+    # News source_ids are article URLs, which often exceed 100 characters
+    op.alter_column('stock_mentions', 'source_id',
+        existing_type=sa.String(length=100), type_=sa.String(length=500), existing_nullable=True)
+
+    # Makes the per-batch duplicate lookups index scans
+    op.create_index('ix_stock_mentions_natural_key', 'stock_mentions', ['source', 'source_id', 'ticker'])
+
+    bind = op.get_bind()
+    max_id = bind.execute(sa.text("SELECT max(id) FROM stock_mentions")).scalar() or 0
+
+    # Delete in id ranges outside the migration transaction, so a large table
+    # is never locked or rewritten in one go
+    with op.get_context().autocommit_block():
+        for low in range(0, max_id + 1, CLEANUP_BATCH_SIZE):
+            # Earlier batches are already cleared, so the duplicate lookups never match an empty id
+            bind.execute(NULL_EMPTY_SOURCE_IDS, {"low": low, "high": low + CLEANUP_BATCH_SIZE})
+            bind.execute(DELETE_DUPLICATES, {"low": low, "high": low + CLEANUP_BATCH_SIZE})
+
+    op.create_unique_constraint('uq_stock_mentions_source_ticker', 'stock_mentions', ['source', 'source_id', 'ticker'])
+    op.drop_index('ix_stock_mentions_natural_key', table_name='stock_mentions')
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_stock_mentions_source_ticker', 'stock_mentions', type_='unique')
+    # source_id stays VARCHAR(500): stored article URLs longer than 100 characters
+    # would make narrowing it fail, and truncating them would corrupt the ids
@@ -0,0 +1,76 @@
+"""Add composite and BRIN indexes for the hot read paths, and unique rollup keys
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2024-03-15 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Rollups were written check-then-insert, so races may have left duplicates; keep the newest
+    op.execute("""
+        DELETE FROM stock_sentiments s
+        USING stock_sentiments newer
+        WHERE newer.ticker = s.ticker AND newer.date = s.date AND newer.id > s.id
+    """)
+    op.execute("""
+        DELETE FROM trending_stocks t
+        USING trending_stocks newer
+        WHERE newer.ticker = t.ticker AND newer.category = t.category AND newer.date = t.date AND newer.id > t.id
+    """)
+
+    # CONCURRENTLY cannot run inside a transaction, and keeps the tables writable while indexes build.
+    # If a build fails it leaves an INVALID index behind; drop it before re-running.
+    with op.get_context().autocommit_block():
+        # get_recent_mentions: WHERE ticker = ? ORDER BY created_at DESC LIMIT n
+        op.create_index('ix_stock_mentions_ticker_created_at', 'stock_mentions',
+            ['ticker', sa.text('created_at DESC')], postgresql_concurrently=True, if_not_exists=True)
+        # aggregate_daily_sentiment: created_at ranges. Rows arrive roughly in created_at
+        # order, so a BRIN index is a few pages instead of a B-tree over every row.
+        # Autosummarize lets autovacuum summarize newly filled ranges, which are otherwise always scanned.
+        op.create_index('ix_stock_mentions_created_at_brin', 'stock_mentions', ['created_at'],
+            postgresql_using='brin', postgresql_with={'pages_per_range': 32, 'autosummarize': 'on'},
+            postgresql_concurrently=True, if_not_exists=True)
+
+        # get_historical_sentiment and /stock/{ticker}: WHERE ticker = ? AND date ...
+        op.create_index('uq_stock_sentiments_ticker_date', 'stock_sentiments', ['ticker', 'date'],
+            unique=True, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('uq_trending_stocks_ticker_category_date', 'trending_stocks', ['ticker', 'category', 'date'],
+            unique=True, postgresql_concurrently=True, if_not_exists=True)
+        # /dashboard: WHERE category = ? AND date = ? ORDER BY rank LIMIT 5. Leading with date
+        # also serves calculate_trending_stocks' date lookups, replacing the single-column index.
+        op.create_index('ix_trending_stocks_date_category_rank', 'trending_stocks', ['date', 'category', 'rank'],
+            postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_trending_stocks_date', table_name='trending_stocks',
+            postgresql_concurrently=True, if_exists=True)
+
+    # Promote the unique indexes to constraints so ON CONFLICT can name them
+    op.execute("ALTER TABLE stock_sentiments ADD CONSTRAINT uq_stock_sentiments_ticker_date "
+               "UNIQUE USING INDEX uq_stock_sentiments_ticker_date")
+    op.execute("ALTER TABLE trending_stocks ADD CONSTRAINT uq_trending_stocks_ticker_category_date "
+               "UNIQUE USING INDEX uq_trending_stocks_ticker_category_date")
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_trending_stocks_ticker_category_date', 'trending_stocks', type_='unique')
+    op.drop_constraint('uq_stock_sentiments_ticker_date', 'stock_sentiments', type_='unique')
+
+    with op.get_context().autocommit_block():
+        op.create_index('ix_trending_stocks_date', 'trending_stocks', ['date'],
+            postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_trending_stocks_date_category_rank', table_name='trending_stocks',
+            postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_stock_mentions_created_at_brin', table_name='stock_mentions',
+            postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_stock_mentions_ticker_created_at', table_name='stock_mentions',
+            postgresql_concurrently=True, if_exists=True)
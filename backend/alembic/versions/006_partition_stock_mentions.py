@@ -0,0 +1,152 @@
+"""Range-partition stock_mentions by created_at
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2024-04-01 00:00:00.000000
+
+"""
+from datetime import date, datetime, timedelta, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+COLUMNS = "id, ticker, text, sentiment, sentiment_score, source, source_id, created_at, processed_at"
+
+# Fixed here rather than read from app.partitions or the environment, so this migration does the
+# same thing whenever it runs; maintain_partitions_task applies the configured settings afterwards
+RETENTION_DAYS = 90
+PARTITIONS_AHEAD = 7
+
+
+def _create_daily_partitions(parent: str, first_day: date, last_day: date):
+    """UTC-day partitions of parent, named like app/partitions.py names them"""
+    day = first_day
+    while day <= last_day:
+        end = day + timedelta(days=1)
+        op.execute(f"CREATE TABLE {parent}_p{day:%Y%m%d} PARTITION OF {parent} "
+                   f"FOR VALUES FROM ('{day.isoformat()} 00:00:00+00') TO ('{end.isoformat()} 00:00:00+00')")
+        day = end
+
+
+def _rename_indexes(table: str, suffix: str):
+    """Free the index and constraint names of table for the replacement table"""
+    bind = op.get_bind()
+    indexes = bind.execute(sa.text("SELECT indexname FROM pg_indexes WHERE tablename = :table"),
+                           {"table": table}).scalars().all()
+    for index in indexes:
+        op.execute(f"ALTER INDEX {index} RENAME TO {index}{suffix}")
+
+
+def upgrade() -> None:
+    op.rename_table('stock_mentions', 'stock_mentions_unpartitioned')
+    _rename_indexes('stock_mentions_unpartitioned', '_unpartitioned')
+
+    # Partition keys must be part of every unique key. created_at is the source item's
+    # creation time, so a re-scraped item still conflicts with its earlier copy, except for
+    # the rows copied below, which only know when they were ingested (see legacy_item_keys).
+    op.execute("""
+        CREATE TABLE stock_mentions (
+            id INTEGER NOT NULL DEFAULT nextval('stock_mentions_id_seq'),
+            ticker VARCHAR(10) NOT NULL,
+            text TEXT NOT NULL,
+            sentiment VARCHAR(20) NOT NULL,
+            sentiment_score DOUBLE PRECISION NOT NULL,
+            source VARCHAR(50) NOT NULL,
+            source_id VARCHAR(500),
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            processed_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            CONSTRAINT stock_mentions_pkey PRIMARY KEY (id, created_at),
+            CONSTRAINT uq_stock_mentions_source_ticker UNIQUE (source, source_id, ticker, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("ALTER SEQUENCE stock_mentions_id_seq OWNED BY stock_mentions.id")
+
+    # Created on the parent, so every partition gets its own copy
+    op.create_index('ix_stock_mentions_ticker_created_at', 'stock_mentions', ['ticker', sa.text('created_at DESC')])
+    op.create_index('ix_stock_mentions_created_at_brin', 'stock_mentions', ['created_at'],
+        postgresql_using='brin', postgresql_with={'pages_per_range': 32, 'autosummarize': 'on'})
+
+    # Partitions from the oldest retained day through the days ahead; anything older
+    # lands in the default partition, which the retention job purges
+    bind = op.get_bind()
+    today = datetime.now(timezone.utc).date()
+    oldest = bind.execute(sa.text(
+        "SELECT min(coalesce(created_at, processed_at)) FROM stock_mentions_unpartitioned"
+    )).scalar()
+    first_day = oldest.astimezone(timezone.utc).date() if oldest else today
+    first_day = max(first_day, today - timedelta(days=RETENTION_DAYS))
+    op.execute("CREATE TABLE stock_mentions_default PARTITION OF stock_mentions DEFAULT")
+    _create_daily_partitions('stock_mentions', first_day, today + timedelta(days=PARTITIONS_AHEAD))
+
+    op.execute(f"""
+        INSERT INTO stock_mentions ({COLUMNS})
+        SELECT id, ticker, text, sentiment, sentiment_score, source, source_id,
+               coalesce(created_at, processed_at, now()), processed_at
+        FROM stock_mentions_unpartitioned
+    """)
+
+    # A re-scrape of an item stored before now carries its publish time, which misses the key
+    # above. Keep the existing items' keys without created_at, unpartitioned, so the writer
+    # skips them; the retention job expires them with the partitions.
+    op.execute("""
+        CREATE TABLE legacy_item_keys (
+            source VARCHAR(50) NOT NULL,
+            source_id VARCHAR(500) NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            CONSTRAINT legacy_item_keys_pkey PRIMARY KEY (source, source_id)
+        )
+    """)
+    op.execute("""
+        INSERT INTO legacy_item_keys (source, source_id, created_at)
+        SELECT source, source_id, min(coalesce(created_at, processed_at, now()))
+        FROM stock_mentions_unpartitioned WHERE source_id IS NOT NULL
+        GROUP BY source, source_id
+    """)
+    op.drop_table('stock_mentions_unpartitioned')
+
+
+def downgrade() -> None:
+    op.drop_table('legacy_item_keys')
+    op.rename_table('stock_mentions', 'stock_mentions_partitioned')
+    _rename_indexes('stock_mentions_partitioned', '_partitioned')
+
+    op.execute("""
+        CREATE TABLE stock_mentions (
+            id INTEGER NOT NULL DEFAULT nextval('stock_mentions_id_seq'),
+            ticker VARCHAR(10) NOT NULL,
+            text TEXT NOT NULL,
+            sentiment VARCHAR(20) NOT NULL,
+            sentiment_score DOUBLE PRECISION NOT NULL,
+            source VARCHAR(50) NOT NULL,
+            source_id VARCHAR(500),
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            processed_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            CONSTRAINT stock_mentions_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.execute("ALTER SEQUENCE stock_mentions_id_seq OWNED BY stock_mentions.id")
+
+    # Keep the earliest copy where rows only differed by created_at; rows without a source_id never conflict
+    op.execute(f"""
+        INSERT INTO stock_mentions ({COLUMNS})
+        SELECT {COLUMNS} FROM stock_mentions_partitioned WHERE source_id IS NULL
+        UNION ALL
+        (SELECT DISTINCT ON (source, source_id, ticker) {COLUMNS}
+         FROM stock_mentions_partitioned WHERE source_id IS NOT NULL
+         ORDER BY source, source_id, ticker, id)
+    """)
+    op.create_unique_constraint('uq_stock_mentions_source_ticker', 'stock_mentions', ['source', 'source_id', 'ticker'])
+    op.create_index(op.f('ix_stock_mentions_id'), 'stock_mentions', ['id'], unique=False)
+    op.create_index(op.f('ix_stock_mentions_ticker'), 'stock_mentions', ['ticker'], unique=False)
+    op.create_index('ix_stock_mentions_ticker_created_at', 'stock_mentions', ['ticker', sa.text('created_at DESC')])
+    op.create_index('ix_stock_mentions_created_at_brin', 'stock_mentions', ['created_at'],
+        postgresql_using='brin', postgresql_with={'pages_per_range': 32, 'autosummarize': 'on'})
+
+    op.drop_table('stock_mentions_partitioned')
@@ -0,0 +1,157 @@
+"""Split stock_mentions into documents and a slim mentions link table
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2024-04-15 00:00:00.000000
+
+"""
+from datetime import date, datetime, timedelta, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+DOCUMENT_COLUMNS = "id, text, sentiment, sentiment_score, source, source_id, created_at, processed_at"
+STOCK_MENTION_COLUMNS = "ticker, text, sentiment, sentiment_score, source, source_id, created_at, processed_at"
+
+# Fixed here rather than read from app.partitions or the environment, so this migration does the
+# same thing whenever it runs; maintain_partitions_task applies the configured settings afterwards
+RETENTION_DAYS = 90
+PARTITIONS_AHEAD = 7
+
+
+def _create_daily_partitions(parent: str, first_day: date, last_day: date):
+    """UTC-day partitions of parent, named like app/partitions.py names them"""
+    day = first_day
+    while day <= last_day:
+        end = day + timedelta(days=1)
+        op.execute(f"CREATE TABLE {parent}_p{day:%Y%m%d} PARTITION OF {parent} "
+                   f"FOR VALUES FROM ('{day.isoformat()} 00:00:00+00') TO ('{end.isoformat()} 00:00:00+00')")
+        day = end
+
+
+def _create_partitions(parent: str, history_table: str):
+    """Default partition plus range partitions from the oldest retained day of history_table through the days ahead"""
+    bind = op.get_bind()
+    today = datetime.now(timezone.utc).date()
+    oldest = bind.execute(sa.text(f"SELECT min(created_at) FROM {history_table}")).scalar()
+    first_day = oldest.astimezone(timezone.utc).date() if oldest else today
+    first_day = max(first_day, today - timedelta(days=RETENTION_DAYS))
+    op.execute(f"CREATE TABLE {parent}_default PARTITION OF {parent} DEFAULT")
+    _create_daily_partitions(parent, first_day, today + timedelta(days=PARTITIONS_AHEAD))
+
+
+def upgrade() -> None:
+    # Document ids continue from the mention ids; each document keeps the id of its first mention
+    op.execute("CREATE SEQUENCE documents_id_seq AS INTEGER")
+    op.execute("SELECT setval('documents_id_seq', coalesce((SELECT max(id) FROM stock_mentions), 0) + 1, false)")
+    op.execute("""
+        CREATE TABLE documents (
+            id INTEGER NOT NULL DEFAULT nextval('documents_id_seq'),
+            text TEXT NOT NULL,
+            sentiment VARCHAR(20) NOT NULL,
+            sentiment_score DOUBLE PRECISION NOT NULL,
+            source VARCHAR(50) NOT NULL,
+            source_id VARCHAR(500),
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            processed_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            CONSTRAINT documents_pkey PRIMARY KEY (id, created_at),
+            CONSTRAINT uq_documents_source_item UNIQUE (source, source_id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("ALTER SEQUENCE documents_id_seq OWNED BY documents.id")
+
+    # created_at repeats the document's so mentions partition, prune and expire on the same days.
+    # There is no foreign key: partitions of both tables are detached and dropped independently.
+    op.execute("""
+        CREATE TABLE mentions (
+            document_id INTEGER NOT NULL,
+            ticker VARCHAR(10) NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            CONSTRAINT mentions_pkey PRIMARY KEY (document_id, ticker, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+
+    op.create_index('ix_documents_created_at_brin', 'documents', ['created_at'],
+        postgresql_using='brin', postgresql_with={'pages_per_range': 32, 'autosummarize': 'on'})
+    op.create_index('ix_mentions_ticker_created_at', 'mentions', ['ticker', sa.text('created_at DESC')])
+    op.create_index('ix_mentions_created_at_brin', 'mentions', ['created_at'],
+        postgresql_using='brin', postgresql_with={'pages_per_range': 32, 'autosummarize': 'on'})
+
+    for parent in ('documents', 'mentions'):
+        _create_partitions(parent, 'stock_mentions')
+
+    # Every ticker's row of an item carries the same text and sentiment. Keep the first row
+    # of each item; rows without a source_id belong together when their text matches.
+    op.execute(f"""
+        INSERT INTO documents ({DOCUMENT_COLUMNS})
+        SELECT DISTINCT ON (source, source_id, created_at) {DOCUMENT_COLUMNS}
+        FROM stock_mentions WHERE source_id IS NOT NULL
+        ORDER BY source, source_id, created_at, id
+    """)
+    op.execute(f"""
+        INSERT INTO documents ({DOCUMENT_COLUMNS})
+        SELECT DISTINCT ON (source, created_at, text) {DOCUMENT_COLUMNS}
+        FROM stock_mentions WHERE source_id IS NULL
+        ORDER BY source, created_at, text, id
+    """)
+    op.execute("""
+        INSERT INTO mentions (document_id, ticker, created_at)
+        SELECT d.id, m.ticker, m.created_at
+        FROM stock_mentions m
+        JOIN documents d ON d.source = m.source AND d.source_id = m.source_id AND d.created_at = m.created_at
+        WHERE m.source_id IS NOT NULL
+        ON CONFLICT DO NOTHING
+    """)
+    op.execute("""
+        INSERT INTO mentions (document_id, ticker, created_at)
+        SELECT d.id, m.ticker, m.created_at
+        FROM stock_mentions m
+        JOIN documents d ON d.source = m.source AND d.created_at = m.created_at AND d.text = m.text
+        WHERE m.source_id IS NULL AND d.source_id IS NULL
+        ON CONFLICT DO NOTHING
+    """)
+
+    # Drops the partitions and stock_mentions_id_seq with it
+    op.drop_table('stock_mentions')
+
+
+def downgrade() -> None:
+    op.execute("CREATE SEQUENCE stock_mentions_id_seq AS INTEGER")
+    op.execute("""
+        CREATE TABLE stock_mentions (
+            id INTEGER NOT NULL DEFAULT nextval('stock_mentions_id_seq'),
+            ticker VARCHAR(10) NOT NULL,
+            text TEXT NOT NULL,
+            sentiment VARCHAR(20) NOT NULL,
+            sentiment_score DOUBLE PRECISION NOT NULL,
+            source VARCHAR(50) NOT NULL,
+            source_id VARCHAR(500),
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            processed_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            CONSTRAINT stock_mentions_pkey PRIMARY KEY (id, created_at),
+            CONSTRAINT uq_stock_mentions_source_ticker UNIQUE (source, source_id, ticker, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("ALTER SEQUENCE stock_mentions_id_seq OWNED BY stock_mentions.id")
+    op.create_index('ix_stock_mentions_ticker_created_at', 'stock_mentions', ['ticker', sa.text('created_at DESC')])
+    op.create_index('ix_stock_mentions_created_at_brin', 'stock_mentions', ['created_at'],
+        postgresql_using='brin', postgresql_with={'pages_per_range': 32, 'autosummarize': 'on'})
+    _create_partitions('stock_mentions', 'documents')
+
+    op.execute(f"""
+        INSERT INTO stock_mentions ({STOCK_MENTION_COLUMNS})
+        SELECT m.ticker, d.text, d.sentiment, d.sentiment_score, d.source, d.source_id, d.created_at, d.processed_at
+        FROM mentions m
+        JOIN documents d ON d.id = m.document_id AND d.created_at = m.created_at
+        ORDER BY d.created_at, d.id
+    """)
+
+    op.drop_table('mentions')
+    op.drop_table('documents')
@@ -1,12 +1,83 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-from datetime import datetime, timedelta
-from typing import List, Dict, Tuple
+from sqlalchemy import func, desc, and_, case, cast, literal, select, Float, Select
+from datetime import date as Date, datetime, timedelta, timezone
+from typing import Any, List, Dict, Tuple
+import os
 import logging
-from .models import StockMention, StockSentiment, TrendingStock
+from .models import Document, Mention, StockSentiment, TrendingStock
+from .mention_writer import UPSERT_DIALECTS
 
 logger = logging.getLogger(__name__)
 
+# How far back get_recent_mentions looks; the bound lets PostgreSQL skip older partitions
+RECENT_MENTIONS_DAYS = int(os.getenv("RECENT_MENTIONS_DAYS", "7"))
+
+# Documents are dated by publication, so an ingest can add to days before today. Each run
+# re-aggregates the publication days of documents ingested (processed_at) within the lookback,
+# going back at most AGGREGATE_MAX_LATE_DAYS so only recent partitions are read.
+AGGREGATE_INGEST_LOOKBACK_HOURS = int(os.getenv("AGGREGATE_INGEST_LOOKBACK_HOURS", "24"))
+AGGREGATE_MAX_LATE_DAYS = int(os.getenv("AGGREGATE_MAX_LATE_DAYS", "7"))
+
+# A mention shares its document's created_at; joining on it as well keeps the join within matching partitions
+MENTION_DOCUMENT_JOIN = and_(Document.id == Mention.document_id, Document.created_at == Mention.created_at)
+
+# Statements shared by the sync aggregator and the async read endpoints in main.py
+
+def daily_sentiment_statement(start: datetime, end: datetime) -> Select:
+    """Per-ticker mention counts, sentiment index and bullish/bearish scores for mentions created in [start, end)"""
+    total = func.count()
+    positive = func.count().filter(Document.sentiment == "positive")
+    negative = func.count().filter(Document.sentiment == "negative")
+    # mentions * max(0, sentiment_index) reduces to max(0, positive - negative), and likewise for bearish
+    return select(
+        Mention.ticker,
+        total.label("mentions_count"),
+        positive.label("positive_mentions"),
+        negative.label("negative_mentions"),
+        (total - positive - negative).label("neutral_mentions"),
+        (cast(positive - negative, Float) / total).label("sentiment_index"),
+        cast(case((positive > negative, positive - negative), else_=0), Float).label("bullish_score"),
+        cast(case((negative > positive, negative - positive), else_=0), Float).label("bearish_score")
+    ).join(Document, MENTION_DOCUMENT_JOIN).where(
+        # The range is repeated for documents so both sides are pruned to the range's partitions
+        Mention.created_at >= start,
+        Mention.created_at < end,
+        Document.created_at >= start,
+        Document.created_at < end
+    ).group_by(Mention.ticker)
+
+def recent_mentions_statement(ticker: str, limit: int = 20, days: int = RECENT_MENTIONS_DAYS) -> Select:
+    """A ticker's newest mentions from the last few days, with their document's text and sentiment"""
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    # Pick the mentions from the (ticker, created_at) index first, then fetch only their documents
+    recent = select(Mention).where(
+        Mention.ticker == ticker,
+        Mention.created_at >= since
+    ).order_by(Mention.created_at.desc()).limit(limit).subquery()
+    return select(
+        Document.id,
+        recent.c.ticker,
+        Document.text,
+        Document.sentiment,
+        Document.sentiment_score,
+        Document.source,
+        Document.source_id,
+        Document.created_at,
+        Document.processed_at
+    ).join(
+        recent, and_(Document.id == recent.c.document_id, Document.created_at == recent.c.created_at)
+    ).where(Document.created_at >= since).order_by(recent.c.created_at.desc())
+
+def historical_sentiment_statement(ticker: str, days: int = 7) -> Select:
+    """A ticker's daily rollups for the last few days, newest first"""
+    end_date = datetime.now().date()
+    start_date = end_date - timedelta(days=days)
+    return select(StockSentiment).where(
+        StockSentiment.ticker == ticker,
+        StockSentiment.date >= start_date,
+        StockSentiment.date <= end_date
+    ).order_by(StockSentiment.date.desc())
+
 class SentimentAggregator:
     def __init__(self, db: Session):
         self.db = db
@@ -16,93 +87,88 @@ class SentimentAggregator:
         if date is None:
             date = datetime.now().date()
         
-        # Get all mentions for the date
         start_date = datetime.combine(date, datetime.min.time())
         end_date = start_date + timedelta(days=1)
         
-        mentions = self.db.query(StockMention).filter(
-            StockMention.created_at >= start_date,
-            StockMention.created_at < end_date
-        ).all()
+        # Counted by the database, one row per ticker; aware bounds compare as timestamptz,
+        # so PostgreSQL prunes partitions while planning
+        rollups = daily_sentiment_statement(
+            start_date.replace(tzinfo=timezone.utc), end_date.replace(tzinfo=timezone.utc)
+        ).add_columns(literal(start_date, StockSentiment.date.type).label("date"))
+        columns = [column.name for column in rollups.selected_columns]
         
-        # Group by ticker
-        ticker_data = {}
-        for mention in mentions:
-            ticker = mention.ticker
-            if ticker not in ticker_data:
-                ticker_data[ticker] = {
-                    "mentions": [],
-                    "positive": 0,
-                    "negative": 0,
-                    "neutral": 0
-                }
-            
-            ticker_data[ticker]["mentions"].append(mention)
-            
-            if mention.sentiment == "positive":
-                ticker_data[ticker]["positive"] += 1
-            elif mention.sentiment == "negative":
-                ticker_data[ticker]["negative"] += 1
-            else:
-                ticker_data[ticker]["neutral"] += 1
-        
-        # Create StockSentiment records
-        sentiment_records = []
-        for ticker, data in ticker_data.items():
-            total_mentions = len(data["mentions"])
-            positive = data["positive"]
-            negative = data["negative"]
-            neutral = data["neutral"]
-            
-            # Calculate sentiment index
-            if total_mentions > 0:
-                sentiment_index = (positive - negative) / total_mentions
-            else:
-                sentiment_index = 0.0
-            
-            # Calculate bullish/bearish scores
-            # Bullish: high mentions + positive sentiment
-            bullish_score = total_mentions * max(0, sentiment_index)
-            # Bearish: high mentions + negative sentiment  
-            bearish_score = total_mentions * max(0, -sentiment_index)
-            
-            # Check if record already exists
-            existing = self.db.query(StockSentiment).filter(
-                StockSentiment.ticker == ticker,
-                StockSentiment.date == start_date
-            ).first()
-            
-            if existing:
-                # Update existing record
-                existing.mentions_count = total_mentions
-                existing.positive_mentions = positive
-                existing.negative_mentions = negative
-                existing.neutral_mentions = neutral
-                existing.sentiment_index = sentiment_index
-                existing.bullish_score = bullish_score
-                existing.bearish_score = bearish_score
-                sentiment_records.append(existing)
-            else:
-                # Create new record
-                sentiment_record = StockSentiment(
-                    ticker=ticker,
-                    date=start_date,
-                    mentions_count=total_mentions,
-                    positive_mentions=positive,
-                    negative_mentions=negative,
-                    neutral_mentions=neutral,
-                    sentiment_index=sentiment_index,
-                    bullish_score=bullish_score,
-                    bearish_score=bearish_score
-                )
-                self.db.add(sentiment_record)
-                sentiment_records.append(sentiment_record)
+        dialect = UPSERT_DIALECTS.get(self.db.get_bind().dialect.name)
+        if dialect is not None:
+            # Insert or update every ticker's rollup in one statement
+            upsert = dialect.insert(StockSentiment).from_select(columns, rollups)
+            upsert = upsert.on_conflict_do_update(
+                index_elements=["ticker", "date"],
+                set_={column: upsert.excluded[column] for column in columns if column not in ("ticker", "date")}
+            ).returning(StockSentiment)
+            sentiment_records = self.db.execute(
+                select(StockSentiment).from_statement(upsert).execution_options(populate_existing=True)
+            ).scalars().all()
+        else:
+            sentiment_records = []
+            for row in self.db.execute(rollups).mappings():
+                existing = self.db.query(StockSentiment).filter(
+                    StockSentiment.ticker == row["ticker"],
+                    StockSentiment.date == start_date
+                ).first()
+                if existing:
+                    for column, value in row.items():
+                        setattr(existing, column, value)
+                    sentiment_records.append(existing)
+                else:
+                    sentiment_record = StockSentiment(**row)
+                    self.db.add(sentiment_record)
+                    sentiment_records.append(sentiment_record)
         
         self.db.commit()
         logger.info(f"Aggregated sentiment for {len(sentiment_records)} stocks on {date}")
         
         return sentiment_records
     
+    def ingested_days(self, since: datetime, oldest: datetime) -> List[Date]:
+        """UTC publication days, from oldest on, of the documents ingested since `since`"""
+        created_at = Document.created_at
+        if self.db.get_bind().dialect.name == "postgresql":
+            created_at = func.timezone("UTC", created_at)
+        days = self.db.execute(
+            select(func.date(created_at)).where(
+                Document.processed_at >= since,
+                Document.created_at >= oldest
+            ).distinct()
+        ).scalars().all()
+        # SQLite returns dates as text
+        return sorted(Date.fromisoformat(day) if isinstance(day, str) else day for day in days)
+    
+    def aggregate_recent(self) -> Dict[str, Any]:
+        """
+        Aggregate today and every earlier day that recently ingested documents were published on,
+        and recalculate each day's trending stocks
+        Returns: {"days", "stocks_processed", "bullish_stocks", "bearish_stocks"}, the trending counts being today's
+        """
+        today = datetime.now().date()
+        now = datetime.now(timezone.utc)
+        late_days = self.ingested_days(
+            now - timedelta(hours=AGGREGATE_INGEST_LOOKBACK_HOURS),
+            datetime.combine(today - timedelta(days=AGGREGATE_MAX_LATE_DAYS), datetime.min.time(), tzinfo=timezone.utc)
+        )
+        days = [day for day in late_days if day != today] + [today]
+        
+        stocks_processed = 0
+        for day in days:
+            stocks_processed += len(self.aggregate_daily_sentiment(day))
+            bullish_stocks, bearish_stocks = self.calculate_trending_stocks(day)
+        
+        return {
+            "days": [day.isoformat() for day in days],
+            "stocks_processed": stocks_processed,
+            "bullish_stocks": len(bullish_stocks),
+            "bearish_stocks": len(bearish_stocks)
+        }
+    
     def calculate_trending_stocks(self, date: datetime = None) -> Tuple[List[TrendingStock], List[TrendingStock]]:
         """Calculate trending bullish and bearish stocks"""
         if date is None:
@@ -187,17 +253,8 @@ class SentimentAggregator:
     
     def get_historical_sentiment(self, ticker: str, days: int = 7) -> List[StockSentiment]:
         """Get historical sentiment data for a specific ticker"""
-        end_date = datetime.now().date()
-        start_date = end_date - timedelta(days=days)
-        
-        return self.db.query(StockSentiment).filter(
-            StockSentiment.ticker == ticker,
-            StockSentiment.date >= start_date,
-            StockSentiment.date <= end_date
-        ).order_by(StockSentiment.date.desc()).all()
+        return self.db.execute(historical_sentiment_statement(ticker, days)).scalars().all()
     
-    def get_recent_mentions(self, ticker: str, limit: int = 20) -> List[StockMention]:
-        """Get recent mentions for a specific ticker"""
-        return self.db.query(StockMention).filter(
-            StockMention.ticker == ticker
-        ).order_by(StockMention.created_at.desc()).limit(limit).all()
+    def get_recent_mentions(self, ticker: str, limit: int = 20, days: int = RECENT_MENTIONS_DAYS) -> List[Dict]:
+        """Get recent mentions for a specific ticker from the last few days, with their document's text and sentiment"""
+        return [dict(row) for row in self.db.execute(recent_mentions_statement(ticker, limit, days)).mappings()]
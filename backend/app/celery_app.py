@@ -1,5 +1,7 @@
 from celery import Celery
+from celery.signals import worker_init
 import os
+import logging
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -7,6 +9,14 @@ load_dotenv()
 # Redis configuration
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
 
+# Load FinBERT in the worker parent so prefork children share its weights
+FINBERT_PRELOAD = os.getenv("FINBERT_PRELOAD", "true").lower() == "true"
+
+# Scheduled Reddit polling; turn off when the reddit-stream daemon ingests continuously
+REDDIT_POLLING = os.getenv("REDDIT_POLLING", "true").lower() == "true"
+
+logger = logging.getLogger(__name__)
+
 # Create Celery app
 celery_app = Celery(
     "stock_sentiment",
@@ -28,10 +38,12 @@ celery_app.conf.update(
     worker_prefetch_multiplier=1,
     worker_max_tasks_per_child=1000,
     beat_schedule={
-        'scrape-reddit-every-30-minutes': {
-            'task': 'app.tasks.scrape_reddit_task',
-            'schedule': 30 * 60,  # Every 30 minutes
-        },
+        **({
+            'scrape-reddit-every-30-minutes': {
+                'task': 'app.tasks.scrape_reddit_task',
+                'schedule': 30 * 60,  # Every 30 minutes
+            },
+        } if REDDIT_POLLING else {}),
         'scrape-news-every-hour': {
             'task': 'app.tasks.scrape_news_task',
             'schedule': 60 * 60,  # Every hour
@@ -40,5 +52,28 @@ celery_app.conf.update(
             'task': 'app.tasks.aggregate_sentiment_task',
             'schedule': 60 * 60,  # Every hour
         },
+        'maintain-partitions-every-6-hours': {
+            'task': 'app.tasks.maintain_partitions_task',
+            'schedule': 6 * 60 * 60,  # Every 6 hours, well inside MENTION_PARTITIONS_AHEAD
+        },
     }
 )
+
+@worker_init.connect
+def load_ticker_index_before_fork(**kwargs):
+    """Load the ticker universe in the worker parent, so a missing file is reported once"""
+    from .ticker_index import get_ticker_index
+    get_ticker_index()
+
+@worker_init.connect
+def preload_models_before_fork(**kwargs):
+    """Load models once in the worker parent before the prefork pool is created"""
+    if not FINBERT_PRELOAD:
+        return
+
+    try:
+        from .model_registry import preload_models
+        preload_models()
+    except Exception as e:
+        # Children fall back to loading the model lazily on first use
+        logger.error(f"Error preloading models: {e}")
@@ -0,0 +1,237 @@
+import os
+import time
+import logging
+import argparse
+from typing import Dict, List
+
+import numpy as np
+
+from .model_registry import FINBERT_MODEL_NAME, get_finbert_tokenizer, registry
+
+logger = logging.getLogger(__name__)
+
+FINBERT_BACKEND = os.getenv("FINBERT_BACKEND", "torch")  # torch, int8, onnx
+FINBERT_ONNX_PATH = os.getenv("FINBERT_ONNX_PATH", os.path.join("models", "finbert.onnx"))
+
+# Fixed corpus used to compare every backend's labels against fp32 torch
+PARITY_CORPUS = [
+    "Apple beat earnings expectations and raised its full-year guidance.",
+    "Tesla shares plunged after the company missed delivery estimates.",
+    "The Federal Reserve left interest rates unchanged at its meeting.",
+    "Nvidia revenue doubled on surging demand for data center chips.",
+    "The retailer warned of weaker holiday sales and cut its outlook.",
+    "Microsoft announced a quarterly dividend of 75 cents per share.",
+    "Shares of the bank fell sharply amid concerns about loan losses.",
+    "Amazon reported record operating income driven by its cloud unit.",
+    "The company will hold its annual shareholder meeting in May.",
+    "GameStop stock rallied as short sellers rushed to cover positions.",
+    "Boeing faces a new investigation into production quality issues.",
+    "The merger is expected to close in the second quarter of next year.",
+    "Oil prices slipped as inventories rose more than analysts expected.",
+    "Meta's advertising revenue growth accelerated for a third quarter.",
+    "The startup filed for bankruptcy after failing to raise new funding.",
+    "Analysts upgraded the stock to buy, citing strong free cash flow.",
+    "Trading volume was in line with the 30-day average.",
+    "The chipmaker lost market share to rivals and its margins shrank.",
+    "Netflix added more subscribers than expected in the latest quarter.",
+    "The CEO resigned unexpectedly, sending shares down 12 percent.",
+    "$TSLA to the moon, calls printing",
+    "$GME puts printing, this is going to zero",
+    "Holding my $AAPL shares through earnings, no changes to my position.",
+    "Revenue declined 8% year over year as demand softened.",
+]
+
+
+class InferenceBackend:
+    """Runs FinBERT on padded, tokenized batches and returns class probabilities"""
+
+    name = "base"
+    # Tensor type the tokenizer should produce for this backend
+    tensor_type = "pt"
+
+    def predict_proba(self, inputs: Dict) -> np.ndarray:
+        """Return an (n, num_labels) array of softmax probabilities"""
+        raise NotImplementedError
+
+
+class TorchBackend(InferenceBackend):
+    """Reference fp32 PyTorch backend"""
+
+    name = "torch"
+
+    def __init__(self, model):
+        self.model = model
+
+    def predict_proba(self, inputs: Dict) -> np.ndarray:
+        import torch
+
+        with torch.no_grad():
+            outputs = self.model(**inputs)
+            predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
+        return predictions.numpy()
+
+
+class QuantizedTorchBackend(TorchBackend):
+    """PyTorch backend with int8 dynamic quantization of the Linear layers"""
+
+    name = "int8"
+
+
+class OnnxBackend(InferenceBackend):
+    """ONNX Runtime backend running an exported FinBERT graph on CPU"""
+
+    name = "onnx"
+    tensor_type = "np"
+
+    def __init__(self, session):
+        self.session = session
+        self.input_names = {node.name for node in session.get_inputs()}
+
+    def predict_proba(self, inputs: Dict) -> np.ndarray:
+        feed = {
+            name: np.asarray(value, dtype=np.int64)
+            for name, value in inputs.items()
+            if name in self.input_names
+        }
+        logits = self.session.run(None, feed)[0]
+        # Numerically stable softmax
+        exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+        return exp / exp.sum(axis=-1, keepdims=True)
+
+
+def _load_fp32_model(model_name: str):
+    from transformers import AutoModelForSequenceClassification
+
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+    return model
+
+
+def _load_torch(model_name: str) -> InferenceBackend:
+    return TorchBackend(_load_fp32_model(model_name))
+
+
+def _load_int8(model_name: str) -> InferenceBackend:
+    import torch
+
+    model = torch.quantization.quantize_dynamic(
+        _load_fp32_model(model_name), {torch.nn.Linear}, dtype=torch.qint8
+    )
+    return QuantizedTorchBackend(model)
+
+
+def export_onnx(model_name: str, path: str):
+    """Export the fp32 model to an ONNX graph with dynamic batch and sequence axes"""
+    import torch
+    from transformers import AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = _load_fp32_model(model_name)
+    sample = tokenizer(["Shares rose after earnings."], return_tensors="pt")
+    input_names = list(sample.keys())
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    torch.onnx.export(
+        model,
+        tuple(sample[name] for name in input_names),
+        tmp_path,
+        input_names=input_names,
+        output_names=["logits"],
+        dynamic_axes=dynamic_axes,
+        opset_version=14,
+    )
+    # Atomic rename so concurrent workers never load a half-written graph
+    os.replace(tmp_path, path)
+    logger.info(f"Exported {model_name} to {path}")
+
+
+def _load_onnx(model_name: str) -> InferenceBackend:
+    try:
+        import onnxruntime
+    except ImportError:
+        raise RuntimeError("FINBERT_BACKEND=onnx requires the onnxruntime package")
+
+    if not os.path.exists(FINBERT_ONNX_PATH):
+        export_onnx(model_name, FINBERT_ONNX_PATH)
+
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    session = onnxruntime.InferenceSession(
+        FINBERT_ONNX_PATH, options, providers=["CPUExecutionProvider"]
+    )
+    return OnnxBackend(session)
+
+
+BACKEND_LOADERS = {
+    "torch": _load_torch,
+    "int8": _load_int8,
+    "onnx": _load_onnx,
+}
+
+
+def get_backend(name: str = FINBERT_BACKEND, model_name: str = FINBERT_MODEL_NAME) -> InferenceBackend:
+    """Shared inference backend, loaded once per process through the model registry"""
+    if name not in BACKEND_LOADERS:
+        raise ValueError(f"Unknown FinBERT backend '{name}', expected one of {sorted(BACKEND_LOADERS)}")
+
+    return registry.get_or_load(f"{model_name}:{name}", lambda: BACKEND_LOADERS[name](model_name))
+
+
+def predict_labels(backend: InferenceBackend, texts: List[str], batch_size: int = 32) -> List[int]:
+    """Predicted class ids for texts, in order"""
+    tokenizer = get_finbert_tokenizer()
+    labels = []
+    for start in range(0, len(texts), batch_size):
+        inputs = tokenizer(
+            texts[start:start + batch_size],
+            padding=True,
+            truncation=True,
+            max_length=512,
+            return_tensors=backend.tensor_type
+        )
+        labels.extend(backend.predict_proba(dict(inputs)).argmax(axis=-1).tolist())
+    return labels
+
+
+def check_parity(name: str, corpus: List[str] = PARITY_CORPUS) -> Dict[str, float]:
+    """Compare a backend's labels and speed against fp32 torch on a fixed corpus"""
+    reference = get_backend("torch")
+    candidate = get_backend(name)
+
+    started = time.perf_counter()
+    reference_labels = predict_labels(reference, corpus)
+    reference_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    candidate_labels = predict_labels(candidate, corpus)
+    candidate_time = time.perf_counter() - started
+
+    agreement = sum(a == b for a, b in zip(reference_labels, candidate_labels)) / len(corpus)
+    return {
+        "backend": name,
+        "texts": len(corpus),
+        "label_agreement": agreement,
+        "fp32_seconds": round(reference_time, 4),
+        "backend_seconds": round(candidate_time, 4),
+        "speedup": round(reference_time / candidate_time, 2) if candidate_time else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check FinBERT backend label parity against fp32 torch")
+    parser.add_argument("--backend", choices=sorted(BACKEND_LOADERS), default=FINBERT_BACKEND)
+    parser.add_argument("--min-agreement", type=float, default=0.95)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    # Warm both backends so the timings exclude load cost
+    predict_labels(get_backend("torch"), PARITY_CORPUS[:2])
+    predict_labels(get_backend(args.backend), PARITY_CORPUS[:2])
+
+    result = check_parity(args.backend)
+    print(result)
+    if result["label_agreement"] < args.min_agreement:
+        raise SystemExit(f"Label agreement {result['label_agreement']:.2%} is below {args.min_agreement:.0%}")
@@ -0,0 +1,208 @@
+import os
+import time
+import queue
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+from fastapi import FastAPI
+
+from .schemas import InferenceRequest, InferenceResponse, InferenceResult
+
+logger = logging.getLogger(__name__)
+
+# Where callers reach the inference service; unset means score in-process
+INFERENCE_SERVICE_URL = os.getenv("INFERENCE_SERVICE_URL")
+INFERENCE_SERVICE_UDS = os.getenv("INFERENCE_SERVICE_UDS")
+INFERENCE_SERVICE_TIMEOUT = float(os.getenv("INFERENCE_SERVICE_TIMEOUT", "120"))
+# How long the service waits for more requests before running a forward pass
+INFERENCE_BATCH_WINDOW_MS = float(os.getenv("INFERENCE_BATCH_WINDOW_MS", "10"))
+INFERENCE_MAX_BATCH_TEXTS = int(os.getenv("INFERENCE_MAX_BATCH_TEXTS", "256"))
+
+
+class MicroBatcher:
+    """
+    Groups requests that arrive within a short window into one scoring call.
+    Each request gets a Future that resolves to its own slice of the results.
+    """
+
+    def __init__(
+        self,
+        score_fn: Callable[[List[str]], List[Tuple[str, float]]],
+        window_ms: float = INFERENCE_BATCH_WINDOW_MS,
+        max_batch_texts: int = INFERENCE_MAX_BATCH_TEXTS
+    ):
+        self.score_fn = score_fn
+        self.window = window_ms / 1000
+        self.max_batch_texts = max_batch_texts
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.texts = 0
+        self.batches = 0
+        self.last_batch_size = 0
+        self.max_batch_size_seen = 0
+
+    def submit(self, texts: List[str]) -> Future:
+        """Queue texts for scoring; the Future resolves to [(sentiment_label, sentiment_score), ...]"""
+        self._ensure_started()
+        future = Future()
+        if not texts:
+            future.set_result([])
+            return future
+        self._queue.put((texts, future))
+        return future
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+                    self._thread.start()
+
+    def _collect(self) -> List[Tuple[List[str], Future]]:
+        """Block for one request, then gather whatever else arrives within the window"""
+        batch = [self._queue.get()]
+        count = len(batch[0][0])
+        deadline = time.monotonic() + self.window
+
+        while count < self.max_batch_texts:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            count += len(item[0])
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = [text for request_texts, _ in batch for text in request_texts]
+
+            try:
+                results = self.score_fn(texts)
+            except Exception as e:
+                logger.error(f"Error scoring inference batch: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            position = 0
+            for request_texts, future in batch:
+                future.set_result(results[position:position + len(request_texts)])
+                position += len(request_texts)
+
+            self.requests += len(batch)
+            self.texts += len(texts)
+            self.batches += 1
+            self.last_batch_size = len(texts)
+            self.max_batch_size_seen = max(self.max_batch_size_seen, len(texts))
+
+    def stats(self) -> Dict[str, float]:
+        """Queue depth and batch size metrics"""
+        return {
+            "queue_depth": self._queue.qsize(),
+            "requests": self.requests,
+            "texts": self.texts,
+            "batches": self.batches,
+            "avg_batch_size": self.texts / self.batches if self.batches else 0.0,
+            "avg_requests_per_batch": self.requests / self.batches if self.batches else 0.0,
+            "last_batch_size": self.last_batch_size,
+            "max_batch_size": self.max_batch_size_seen,
+        }
+
+
+class InferenceClient:
+    """Client for the inference service over HTTP or a Unix socket"""
+
+    def __init__(
+        self,
+        url: str = INFERENCE_SERVICE_URL,
+        uds: Optional[str] = INFERENCE_SERVICE_UDS,
+        timeout: float = INFERENCE_SERVICE_TIMEOUT
+    ):
+        transport = httpx.HTTPTransport(uds=uds) if uds else None
+        self.client = httpx.Client(base_url=url or "http://localhost", transport=transport, timeout=timeout)
+
+    def analyze(self, cleaned_texts: List[str]) -> List[Tuple[str, float]]:
+        """Score cleaned texts remotely; returns [(sentiment_label, sentiment_score), ...]"""
+        response = self.client.post("/analyze", json={"texts": cleaned_texts})
+        response.raise_for_status()
+        return [
+            (result["sentiment"], result["sentiment_score"])
+            for result in response.json()["results"]
+        ]
+
+
+_client: Optional[InferenceClient] = None
+
+
+def get_inference_client() -> Optional[InferenceClient]:
+    """Shared client when an inference service is configured, otherwise None (score in-process)"""
+    global _client
+    if _client is None and (INFERENCE_SERVICE_URL or INFERENCE_SERVICE_UDS):
+        _client = InferenceClient()
+    return _client
+
+
+# Inference service: one warm model per host, serving every API and worker process.
+# Run with: uvicorn app.inference_service:app --port 8001 (or --uds /tmp/finbert.sock)
+app = FastAPI(title="FinBERT Inference Service", version="1.0.0")
+
+_batcher: Optional[MicroBatcher] = None
+
+
+def get_batcher() -> MicroBatcher:
+    global _batcher
+    if _batcher is None:
+        from .sentiment_analyzer import FinBERTAnalyzer
+
+        # The service itself always scores in-process
+        analyzer = FinBERTAnalyzer(remote=False)
+        _batcher = MicroBatcher(analyzer.score_cleaned)
+    return _batcher
+
+
+@app.on_event("startup")
+async def load_model():
+    from .model_registry import preload_models
+
+    await asyncio.get_running_loop().run_in_executor(None, preload_models)
+    get_batcher()
+
+
+@app.post("/analyze", response_model=InferenceResponse)
+async def analyze(request: InferenceRequest):
+    """Score cleaned texts, batched together with concurrent requests"""
+    results = await asyncio.wrap_future(get_batcher().submit(request.texts))
+    return InferenceResponse(results=[
+        InferenceResult(sentiment=label, sentiment_score=score)
+        for label, score in results
+    ])
+
+
+@app.get("/metrics")
+async def metrics():
+    from .model_registry import registry
+    from .sentiment_cache import get_sentiment_cache
+
+    return {
+        "batcher": get_batcher().stats(),
+        "models": registry.stats(),
+        "cache": get_sentiment_cache().stats(),
+    }
+
+
+@app.get("/health")
+async def health_check():
+    return {"status": "healthy"}
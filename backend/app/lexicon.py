@@ -0,0 +1,248 @@
+import os
+import re
+import math
+import logging
+import argparse
+import threading
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+SENTIMENT_CASCADE = os.getenv("SENTIMENT_CASCADE", "false").lower() == "true"
+LEXICON_CONFIDENCE_THRESHOLD = float(os.getenv("LEXICON_CONFIDENCE_THRESHOLD", "0.8"))
+
+# Finance and retail-trader terms with signed weights. Phrases are matched
+# before their component words because the alternation is ordered longest first.
+FINANCE_LEXICON = {
+    # Bullish
+    "to the moon": 3.0,
+    "calls printing": 3.0,
+    "all time high": 2.0,
+    "beat estimates": 2.5,
+    "beats estimates": 2.5,
+    "beat expectations": 2.5,
+    "raised guidance": 2.5,
+    "price target raised": 2.5,
+    "short squeeze": 2.0,
+    "moon": 2.5,
+    "mooning": 2.5,
+    "rocket": 2.0,
+    "tendies": 2.5,
+    "bullish": 2.5,
+    "bull": 1.5,
+    "rally": 1.5,
+    "rallied": 1.5,
+    "surge": 1.5,
+    "surged": 1.5,
+    "soar": 1.5,
+    "soared": 1.5,
+    "breakout": 1.5,
+    "upgrade": 1.5,
+    "upgraded": 1.5,
+    "outperform": 1.5,
+    "undervalued": 1.5,
+    "buy": 1.0,
+    "buying": 1.0,
+    "long": 1.0,
+    "calls": 1.0,
+    "gain": 1.0,
+    "gains": 1.0,
+    "profit": 1.0,
+    "record": 1.0,
+    "strong": 1.0,
+    "growth": 1.0,
+    # Bearish
+    "puts printing": -3.0,
+    "going to zero": -3.0,
+    "missed estimates": -2.5,
+    "missed expectations": -2.5,
+    "cut guidance": -2.5,
+    "price target cut": -2.5,
+    "bag holder": -2.0,
+    "bagholder": -2.0,
+    "bagholding": -2.0,
+    "bearish": -2.5,
+    "bear": -1.5,
+    "crash": -2.0,
+    "crashed": -2.0,
+    "plunge": -2.0,
+    "plunged": -2.0,
+    "tank": -1.5,
+    "tanked": -1.5,
+    "tanking": -1.5,
+    "dump": -1.5,
+    "dumping": -1.5,
+    "bankruptcy": -2.5,
+    "bankrupt": -2.5,
+    "downgrade": -1.5,
+    "downgraded": -1.5,
+    "underperform": -1.5,
+    "overvalued": -1.5,
+    "sell": -1.0,
+    "selling": -1.0,
+    "short": -1.0,
+    "puts": -1.0,
+    "loss": -1.0,
+    "losses": -1.0,
+    "weak": -1.0,
+    "decline": -1.0,
+    "declined": -1.0,
+    "drop": -1.0,
+    "dropped": -1.0,
+    "lawsuit": -1.0,
+    "fraud": -2.0,
+}
+
+NEGATORS = ["not", "no", "never", "isn't", "wasn't", "aren't", "don't", "doesn't", "didn't", "won't", "can't"]
+
+
+def _build_pattern(lexicon: Dict[str, float]) -> re.Pattern:
+    """One compiled alternation over all terms, with an optional negator up to two words before"""
+    terms = sorted(lexicon, key=len, reverse=True)
+    negators = "|".join(re.escape(word) for word in NEGATORS)
+    alternation = "|".join(re.escape(term).replace(r"\ ", r"\s+") for term in terms)
+    return re.compile(
+        rf"(?:\b(?P<negator>{negators})\s+(?:\w+\s+){{0,2}})?\b(?P<term>{alternation})\b",
+        re.IGNORECASE
+    )
+
+
+class LexiconScorer:
+    """Fast rule-based finance sentiment scorer returning a label plus a confidence"""
+
+    def __init__(self, lexicon: Dict[str, float] = FINANCE_LEXICON):
+        self.lexicon = {term.lower(): weight for term, weight in lexicon.items()}
+        self.pattern = _build_pattern(self.lexicon)
+
+    def score(self, text: str) -> Tuple[str, float, float]:
+        """
+        Score a single text
+        Returns: (sentiment_label, sentiment_score, confidence)
+        """
+        positive = 0.0
+        negative = 0.0
+
+        for match in self.pattern.finditer(text):
+            weight = self.lexicon[" ".join(match.group("term").lower().split())]
+            if match.group("negator"):
+                # "not bullish" is weaker evidence than "bearish"
+                weight = -weight / 2
+            if weight > 0:
+                positive += weight
+            else:
+                negative -= weight
+
+        total = positive + negative
+        if total == 0:
+            return "neutral", 0.0, 0.0
+
+        net = positive - negative
+        # Confidence grows with the amount of evidence and shrinks with mixed signals
+        margin = abs(net) / total
+        confidence = margin * (1 - math.pow(2, -abs(net)))
+
+        if net > 0:
+            return "positive", confidence, confidence
+        if net < 0:
+            return "negative", -confidence, confidence
+        return "neutral", 0.0, confidence
+
+    def score_batch(self, texts: List[str]) -> List[Tuple[str, float, float]]:
+        """
+        score() over a list of texts; a convenience loop, not a vectorized pass.
+        One finditer over the texts joined with a NUL separator, mapping matches
+        back by offset, measured ~29us vs ~35us per text on the short parity
+        corpus but ~115us vs ~98us on Reddit-length comments: the regex scan is
+        the cost either way, and the offset bookkeeping outweighs the saved calls.
+        """
+        return [self.score(text) for text in texts]
+
+
+class SentimentCascade:
+    """Scores texts with the lexicon first and escalates low-confidence texts to a model"""
+
+    def __init__(self, scorer: LexiconScorer = None, threshold: float = LEXICON_CONFIDENCE_THRESHOLD):
+        self.scorer = scorer or LexiconScorer()
+        self.threshold = threshold
+        self.scored = 0
+        self.escalated = 0
+        self._lock = threading.Lock()
+
+    def split(self, texts: List[str]) -> Tuple[Dict[int, Tuple[str, float]], List[int]]:
+        """
+        Resolve confident texts with the lexicon
+        Returns: ({index: (sentiment_label, sentiment_score)}, indices to escalate)
+        """
+        resolved = {}
+        escalate = []
+
+        for i, (label, score, confidence) in enumerate(self.scorer.score_batch(texts)):
+            if confidence >= self.threshold:
+                resolved[i] = (label, score)
+            else:
+                escalate.append(i)
+
+        with self._lock:
+            self.scored += len(texts)
+            self.escalated += len(escalate)
+
+        return resolved, escalate
+
+    def stats(self) -> Dict[str, float]:
+        """Escalation counters for monitoring"""
+        return {
+            "scored": self.scored,
+            "escalated": self.escalated,
+            "escalation_rate": self.escalated / self.scored if self.scored else 0.0,
+        }
+
+
+_cascade = None
+
+
+def get_cascade() -> SentimentCascade:
+    """Process-wide cascade so escalation counters cover every analyzer"""
+    global _cascade
+    if _cascade is None:
+        _cascade = SentimentCascade()
+    return _cascade
+
+
+def measure_agreement(texts: List[str], threshold: float = LEXICON_CONFIDENCE_THRESHOLD) -> Dict[str, float]:
+    """Offline comparison of cascade labels against FinBERT-only labels"""
+    from .sentiment_analyzer import FinBERTAnalyzer
+
+    analyzer = FinBERTAnalyzer(cascade=False)
+    cascade = SentimentCascade(threshold=threshold)
+
+    cleaned = [analyzer.clean_text(text) for text in texts]
+    model_labels = [label for label, _ in analyzer.analyze_batch(texts)]
+    resolved, escalated = cascade.split(cleaned)
+
+    agreed = sum(resolved[i][0] == model_labels[i] for i in resolved)
+    return {
+        "texts": len(texts),
+        "threshold": threshold,
+        "escalation_rate": cascade.stats()["escalation_rate"],
+        # Escalated texts get the FinBERT label, so only lexicon-resolved texts can disagree
+        "lexicon_agreement": agreed / len(resolved) if resolved else None,
+        "overall_agreement": (agreed + len(escalated)) / len(texts) if texts else None,
+    }
+
+
+if __name__ == "__main__":
+    from .inference_backends import PARITY_CORPUS
+
+    parser = argparse.ArgumentParser(description="Measure lexicon cascade agreement with FinBERT-only labels")
+    parser.add_argument("--corpus", help="Text file with one document per line (default: built-in corpus)")
+    parser.add_argument("--threshold", type=float, default=LEXICON_CONFIDENCE_THRESHOLD)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.corpus:
+        with open(args.corpus, encoding="utf-8") as corpus_file:
+            corpus = [line.strip() for line in corpus_file if line.strip()]
+    else:
+        corpus = PARITY_CORPUS
+
+    print(measure_agreement(corpus, args.threshold))
@@ -1,12 +1,16 @@
 from fastapi import FastAPI, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 from typing import List, Optional
+from functools import lru_cache
 import logging
 
-from .database import get_db
-from .models import StockMention, StockSentiment, TrendingStock
+from .database import get_db, get_async_db, get_async_engine
+from .models import StockSentiment, TrendingStock
 from .schemas import (
     StockMention as StockMentionSchema,
     StockSentiment as StockSentimentSchema,
@@ -14,9 +18,7 @@ from .schemas import (
     DashboardResponse,
     StockDetailResponse
 )
-from .aggregator import SentimentAggregator
-from .reddit_scraper import RedditScraper
-from .news_scraper import NewsScraper
+from .aggregator import SentimentAggregator, historical_sentiment_statement, recent_mentions_statement
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -33,9 +35,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize scrapers
-reddit_scraper = RedditScraper()
-news_scraper = NewsScraper()
+# Scrapers are built on first use so the read-only endpoints never import
+# praw or the sentiment model stack
+@lru_cache(maxsize=None)
+def get_reddit_scraper():
+    from .reddit_scraper import RedditScraper
+    return RedditScraper()
+
+@lru_cache(maxsize=None)
+def get_news_scraper():
+    from .news_scraper import NewsScraper
+    return NewsScraper()
+
+@app.on_event("startup")
+def load_ticker_index():
+    # Load the universe now, so a missing file is reported once at startup rather than on the first scrape
+    from .ticker_index import get_ticker_index
+    get_ticker_index()
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    # Close pooled connections cleanly; the engine only exists once a read endpoint was hit
+    if get_async_engine.cache_info().currsize:
+        await get_async_engine().dispose()
 
 @app.get("/")
 async def root():
@@ -46,34 +68,17 @@ async def health_check():
     return {"status": "healthy", "timestamp": datetime.now()}
 
 @app.post("/scrape/reddit")
-async def scrape_reddit(db: Session = Depends(get_db)):
+async def scrape_reddit():
     """Scrape Reddit for stock mentions"""
     try:
-        mentions_data = reddit_scraper.scrape_all()
-        
-        # Save to database
-        saved_count = 0
-        for mention_data in mentions_data:
-            try:
-                mention = StockMention(
-                    ticker=mention_data["ticker"],
-                    text=mention_data["text"],
-                    sentiment=mention_data["sentiment"],
-                    sentiment_score=mention_data["sentiment_score"],
-                    source=mention_data["source"],
-                    source_id=mention_data["source_id"]
-                )
-                db.add(mention)
-                saved_count += 1
-            except Exception as e:
-                logger.error(f"Error saving mention: {e}")
-                continue
-        
-        db.commit()
+        # Scraping, inference and chunked writes block, so keep them off the event loop
+        stats = await run_in_threadpool(lambda: get_reddit_scraper().ingest())
         
         return {
-            "message": f"Scraped and saved {saved_count} Reddit mentions",
-            "total_found": len(mentions_data)
+            "message": f"Scraped and saved {stats['saved']} Reddit mentions",
+            "total_found": stats["mentions"],
+            "skipped_duplicates": stats["skipped_duplicates"],
+            "pipeline": stats
         }
     
     except Exception as e:
@@ -81,34 +86,17 @@ async def scrape_reddit(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/scrape/news")
-async def scrape_news(db: Session = Depends(get_db)):
+async def scrape_news():
     """Scrape news for stock mentions"""
     try:
-        mentions_data = news_scraper.scrape_all()
-        
-        # Save to database
-        saved_count = 0
-        for mention_data in mentions_data:
-            try:
-                mention = StockMention(
-                    ticker=mention_data["ticker"],
-                    text=mention_data["text"],
-                    sentiment=mention_data["sentiment"],
-                    sentiment_score=mention_data["sentiment_score"],
-                    source=mention_data["source"],
-                    source_id=mention_data["source_id"]
-                )
-                db.add(mention)
-                saved_count += 1
-            except Exception as e:
-                logger.error(f"Error saving mention: {e}")
-                continue
-        
-        db.commit()
+        # Scraping, inference and chunked writes block, so keep them off the event loop
+        stats = await run_in_threadpool(lambda: get_news_scraper().ingest())
         
         return {
-            "message": f"Scraped and saved {saved_count} news mentions",
-            "total_found": len(mentions_data)
+            "message": f"Scraped and saved {stats['saved']} news mentions",
+            "total_found": stats["mentions"],
+            "skipped_duplicates": stats["skipped_duplicates"],
+            "pipeline": stats
         }
     
     except Exception as e:
@@ -121,41 +109,34 @@ async def aggregate_sentiment(db: Session = Depends(get_db)):
     try:
         aggregator = SentimentAggregator(db)
         
-        # Aggregate today's sentiment
-        sentiment_records = aggregator.aggregate_daily_sentiment()
+        # Aggregation reads the days' mentions and writes rollups through the sync session,
+        # so keep it off the event loop. Covers today and any earlier days late items were published on.
+        result = await run_in_threadpool(aggregator.aggregate_recent)
         
-        # Calculate trending stocks
-        bullish_stocks, bearish_stocks = aggregator.calculate_trending_stocks()
-        
-        return {
-            "message": "Sentiment aggregation completed",
-            "stocks_processed": len(sentiment_records),
-            "bullish_stocks": len(bullish_stocks),
-            "bearish_stocks": len(bearish_stocks)
-        }
+        return {"message": "Sentiment aggregation completed", **result}
     
     except Exception as e:
         logger.error(f"Error aggregating sentiment: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/dashboard", response_model=DashboardResponse)
-async def get_dashboard(db: Session = Depends(get_db)):
+async def get_dashboard(db: AsyncSession = Depends(get_async_db)):
     """Get dashboard data with top bullish and bearish stocks"""
     try:
         today = datetime.now().date()
         start_date = datetime.combine(today, datetime.min.time())
         
         # Get top 5 bullish stocks
-        bullish_stocks = db.query(TrendingStock).filter(
+        bullish_stocks = (await db.execute(select(TrendingStock).where(
             TrendingStock.category == "bullish",
             TrendingStock.date == start_date
-        ).order_by(TrendingStock.rank).limit(5).all()
+        ).order_by(TrendingStock.rank).limit(5))).scalars().all()
         
         # Get top 5 bearish stocks
-        bearish_stocks = db.query(TrendingStock).filter(
+        bearish_stocks = (await db.execute(select(TrendingStock).where(
             TrendingStock.category == "bearish",
             TrendingStock.date == start_date
-        ).order_by(TrendingStock.rank).limit(5).all()
+        ).order_by(TrendingStock.rank).limit(5))).scalars().all()
         
         return DashboardResponse(
             bullish_stocks=bullish_stocks,
@@ -168,7 +149,7 @@ async def get_dashboard(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/stock/{ticker}", response_model=StockDetailResponse)
-async def get_stock_detail(ticker: str, db: Session = Depends(get_db)):
+async def get_stock_detail(ticker: str, db: AsyncSession = Depends(get_async_db)):
     """Get detailed information for a specific stock"""
     try:
         ticker = ticker.upper()
@@ -176,20 +157,19 @@ async def get_stock_detail(ticker: str, db: Session = Depends(get_db)):
         start_date = datetime.combine(today, datetime.min.time())
         
         # Get current sentiment
-        current_sentiment = db.query(StockSentiment).filter(
+        current_sentiment = (await db.execute(select(StockSentiment).where(
             StockSentiment.ticker == ticker,
             StockSentiment.date == start_date
-        ).first()
+        ).limit(1))).scalars().first()
         
         if not current_sentiment:
             raise HTTPException(status_code=404, detail="Stock not found")
         
         # Get historical sentiment
-        aggregator = SentimentAggregator(db)
-        historical_sentiment = aggregator.get_historical_sentiment(ticker, days=7)
+        historical_sentiment = (await db.execute(historical_sentiment_statement(ticker, days=7))).scalars().all()
         
         # Get recent mentions
-        recent_mentions = aggregator.get_recent_mentions(ticker, limit=20)
+        recent_mentions = [dict(row) for row in (await db.execute(recent_mentions_statement(ticker, limit=20))).mappings()]
         
         return StockDetailResponse(
             ticker=ticker,
@@ -205,12 +185,11 @@ async def get_stock_detail(ticker: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/sentiment/{ticker}/history")
-async def get_sentiment_history(ticker: str, days: int = 7, db: Session = Depends(get_db)):
+async def get_sentiment_history(ticker: str, days: int = 7, db: AsyncSession = Depends(get_async_db)):
     """Get sentiment history for a specific stock"""
     try:
         ticker = ticker.upper()
-        aggregator = SentimentAggregator(db)
-        history = aggregator.get_historical_sentiment(ticker, days)
+        history = (await db.execute(historical_sentiment_statement(ticker, days))).scalars().all()
         
         return {
             "ticker": ticker,
@@ -223,12 +202,11 @@ async def get_sentiment_history(ticker: str, days: int = 7, db: Session = Depend
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/mentions/{ticker}")
-async def get_stock_mentions(ticker: str, limit: int = 50, db: Session = Depends(get_db)):
+async def get_stock_mentions(ticker: str, limit: int = 50, db: AsyncSession = Depends(get_async_db)):
     """Get recent mentions for a specific stock"""
     try:
         ticker = ticker.upper()
-        aggregator = SentimentAggregator(db)
-        mentions = aggregator.get_recent_mentions(ticker, limit)
+        mentions = [dict(row) for row in (await db.execute(recent_mentions_statement(ticker, limit))).mappings()]
         
         return {
             "ticker": ticker,
@@ -0,0 +1,247 @@
+import io
+import os
+import time
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Set
+
+from sqlalchemy import insert, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+
+from .models import Document, LegacyItemKey, Mention, DOCUMENT_NATURAL_KEY
+
+logger = logging.getLogger(__name__)
+
+MENTION_WRITE_METHOD = os.getenv("MENTION_WRITE_METHOD", "auto")  # auto, copy, insert
+MENTION_WRITE_BATCH_SIZE = int(os.getenv("MENTION_WRITE_BATCH_SIZE", "1000"))  # documents per batch
+
+# Columns written for each document and mention; processed_at comes from the database
+DOCUMENT_COLUMNS = ["id", "text", "sentiment", "sentiment_score", "source", "source_id", "created_at"]
+MENTION_COLUMNS = ["document_id", "ticker", "created_at"]
+
+# On PostgreSQL, document ids are drawn from the sequence up front so each
+# document's mentions can be written without reading the ids back row by row
+RESERVE_DOCUMENT_IDS = text(
+    f"SELECT nextval(pg_get_serial_sequence('{Document.__tablename__}', 'id')) FROM generate_series(1, :count)"
+)
+
+# COPY cannot skip conflicting rows, so it loads a per-session staging table
+# that is then merged with INSERT ... ON CONFLICT DO NOTHING
+STAGING_TABLE = "documents_staging"
+CREATE_STAGING_TABLE = f"""
+CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} (
+    id INTEGER,
+    text TEXT,
+    sentiment VARCHAR(20),
+    sentiment_score DOUBLE PRECISION,
+    source VARCHAR(50),
+    source_id VARCHAR(500),
+    created_at TIMESTAMP WITH TIME ZONE
+) ON COMMIT DELETE ROWS
+"""
+MERGE_STAGING_TABLE = f"""
+INSERT INTO {Document.__tablename__} ({', '.join(DOCUMENT_COLUMNS)})
+SELECT {', '.join(DOCUMENT_COLUMNS)} FROM {STAGING_TABLE}
+ON CONFLICT ({', '.join(DOCUMENT_NATURAL_KEY)}) DO NOTHING
+RETURNING id
+"""
+
+# Dialects whose insert() supports on_conflict_do_nothing
+UPSERT_DIALECTS = {"postgresql": postgresql, "sqlite": sqlite}
+
+
+def _copy_value(value) -> str:
+    """Encode one value for COPY's text format"""
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _copy_rows(cursor, table: str, columns: List[str], rows: List[Dict[str, Any]]):
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_copy_value(row.get(column)) for column in columns))
+        buffer.write("\n")
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+
+
+def _mention_rows(documents: List[Dict[str, Any]], inserted_ids: Set[int]) -> List[Dict[str, Any]]:
+    """Mention rows for the documents that were actually inserted"""
+    return [
+        {"document_id": document["id"], "ticker": ticker, "created_at": document["created_at"]}
+        for document in documents if document["id"] in inserted_ids
+        for ticker in document["tickers"]
+    ]
+
+
+class MentionWriter:
+    """
+    Bulk writer for documents and their ticker mentions, bypassing the ORM's per-object unit of work.
+
+    Each document (a scored post, comment or article with its list of tickers)
+    is stored once in documents, with one slim row per ticker in mentions.
+    Documents are written in batches of batch_size, each committed on its own,
+    with PostgreSQL COPY when the driver supports it and a Core executemany
+    insert otherwise. Documents whose (source, source_id, created_at) is already
+    stored are skipped along with their mentions, so re-scraping the same post
+    or article is idempotent; so is re-scraping an item stored before migration
+    0006, through its key in legacy_item_keys. A failed batch is rolled back without undoing the
+    batches before it.
+    """
+
+    def __init__(self, method: str = MENTION_WRITE_METHOD, batch_size: int = MENTION_WRITE_BATCH_SIZE):
+        self.method = method
+        self.batch_size = max(1, batch_size)
+
+    def _resolve_method(self, db) -> str:
+        if self.method != "auto":
+            return self.method
+        return "copy" if db.get_bind().dialect.name == "postgresql" else "insert"
+
+    def _skip_legacy(self, db, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Drop documents already stored before migration 0006, whose rows carry their ingest time as created_at"""
+        ids = {document["source_id"] for document in documents if document.get("source_id") is not None}
+        if not ids:
+            return documents
+        # Both key columns are matched against the batch's values on the primary key, exact pairs in Python
+        stored = {tuple(row) for row in db.execute(
+            select(LegacyItemKey.source, LegacyItemKey.source_id).where(
+                LegacyItemKey.source.in_({document["source"] for document in documents}),
+                LegacyItemKey.source_id.in_(ids)
+            )
+        )}
+        if not stored:
+            return documents
+        return [document for document in documents if (document["source"], document.get("source_id")) not in stored]
+
+    def _reserve_ids(self, db, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        ids = db.execute(RESERVE_DOCUMENT_IDS, {"count": len(documents)}).scalars().all()
+        return [{**document, "id": document_id} for document, document_id in zip(documents, ids)]
+
+    def _copy(self, db, documents: List[Dict[str, Any]]) -> Set[int]:
+        # The session's own DBAPI connection, so COPY runs inside its transaction
+        cursor = db.connection().connection.cursor()
+        try:
+            documents[:] = self._reserve_ids(db, documents)
+            cursor.execute(CREATE_STAGING_TABLE)
+            _copy_rows(cursor, STAGING_TABLE, DOCUMENT_COLUMNS, documents)
+            cursor.execute(MERGE_STAGING_TABLE)
+            inserted_ids = {row[0] for row in cursor.fetchall()}
+            # Mentions of newly inserted documents cannot conflict, so they are copied straight in
+            mentions = _mention_rows(documents, inserted_ids)
+            if mentions:
+                _copy_rows(cursor, Mention.__tablename__, MENTION_COLUMNS, mentions)
+            return inserted_ids
+        finally:
+            cursor.close()
+
+    def _insert(self, db, documents: List[Dict[str, Any]]) -> Set[int]:
+        dialect_name = db.get_bind().dialect.name
+        dialect = UPSERT_DIALECTS.get(dialect_name)
+
+        if dialect_name == "postgresql":
+            documents[:] = self._reserve_ids(db, documents)
+            statement = (
+                dialect.insert(Document.__table__)
+                .on_conflict_do_nothing(index_elements=DOCUMENT_NATURAL_KEY)
+                .returning(Document.__table__.c.id)
+            )
+            params = [{column: document.get(column) for column in DOCUMENT_COLUMNS} for document in documents]
+            # executemany rowcounts are unreliable, so collect the ids actually inserted
+            inserted_ids = set(db.execute(statement, params).scalars().all())
+        else:
+            # Without a sequence to draw from, each document's id comes back from its own insert
+            inserted_ids = set()
+            for index, document in enumerate(documents):
+                params = {column: document.get(column) for column in DOCUMENT_COLUMNS if column != "id"}
+                if dialect is None:
+                    document_id = db.execute(insert(Document.__table__), params).inserted_primary_key[0]
+                else:
+                    document_id = db.execute(
+                        dialect.insert(Document.__table__)
+                        .on_conflict_do_nothing(index_elements=DOCUMENT_NATURAL_KEY)
+                        .returning(Document.__table__.c.id),
+                        params
+                    ).scalar()
+                documents[index] = {**document, "id": document_id}
+                if document_id is not None:
+                    inserted_ids.add(document_id)
+
+        mentions = _mention_rows(documents, inserted_ids)
+        if mentions:
+            db.execute(insert(Mention.__table__), mentions)
+        return inserted_ids
+
+    def write(self, db, documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Write document rows (dicts with the DOCUMENT_COLUMNS except id, plus "tickers";
+        created_at defaults to now) and their mentions in committed batches
+        Returns: {"method", "documents", "saved", "skipped_duplicates", "failed", "seconds",
+                  "batches": [{"rows", "inserted", "seconds", "saved"}]}
+                 where saved, skipped_duplicates and failed count mentions, and a
+                 batch's rows and inserted count documents
+        """
+        method = self._resolve_method(db)
+        now = datetime.now(timezone.utc)
+        documents = [
+            {**document, "created_at": document.get("created_at") or now,
+             # A ticker named twice in one text is still one mention
+             "tickers": list(dict.fromkeys(document["tickers"]))}
+            for document in documents
+        ]
+        result = {"method": method, "documents": 0, "saved": 0, "skipped_duplicates": 0, "failed": 0,
+                  "seconds": 0.0, "batches": []}
+
+        for start in range(0, len(documents), self.batch_size):
+            batch = documents[start:start + self.batch_size]
+            started = time.perf_counter()
+            inserted_ids = set()
+            fresh = []
+            try:
+                fresh = self._skip_legacy(db, batch)
+                if method == "copy" and fresh:
+                    try:
+                        inserted_ids = self._copy(db, fresh)
+                    except AttributeError:
+                        # Driver without copy_expert (not psycopg2); fall back for the rest of the run
+                        logger.warning("Database driver does not support COPY, using executemany inserts")
+                        db.rollback()
+                        method = result["method"] = "insert"
+                        inserted_ids = self._insert(db, fresh)
+                elif fresh:
+                    inserted_ids = self._insert(db, fresh)
+                db.commit()
+                saved = True
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Error saving {len(batch)} documents: {e}")
+                saved = False
+
+            seconds = time.perf_counter() - started
+            mentions = sum(len(document["tickers"]) for document in batch)
+            inserted = sum(len(document["tickers"]) for document in fresh if document.get("id") in inserted_ids)
+            result["seconds"] += seconds
+            result["batches"].append({"rows": len(batch), "inserted": len(inserted_ids),
+                                      "seconds": round(seconds, 4), "saved": saved})
+            if saved:
+                result["documents"] += len(inserted_ids)
+                result["saved"] += inserted
+                result["skipped_duplicates"] += mentions - inserted
+            else:
+                result["failed"] += mentions
+
+        result["seconds"] = round(result["seconds"], 4)
+        return result
+
+
+def write_mentions(db, documents: List[Dict[str, Any]], method: str = MENTION_WRITE_METHOD,
+                   batch_size: int = MENTION_WRITE_BATCH_SIZE) -> Dict[str, Any]:
+    """Bulk-insert documents and their mentions; see MentionWriter.write"""
+    return MentionWriter(method, batch_size).write(db, documents)
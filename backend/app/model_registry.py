@@ -0,0 +1,98 @@
+import gc
+import os
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+FINBERT_MODEL_NAME = os.getenv("FINBERT_MODEL_NAME", "ProsusAI/finbert")
+
+
+def resident_memory_mb() -> Optional[float]:
+    """Current resident set size of this process in MB, if it can be determined"""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    try:
+        import resource
+        # ru_maxrss is the peak RSS, in KB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except Exception:
+        return None
+
+
+class ModelRegistry:
+    """Process-wide registry that loads each model once and hands out the same instance"""
+
+    def __init__(self):
+        self._models: Dict[str, Any] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Return the model registered under key, loading it with loader on first use"""
+        if key in self._models:
+            return self._models[key]
+
+        with self._lock:
+            if key in self._models:
+                return self._models[key]
+
+            logger.info(f"Loading model {key}...")
+            rss_before = resident_memory_mb()
+            started = time.perf_counter()
+            model = loader()
+            load_time = time.perf_counter() - started
+            rss_after = resident_memory_mb()
+
+            self._models[key] = model
+            self._stats[key] = {
+                "load_time_seconds": round(load_time, 3),
+                "rss_mb": round(rss_after, 1) if rss_after is not None else None,
+                "rss_delta_mb": round(rss_after - rss_before, 1) if rss_before is not None and rss_after is not None else None,
+                "pid": os.getpid(),
+            }
+            logger.info(f"Loaded model {key} in {load_time:.2f}s (RSS {self._stats[key]['rss_mb']} MB)")
+            return model
+
+    def is_loaded(self, key: str) -> bool:
+        return key in self._models
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Load time and resident memory per loaded model"""
+        return {key: dict(value) for key, value in self._stats.items()}
+
+
+registry = ModelRegistry()
+
+
+def _load_tokenizer(model_name: str):
+    from transformers import AutoTokenizer
+
+    return AutoTokenizer.from_pretrained(model_name)
+
+
+def get_finbert_tokenizer(model_name: str = FINBERT_MODEL_NAME):
+    """Shared FinBERT tokenizer, loaded once per process"""
+    return registry.get_or_load(f"{model_name}:tokenizer", lambda: _load_tokenizer(model_name))
+
+
+def preload_models():
+    """
+    Load models in the current process ahead of forking worker processes.
+    Freezing the GC afterwards keeps the collector from writing to the weight
+    objects, so forked children keep sharing those pages copy-on-write.
+    """
+    from .inference_backends import get_backend
+
+    get_finbert_tokenizer()
+    get_backend()
+    gc.freeze()
+    logger.info(f"Preloaded models before fork: {registry.stats()}")
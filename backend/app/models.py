@@ -1,25 +1,62 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text, Boolean, UniqueConstraint, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 from datetime import datetime
 
 Base = declarative_base()
 
-class StockMention(Base):
-    __tablename__ = "stock_mentions"
+# A document is one post, comment or article, stored once however many tickers it names.
+# The item's creation time is part of the key because PostgreSQL partitions the table by it.
+DOCUMENT_NATURAL_KEY = ["source", "source_id", "created_at"]
+
+class Document(Base):
+    # On PostgreSQL, documents and mentions are range-partitioned by created_at (migration 0007, app/partitions.py)
+    __tablename__ = "documents"
+    __table_args__ = (
+        UniqueConstraint(*DOCUMENT_NATURAL_KEY, name="uq_documents_source_item"),
+        Index("ix_documents_created_at_brin", "created_at", postgresql_using="brin",
+              postgresql_with={"pages_per_range": 32, "autosummarize": "on"}),
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
-    ticker = Column(String(10), index=True, nullable=False)
+    id = Column(Integer, primary_key=True)
     text = Column(Text, nullable=False)
     sentiment = Column(String(20), nullable=False)  # positive, negative, neutral
     sentiment_score = Column(Float, nullable=False)  # -1 to 1
     source = Column(String(50), nullable=False)  # reddit, news
-    source_id = Column(String(100), nullable=True)  # reddit post/comment id, news article id
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    source_id = Column(String(500), nullable=True)  # reddit post/comment id, news article URL
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())  # when the post, comment or article was published
     processed_at = Column(DateTime(timezone=True), server_default=func.now())
 
+class Mention(Base):
+    # One row per ticker named in a document; sentiment lives on the document
+    __tablename__ = "mentions"
+    __table_args__ = (
+        # Daily aggregation ranges; rows arrive in roughly created_at order
+        Index("ix_mentions_created_at_brin", "created_at", postgresql_using="brin",
+              postgresql_with={"pages_per_range": 32, "autosummarize": "on"}),
+    )
+    
+    document_id = Column(Integer, primary_key=True)
+    ticker = Column(String(10), primary_key=True)
+    created_at = Column(DateTime(timezone=True), primary_key=True)  # the document's, to partition and range-scan by ticker
+
+# Recent mentions of a ticker, newest first
+Index("ix_mentions_ticker_created_at", Mention.ticker, Mention.created_at.desc())
+
+class LegacyItemKey(Base):
+    # Items stored before migration 0006, whose created_at is when they were ingested rather than
+    # published, so a re-scrape would not match DOCUMENT_NATURAL_KEY; the writer skips these keys
+    __tablename__ = "legacy_item_keys"
+    
+    source = Column(String(50), primary_key=True)
+    source_id = Column(String(500), primary_key=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)  # as stored before the migration; expires with retention
+
 class StockSentiment(Base):
     __tablename__ = "stock_sentiments"
+    __table_args__ = (
+        UniqueConstraint("ticker", "date", name="uq_stock_sentiments_ticker_date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     ticker = Column(String(10), index=True, nullable=False)
@@ -35,6 +72,11 @@ class StockSentiment(Base):
 
 class TrendingStock(Base):
     __tablename__ = "trending_stocks"
+    __table_args__ = (
+        UniqueConstraint("ticker", "category", "date", name="uq_trending_stocks_ticker_category_date"),
+        # Dashboard: one category's ranking for a day; also serves date-only lookups
+        Index("ix_trending_stocks_date_category_rank", "date", "category", "rank"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     ticker = Column(String(10), index=True, nullable=False)
@@ -43,5 +85,21 @@ class TrendingStock(Base):
     score = Column(Float, nullable=False)
     mentions_count = Column(Integer, default=0)
     sentiment_index = Column(Float, default=0.0)
-    date = Column(DateTime(timezone=True), index=True, nullable=False)
+    date = Column(DateTime(timezone=True), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class NewsCursor(Base):
+    __tablename__ = "news_cursors"
+    
+    query = Column(String(200), primary_key=True)
+    last_published_at = Column(DateTime(timezone=True), nullable=False)  # newest publishedAt seen
+    last_url = Column(Text, nullable=True)  # URL of the newest article seen
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class StreamCheckpoint(Base):
+    __tablename__ = "stream_checkpoints"
+    
+    stream = Column(String(200), primary_key=True)
+    last_id = Column(String(20), nullable=False)  # fullname of the newest committed item
+    last_created_at = Column(DateTime(timezone=True), nullable=False)  # its creation time
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
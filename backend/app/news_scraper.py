@@ -1,131 +1,326 @@
-import requests
+import asyncio
+import httpx
 import os
-from typing import List, Dict
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from .sentiment_analyzer import FinBERTAnalyzer
+from .database import SessionLocal
+from .models import NewsCursor
+from .pipeline import IngestionPipeline
+from .rate_limiter import Priority, QuotaExhausted, get_rate_limiter
 
 logger = logging.getLogger(__name__)
 
+FINANCE_QUERIES = [
+    "stocks market",
+    "stock market",
+    "trading",
+    "investment",
+    "earnings",
+    "financial news",
+    "wall street",
+    "nasdaq",
+    "dow jones",
+    "s&p 500"
+]
+
 class NewsScraper:
     def __init__(self):
         self.api_key = os.getenv("NEWS_API_KEY")
-        self.base_url = "https://newsapi.org/v2"
+        self.base_url = os.getenv("NEWS_API_BASE_URL", "https://newsapi.org/v2")
         self.headers = {
             "X-API-Key": self.api_key
         }
+        self.page_size = 100
+        self.max_pages = int(os.getenv("NEWS_API_MAX_PAGES", "5"))
+        # Queries fetched at the same time over one pooled client
+        self.concurrency = int(os.getenv("NEWS_API_CONCURRENCY", "4"))
+        # Deadline for a single HTTP request, and for all pages of one query
+        self.request_timeout = float(os.getenv("NEWS_API_REQUEST_TIMEOUT", "10"))
+        self.query_deadline = float(os.getenv("NEWS_API_QUERY_DEADLINE", "30"))
+        # Only fetch articles newer than each query's high-water mark
+        self.incremental = os.getenv("NEWS_INCREMENTAL", "true").lower() == "true"
+        self.last_run_stats = {}
         self.analyzer = FinBERTAnalyzer()
     
-    def search_news(self, query: str, days_back: int = 1) -> List[Dict]:
-        """Search for news articles related to the query"""
-        if not self.api_key:
-            logger.warning("News API key not provided")
-            return []
+    def _client(self) -> httpx.AsyncClient:
+        """One pooled client shared by every query in a run"""
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=self.headers,
+            timeout=httpx.Timeout(self.request_timeout),
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        )
+    
+    async def _fetch_page(self, client: httpx.AsyncClient, params: Dict, page: int, stats: Dict) -> Optional[Dict]:
+        """Fetch one page of /everything; returns the JSON body or None on error"""
+        # First pages carry the latest headlines, so they go ahead of deeper pages in the shared budget
+        await get_rate_limiter().acquire_async("news", Priority.HIGH if page == 1 else Priority.NORMAL)
+        # Counted once sent, so a request cut off by the deadline still counts against the quota
+        stats["requests"] += 1
+        response = await client.get("/everything", params={**params, "page": page})
+        
+        if response.status_code == 200:
+            return response.json()
+        
+        logger.error(f"News API error: {response.status_code} - {response.text}")
+        return None
+    
+    @staticmethod
+    def _parse_published_at(value: Optional[str]) -> Optional[datetime]:
+        """Parse an ISO 8601 publishedAt such as 2024-01-01T12:00:00Z"""
+        if not value:
+            return None
+        try:
+            published_at = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        return published_at if published_at.tzinfo else published_at.replace(tzinfo=timezone.utc)
+    
+    def _load_cursors(self, queries: List[str]) -> Dict[str, Tuple[datetime, Optional[str]]]:
+        """Load each query's high-water mark: (newest publishedAt, its URL)"""
+        if not self.incremental:
+            return {}
+        
+        db = SessionLocal()
+        try:
+            cursors = db.query(NewsCursor).filter(NewsCursor.query.in_(queries)).all()
+            return {cursor.query: (cursor.last_published_at, cursor.last_url) for cursor in cursors}
+        except Exception as e:
+            logger.error(f"Error loading news cursors, fetching full window: {e}")
+            return {}
+        finally:
+            db.close()
+    
+    def _save_cursors(self, cursors: Dict[str, Tuple[datetime, Optional[str]]]):
+        """Advance the high-water marks of queries that completed"""
+        if not self.incremental or not cursors:
+            return
         
+        db = SessionLocal()
         try:
-            # Calculate date range
-            to_date = datetime.now()
-            from_date = to_date - timedelta(days=days_back)
+            for query, (published_at, url) in cursors.items():
+                db.merge(NewsCursor(query=query, last_published_at=published_at, last_url=url))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error saving news cursors: {e}")
+        finally:
+            db.close()
+    
+    async def _search_pages(self, client: httpx.AsyncClient, query: str, days_back: int,
+                            cursor: Optional[Tuple[datetime, Optional[str]]],
+                            seen_urls: Set[str], articles: List[Dict], stats: Dict):
+        """
+        Fetch pages for a query, newest first, adding articles not seen yet as each page arrives.
+        With a cursor, only articles newer than it are requested and paging stops at the first
+        already-seen article. Updates stats in place, so requests made before a timeout or
+        error are still counted; the query is only completed, and its new high-water mark
+        only saved, once paging reached the cursor or ran out of results.
+        """
+        # Calculate date range
+        to_date = datetime.now(timezone.utc)
+        from_date = to_date - timedelta(days=days_back)
+        if cursor and cursor[0] > from_date:
+            from_date = cursor[0]
+        
+        params = {
+            "q": query,
+            "from": from_date.strftime("%Y-%m-%dT%H:%M:%S"),
+            "to": to_date.strftime("%Y-%m-%dT%H:%M:%S"),
+            "sortBy": "publishedAt",
+            "language": "en",
+            "pageSize": self.page_size
+        }
+        
+        fetched = 0
+        for page in range(1, self.max_pages + 1):
+            data = await self._fetch_page(client, params, page, stats)
+            if data is None:
+                return
             
-            params = {
-                "q": query,
-                "from": from_date.strftime("%Y-%m-%d"),
-                "to": to_date.strftime("%Y-%m-%d"),
-                "sortBy": "publishedAt",
-                "language": "en",
-                "pageSize": 100
-            }
+            page_articles = data.get("articles", [])
+            fetched += len(page_articles)
+            reached_cursor = False
             
-            response = requests.get(
-                f"{self.base_url}/everything",
-                headers=self.headers,
-                params=params,
-                timeout=30
-            )
+            for position, article in enumerate(page_articles):
+                published_at = self._parse_published_at(article.get("publishedAt"))
+                url = article.get("url")
+                
+                if cursor and published_at and (
+                    published_at < cursor[0] or (published_at == cursor[0] and url == cursor[1])
+                ):
+                    # Results are newest first, so everything from here on was ingested already
+                    reached_cursor = True
+                    stats["already_seen"] += len(page_articles) - position
+                    break
+                
+                if published_at and (stats["newest"] is None or published_at > stats["newest"][0]):
+                    stats["newest"] = (published_at, url)
+                
+                # Streaming dedup by URL
+                if url not in seen_urls:
+                    seen_urls.add(url)
+                    articles.append(article)
             
-            if response.status_code == 200:
-                data = response.json()
-                return data.get("articles", [])
-            else:
-                logger.error(f"News API error: {response.status_code} - {response.text}")
-                return []
+            if reached_cursor or len(page_articles) < self.page_size or fetched >= data.get("totalResults", 0):
+                if reached_cursor:
+                    # Pages a full-window fetch would still have requested
+                    remaining = max(data.get("totalResults", 0) - fetched, 0)
+                    stats["pages_saved"] = min(-(-remaining // self.page_size), self.max_pages - page)
+                stats["completed"] = True
+                return
         
-        except Exception as e:
-            logger.error(f"Error fetching news: {e}")
-            return []
+        # Stopped at max_pages with older articles left unfetched; keeping the old cursor
+        # means the next run requests them again instead of skipping past them
+        logger.warning(f"News API query '{query}' stopped at {self.max_pages} pages with older results left")
     
-    def get_finance_news(self) -> List[Dict]:
-        """Get general finance news"""
-        finance_queries = [
-            "stocks market",
-            "stock market",
-            "trading",
-            "investment",
-            "earnings",
-            "financial news",
-            "wall street",
-            "nasdaq",
-            "dow jones",
-            "s&p 500"
-        ]
-        
-        all_articles = []
-        
-        for query in finance_queries:
+    async def _search_query(self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore, query: str,
+                            days_back: int, cursor: Optional[Tuple[datetime, Optional[str]]],
+                            seen_urls: Set[str], articles: List[Dict]) -> Dict:
+        """Search one query under the concurrency limit and its deadline"""
+        stats = {"requests": 0, "pages_saved": 0, "already_seen": 0, "newest": None, "completed": False}
+        async with semaphore:
             try:
-                articles = self.search_news(query, days_back=1)
-                all_articles.extend(articles)
+                await asyncio.wait_for(
+                    self._search_pages(client, query, days_back, cursor, seen_urls, articles, stats),
+                    timeout=self.query_deadline
+                )
+            except asyncio.TimeoutError:
+                logger.error(f"News API query '{query}' exceeded its {self.query_deadline}s deadline")
+            except QuotaExhausted as e:
+                logger.warning(f"Skipping news query '{query}': {e}")
             except Exception as e:
                 logger.error(f"Error fetching news for query '{query}': {e}")
-                continue
+        return stats
+    
+    async def search_many(self, queries: List[str], days_back: int = 1) -> Tuple[List[Dict], Dict[str, Tuple[datetime, Optional[str]]]]:
+        """
+        Search several queries concurrently
+        Returns: (articles unique by URL, new high-water marks of the queries that completed).
+                 The marks are not saved here; ingest() saves them once the articles are committed.
+        """
+        if not self.api_key:
+            logger.warning("News API key not provided")
+            return [], {}
         
-        # Remove duplicates based on URL
+        cursors = self._load_cursors(queries)
         seen_urls = set()
-        unique_articles = []
-        for article in all_articles:
-            if article.get("url") not in seen_urls:
-                seen_urls.add(article["url"])
-                unique_articles.append(article)
+        articles = []
+        semaphore = asyncio.Semaphore(self.concurrency)
+        
+        async with self._client() as client:
+            results = await asyncio.gather(*[
+                self._search_query(client, semaphore, query, days_back, cursors.get(query), seen_urls, articles)
+                for query in queries
+            ])
+        
+        # Only advance cursors of queries that finished, so a failed query never leaves a gap
+        new_cursors = {
+            query: stats["newest"]
+            for query, stats in zip(queries, results)
+            if stats["completed"] and stats["newest"]
+        }
         
-        return unique_articles
+        self.last_run_stats = {
+            "requests": sum(stats["requests"] for stats in results),
+            "requests_saved": sum(stats["pages_saved"] for stats in results),
+            "articles_new": len(articles),
+            "articles_already_seen": sum(stats["already_seen"] for stats in results),
+        }
+        logger.info(f"News API quota: {self.last_run_stats}")
+        
+        return articles, new_cursors
+    
+    def search_news(self, query: str, days_back: int = 1) -> List[Dict]:
+        """Search for news articles related to the query; nothing is stored, so the high-water marks stay put"""
+        return asyncio.run(self.search_many([query], days_back=days_back))[0]
+    
+    def get_finance_news(self) -> List[Dict]:
+        """Get general finance news; nothing is stored, so the high-water marks stay put"""
+        return asyncio.run(self.search_many(FINANCE_QUERIES, days_back=1))[0]
+    
+    def _article_metadata(self, article: Dict) -> Dict:
+        return {
+            "source": "news",
+            # NULL when missing, so URL-less articles never collide on the unique key
+            "source_id": article.get("url") or None,
+            "article_title": article.get("title", "") or "",
+            "article_url": article.get("url", ""),
+            "published_at": article.get("publishedAt", ""),
+            # Publication time, so a re-fetched article keeps the same natural key
+            "created_at": self._parse_published_at(article.get("publishedAt")) or datetime.now(timezone.utc)
+        }
+    
+    def _article_candidates(self, articles: List[Dict]) -> Iterator[Tuple[str, Dict]]:
+        """(content, article) pairs for articles with a title or description"""
+        for article in articles:
+            # Combine title and description
+            title = article.get("title", "") or ""
+            description = article.get("description", "") or ""
+            content = f"{title} {description}"
+            
+            if not content.strip():
+                continue
+            
+            yield content, article
     
     def process_articles(self, articles: List[Dict]) -> List[Dict]:
         """Process articles to extract stock mentions and analyze sentiment"""
         processed_data = []
+        candidates = list(self._article_candidates(articles))
         
-        for article in articles:
-            try:
-                # Combine title and description
-                title = article.get("title", "")
-                description = article.get("description", "")
-                content = f"{title} {description}"
-                
-                if not content.strip():
-                    continue
-                
-                # Extract stock mentions and analyze sentiment
-                mentions = self.analyzer.process_text(content)
-                
-                for mention in mentions:
-                    processed_data.append({
-                        "ticker": mention["ticker"],
-                        "text": mention["text"],
-                        "sentiment": mention["sentiment"],
-                        "sentiment_score": mention["sentiment_score"],
-                        "source": "news",
-                        "source_id": article.get("url", ""),
-                        "article_title": title,
-                        "article_url": article.get("url", ""),
-                        "published_at": article.get("publishedAt", ""),
-                        "created_at": datetime.now()
-                    })
-            
-            except Exception as e:
-                logger.error(f"Error processing article: {e}")
-                continue
+        try:
+            # Extract stock mentions and analyze sentiment for all articles in batches
+            mentions_per_article = self.analyzer.process_texts([content for content, _ in candidates])
+        except Exception as e:
+            logger.error(f"Error processing articles: {e}")
+            return processed_data
+        
+        for (_, article), mentions in zip(candidates, mentions_per_article):
+            for mention in mentions:
+                processed_data.append({
+                    "ticker": mention["ticker"],
+                    "text": mention["text"],
+                    "sentiment": mention["sentiment"],
+                    "sentiment_score": mention["sentiment_score"],
+                    **self._article_metadata(article)
+                })
         
         return processed_data
     
+    def iter_candidates(self, articles: List[Dict]) -> Iterator[Tuple[str, Dict, str]]:
+        """Yield (text, metadata, ack id) items for the streaming pipeline; the ack id is the article's position"""
+        for position, (content, article) in enumerate(self._article_candidates(articles)):
+            yield content, self._article_metadata(article), str(position)
+    
+    def ingest(self) -> Dict[str, Any]:
+        """
+        Stream news articles through inference into the database in chunks.
+        The queries' high-water marks are only saved once every article of the run is
+        committed, so after a failed write the next run requests those articles again.
+        """
+        logger.info("Starting news ingestion...")
+        articles, new_cursors = asyncio.run(self.search_many(FINANCE_QUERIES, days_back=1))
+        logger.info(f"Found {len(articles)} news articles")
+        
+        candidates = list(self.iter_candidates(articles))
+        pending = {ack_id for _, _, ack_id in candidates}
+        
+        def on_commit(ack_ids: List[str]):
+            # Only called for flushes without failures
+            pending.difference_update(ack_ids)
+            if not pending:
+                self._save_cursors(new_cursors)
+        
+        if not pending:
+            self._save_cursors(new_cursors)
+        stats = IngestionPipeline(self.analyzer).run(candidates, on_commit=on_commit)
+        stats["news_api"] = self.last_run_stats
+        stats["rate_limits"] = get_rate_limiter().stats()
+        return stats
+    
     def scrape_all(self) -> List[Dict]:
         """Scrape all news sources"""
         all_data = []
@@ -0,0 +1,235 @@
+import os
+import gzip
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+MENTION_PARTITION_INTERVAL = os.getenv("MENTION_PARTITION_INTERVAL", "day")  # day, month
+MENTION_PARTITIONS_AHEAD = int(os.getenv("MENTION_PARTITIONS_AHEAD", "7"))  # in days
+MENTION_RETENTION_DAYS = int(os.getenv("MENTION_RETENTION_DAYS", "90"))  # 0 keeps every partition
+MENTION_ARCHIVE_DIR = os.getenv("MENTION_ARCHIVE_DIR")  # unset drops expired partitions without archiving
+
+# Range-partitioned by created_at on PostgreSQL (migration 0007). A document and its
+# mentions share created_at, so both tables hold the same days and expire together.
+PARTITIONED_TABLES = ["documents", "mentions"]
+
+
+def default_partition(parent: str) -> str:
+    """Partition that catches rows outside every range partition of parent"""
+    return f"{parent}_default"
+
+
+def partition_start(day: date, interval: str = MENTION_PARTITION_INTERVAL) -> date:
+    """First day of the partition containing day"""
+    return day.replace(day=1) if interval == "month" else day
+
+
+def partition_end(start: date, interval: str = MENTION_PARTITION_INTERVAL) -> date:
+    """First day after the partition starting at start"""
+    if interval == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def partition_name(parent: str, start: date, interval: str = MENTION_PARTITION_INTERVAL) -> str:
+    return f"{parent}_p{start.strftime('%Y%m' if interval == 'month' else '%Y%m%d')}"
+
+
+def parse_partition_name(parent: str, name: str) -> Optional[Tuple[date, date]]:
+    """(start, end) of a partition of parent from its name, or None for tables that are not its range partitions"""
+    prefix = f"{parent}_p"
+    suffix = name[len(prefix):] if name.startswith(prefix) else ""
+    try:
+        if len(suffix) == 8:
+            start = datetime.strptime(suffix, "%Y%m%d").date()
+            return start, partition_end(start, "day")
+        if len(suffix) == 6:
+            start = datetime.strptime(suffix, "%Y%m").date()
+            return start, partition_end(start, "month")
+    except ValueError:
+        pass
+    return None
+
+
+def is_partitioned(db, parent: str = PARTITIONED_TABLES[0]) -> bool:
+    """True when parent is a partitioned table (PostgreSQL after migration 0007)"""
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return db.execute(
+        text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+             "WHERE c.relname = :parent AND c.relnamespace = current_schema()::regnamespace)"),
+        {"parent": parent}
+    ).scalar()
+
+
+def list_partitions(db, parent: str) -> List[str]:
+    """Names of the range partitions currently attached to parent"""
+    rows = db.execute(text("""
+        SELECT child.relname FROM pg_inherits i
+        JOIN pg_class parent ON parent.oid = i.inhparent
+        JOIN pg_class child ON child.oid = i.inhrelid
+        WHERE parent.relname = :parent AND parent.relnamespace = current_schema()::regnamespace
+    """), {"parent": parent}).scalars().all()
+    return sorted(name for name in rows if parse_partition_name(parent, name))
+
+
+def list_detached(db, parent: str) -> List[str]:
+    """Partition tables that were detached but not yet archived and dropped, e.g. after a failed archive"""
+    rows = db.execute(text("""
+        SELECT relname FROM pg_class
+        WHERE relkind = 'r' AND NOT relispartition AND relname LIKE :prefix
+          AND relnamespace = current_schema()::regnamespace
+    """), {"prefix": f"{parent}_p%"}).scalars().all()
+    return sorted(name for name in rows if parse_partition_name(parent, name))
+
+
+def _create_partition(db, parent: str, name: str, start: date, end: date):
+    # Bounds are UTC midnights, so a day's partition holds exactly that UTC day
+    bounds = f"FOR VALUES FROM ('{start.isoformat()} 00:00:00+00') TO ('{end.isoformat()} 00:00:00+00')"
+    params = {
+        "start": datetime.combine(start, datetime.min.time(), tzinfo=timezone.utc),
+        "end": datetime.combine(end, datetime.min.time(), tzinfo=timezone.utc),
+    }
+    in_default = db.execute(
+        text(f"SELECT EXISTS (SELECT 1 FROM {default_partition(parent)} WHERE created_at >= :start AND created_at < :end)"),
+        params
+    ).scalar()
+
+    if not in_default:
+        db.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {parent} {bounds}"))
+        return
+
+    # Rows for this range already sit in the default partition (e.g. backfilled history), and
+    # PostgreSQL refuses to create the partition over them; move them into it before attaching
+    db.execute(text(f"CREATE TABLE {name} (LIKE {parent} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    db.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM {default_partition(parent)} WHERE created_at >= :start AND created_at < :end RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+    """), params)
+    db.execute(text(f"ALTER TABLE {parent} ATTACH PARTITION {name} {bounds}"))
+
+
+def ensure_partitions(db, parent: str, first_day: date, last_day: date,
+                      interval: str = MENTION_PARTITION_INTERVAL) -> List[str]:
+    """Create any missing partitions of parent covering first_day..last_day, without committing; returns the names created"""
+    existing = set(list_partitions(db, parent))
+    ranges = [parse_partition_name(parent, name) for name in existing]
+    created = []
+    start = partition_start(first_day, interval)
+    while start <= last_day:
+        end = partition_end(start, interval)
+        name = partition_name(parent, start, interval)
+        if name not in existing and not any(low < end and start < high for low, high in ranges):
+            _create_partition(db, parent, name, start, end)
+            created.append(name)
+        elif name not in existing:
+            # Partly covered by partitions of another interval (the migrations create days);
+            # fill the uncovered days with day partitions instead
+            day = start
+            while day < end:
+                if not any(low <= day < high for low, high in ranges):
+                    _create_partition(db, parent, partition_name(parent, day, "day"), day, partition_end(day, "day"))
+                    created.append(partition_name(parent, day, "day"))
+                day = partition_end(day, "day")
+        start = end
+    if created:
+        logger.info(f"Created {len(created)} {parent} partitions: {created[0]}..{created[-1]}")
+    return created
+
+
+def _archive(db, name: str, archive_dir: str) -> str:
+    """Write a detached partition to archive_dir as gzipped CSV; returns the file path"""
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{name}.csv.gz")
+    tmp_path = f"{path}.tmp"
+    cursor = db.connection().connection.cursor()
+    try:
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as archive:
+            cursor.copy_expert(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER)", archive)
+    finally:
+        cursor.close()
+    # Only a complete archive gets the final name, and only then is the table dropped
+    os.replace(tmp_path, path)
+    return path
+
+
+def expire_partitions(db, parent: str, retention_days: int = MENTION_RETENTION_DAYS,
+                      archive_dir: Optional[str] = MENTION_ARCHIVE_DIR) -> Dict[str, List[str]]:
+    """
+    Detach partitions of parent that end before the retention cutoff, archive them if
+    archive_dir is set, and drop them. Each step commits on its own, so a failed
+    archive leaves a detached table that the next run picks up again.
+    """
+    result = {"detached": [], "archived": [], "dropped": []}
+    if retention_days <= 0:
+        return result
+
+    cutoff = datetime.now(timezone.utc).date() - timedelta(days=retention_days)
+    for name in list_partitions(db, parent):
+        if parse_partition_name(parent, name)[1] <= cutoff:
+            # Only the partition's metadata changes; no rows are deleted
+            db.execute(text(f"ALTER TABLE {parent} DETACH PARTITION {name}"))
+            db.commit()
+            result["detached"].append(name)
+
+    for name in list_detached(db, parent):
+        if parse_partition_name(parent, name)[1] > cutoff:
+            continue
+        try:
+            if archive_dir:
+                path = _archive(db, name, archive_dir)
+                result["archived"].append(path)
+            db.execute(text(f"DROP TABLE {name}"))
+            db.commit()
+            result["dropped"].append(name)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error archiving partition {name}, will retry: {e}")
+
+    # Rows older than every partition land in the default partition, which is small enough to DELETE from
+    purged = db.execute(
+        text(f"DELETE FROM {default_partition(parent)} WHERE created_at < :cutoff"),
+        {"cutoff": datetime.combine(cutoff, datetime.min.time(), tzinfo=timezone.utc)}
+    ).rowcount
+    db.commit()
+    result["default_rows_purged"] = purged
+    return result
+
+
+def expire_legacy_keys(db, retention_days: int = MENTION_RETENTION_DAYS) -> int:
+    """Delete legacy item keys (migration 0006) past retention; their rows are gone, and a re-scrape would be too old to keep"""
+    if retention_days <= 0:
+        return 0
+    cutoff = datetime.now(timezone.utc).date() - timedelta(days=retention_days)
+    purged = db.execute(
+        text("DELETE FROM legacy_item_keys WHERE created_at < :cutoff"),
+        {"cutoff": datetime.combine(cutoff, datetime.min.time(), tzinfo=timezone.utc)}
+    ).rowcount
+    db.commit()
+    return purged
+
+
+def maintain_partitions(db) -> Dict:
+    """Create the upcoming partitions and expire those past retention, for every partitioned table"""
+    if not is_partitioned(db):
+        return {"status": "skipped", "reason": f"{', '.join(PARTITIONED_TABLES)} are not partitioned"}
+
+    today = datetime.now(timezone.utc).date()
+    result = {"status": "completed", "tables": {}}
+    for parent in PARTITIONED_TABLES:
+        created = ensure_partitions(db, parent, today, today + timedelta(days=MENTION_PARTITIONS_AHEAD))
+        db.commit()
+        expired = expire_partitions(db, parent)
+        result["tables"][parent] = {
+            "created": created,
+            **expired,
+            "partitions": len(list_partitions(db, parent)),
+        }
+    result["legacy_keys_purged"] = expire_legacy_keys(db)
+    return result
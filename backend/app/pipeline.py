@@ -0,0 +1,272 @@
+import os
+import time
+import queue
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .database import SessionLocal
+from .mention_writer import MentionWriter
+from .text_processing import normalize
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "1000"))
+PIPELINE_BATCH_SIZE = int(os.getenv("PIPELINE_BATCH_SIZE", "64"))
+PIPELINE_BATCH_WINDOW_MS = float(os.getenv("PIPELINE_BATCH_WINDOW_MS", "50"))
+PIPELINE_FLUSH_SIZE = int(os.getenv("PIPELINE_FLUSH_SIZE", "500"))
+
+# A source item is (text, metadata, ack_id). Metadata must carry "source" and
+# "source_id"; ack_id (or None) is handed to on_commit once the item's rows are committed,
+# or to on_failure when the flush holding them fails.
+SourceItem = Tuple[str, Dict[str, Any], Optional[str]]
+
+_DONE = object()
+
+
+class PipelineStopped(Exception):
+    """Raised inside a stage when another stage failed and the pipeline is shutting down"""
+
+
+class IngestionPipeline:
+    """
+    Streaming fetch -> clean -> batch-infer -> chunked DB write pipeline.
+
+    Each stage runs in its own thread and hands work to the next through a
+    bounded queue, so a slow model or database blocks the stages upstream
+    instead of letting items pile up in memory. Rows are committed every
+    flush_size mentions, so a failure mid-run only loses the current chunk.
+    With a flush_interval, slow or endless sources are committed on a timer too.
+    """
+
+    def __init__(self, analyzer, queue_size: int = PIPELINE_QUEUE_SIZE, batch_size: int = PIPELINE_BATCH_SIZE,
+                 batch_window_ms: float = PIPELINE_BATCH_WINDOW_MS, flush_size: int = PIPELINE_FLUSH_SIZE,
+                 flush_interval: float = 0.0, session_factory: Callable = SessionLocal,
+                 writer: Optional[MentionWriter] = None):
+        self.analyzer = analyzer
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.batch_window = batch_window_ms / 1000
+        self.flush_size = flush_size
+        # For long-running sources: also commit whatever is pending every flush_interval seconds
+        self.flush_interval = flush_interval
+        self.session_factory = session_factory
+        self.writer = writer or MentionWriter()
+
+    def _put(self, q: queue.Queue, item, stats: Dict, stage: str):
+        """Blocking put that records backpressure time and gives up once the pipeline is stopping"""
+        started = time.perf_counter()
+        while True:
+            if self._stop.is_set():
+                raise PipelineStopped()
+            try:
+                q.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        stats["backpressure_seconds"][stage] += time.perf_counter() - started
+
+    def _get(self, q: queue.Queue, timeout: Optional[float] = None):
+        """Blocking get that gives up once the pipeline is stopping"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            if self._stop.is_set():
+                raise PipelineStopped()
+            wait = 0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+            if wait <= 0:
+                raise queue.Empty()
+            try:
+                return q.get(timeout=wait)
+            except queue.Empty:
+                continue
+
+    def _run_stage(self, name: str, target: Callable, errors: List):
+        try:
+            target()
+        except PipelineStopped:
+            pass
+        except Exception as e:
+            logger.error(f"Pipeline stage {name} failed: {e}")
+            errors.append(e)
+            self._stop.set()
+
+    def _fetch(self, source: Iterable[SourceItem], out: queue.Queue, stats: Dict):
+        for item in source:
+            stats["fetched"] += 1
+            self._put(out, item, stats, "fetch")
+        self._put(out, _DONE, stats, "fetch")
+
+    def _clean(self, inbox: queue.Queue, out: queue.Queue, stats: Dict):
+        while True:
+            item = self._get(inbox)
+            if item is _DONE:
+                self._put(out, _DONE, stats, "clean")
+                return
+            text, metadata, ack_id = item
+            cleaned, tickers = normalize(text)
+            if tickers:
+                stats["with_tickers"] += 1
+            self._put(out, (text, (cleaned, tickers), metadata, ack_id), stats, "clean")
+
+    def _infer(self, inbox: queue.Queue, out: queue.Queue, stats: Dict):
+        done = False
+        while not done:
+            # Block for the first item, then gather more until the batch is full or the window closes
+            batch = [self._get(inbox)]
+            window_ends = time.monotonic() + self.batch_window
+            while batch[-1] is not _DONE and len(batch) < self.batch_size:
+                try:
+                    batch.append(self._get(inbox, timeout=max(window_ends - time.monotonic(), 0.001)))
+                except queue.Empty:
+                    break
+
+            if batch[-1] is _DONE:
+                batch.pop()
+                done = True
+
+            if batch:
+                started = time.perf_counter()
+                mentions_per_text = self.analyzer.process_normalized(
+                    [text for text, _, _, _ in batch], [normalized for _, normalized, _, _ in batch]
+                )
+                stats["infer_seconds"] += time.perf_counter() - started
+                stats["infer_batches"] += 1
+
+                # Sentiment is scored once per text, so each text becomes one document naming its tickers
+                rows = []
+                for (_, _, metadata, _), mentions in zip(batch, mentions_per_text):
+                    if mentions:
+                        rows.append({
+                            **metadata,
+                            "text": mentions[0]["text"],
+                            "sentiment": mentions[0]["sentiment"],
+                            "sentiment_score": mentions[0]["sentiment_score"],
+                            "tickers": [mention["ticker"] for mention in mentions],
+                        })
+                self._put(out, (rows, [ack_id for _, _, _, ack_id in batch if ack_id is not None]), stats, "infer")
+
+        self._put(out, _DONE, stats, "infer")
+
+    def _flush(self, db, rows: List[Dict], ack_ids: List[str], stats: Dict, on_commit: Optional[Callable],
+               on_failure: Optional[Callable]):
+        if not rows and not ack_ids:
+            return
+
+        result = self.writer.write(db, rows)
+        stats["write_seconds"] += result["seconds"]
+        stats["write_method"] = result["method"]
+        stats["write_batches"] += len(result["batches"])
+        for batch in result["batches"]:
+            stats["commits"] += batch["saved"]
+            stats["max_write_batch_seconds"] = max(stats["max_write_batch_seconds"], batch["seconds"])
+        stats["documents"] += result["documents"]
+        stats["saved"] += result["saved"]
+        stats["skipped_duplicates"] += result["skipped_duplicates"]
+        stats["failed"] += result["failed"]
+        if result["failed"]:
+            # Unacknowledged items are picked up again by the next scrape
+            if on_failure is not None and ack_ids:
+                on_failure(ack_ids)
+            return
+
+        if on_commit is not None and ack_ids:
+            on_commit(ack_ids)
+
+    def _write(self, inbox: queue.Queue, stats: Dict, on_commit: Optional[Callable], on_failure: Optional[Callable]):
+        db = self.session_factory()
+        rows = []
+        ack_ids = []
+        pending_mentions = 0
+        try:
+            last_flush = time.monotonic()
+            while True:
+                try:
+                    if self.flush_interval:
+                        item = self._get(inbox, timeout=max(last_flush + self.flush_interval - time.monotonic(), 0.001))
+                    else:
+                        item = self._get(inbox)
+                except queue.Empty:
+                    item = None
+
+                if item is _DONE:
+                    break
+                if item is not None:
+                    batch_rows, batch_acks = item
+                    batch_mentions = sum(len(row["tickers"]) for row in batch_rows)
+                    stats["mentions"] += batch_mentions
+                    pending_mentions += batch_mentions
+                    rows.extend(batch_rows)
+                    ack_ids.extend(batch_acks)
+
+                interval_elapsed = self.flush_interval and time.monotonic() - last_flush >= self.flush_interval
+                if pending_mentions >= self.flush_size or interval_elapsed:
+                    self._flush(db, rows, ack_ids, stats, on_commit, on_failure)
+                    rows, ack_ids, pending_mentions = [], [], 0
+                    last_flush = time.monotonic()
+        finally:
+            # Rows that were already scored are kept even when an upstream stage failed
+            try:
+                self._flush(db, rows, ack_ids, stats, on_commit, on_failure)
+            finally:
+                db.close()
+
+    def run(self, source: Iterable[SourceItem], on_commit: Optional[Callable[[List[str]], None]] = None,
+            on_failure: Optional[Callable[[List[str]], None]] = None) -> Dict[str, Any]:
+        """
+        Stream source items through the pipeline into documents and mentions
+        Returns: run statistics (counts, per-stage time, backpressure time)
+        """
+        self._stop = threading.Event()
+        errors = []
+        stats = {
+            "fetched": 0,
+            "with_tickers": 0,
+            "mentions": 0,
+            "documents": 0,
+            "saved": 0,
+            "skipped_duplicates": 0,
+            "failed": 0,
+            "commits": 0,
+            "infer_batches": 0,
+            "infer_seconds": 0.0,
+            "write_seconds": 0.0,
+            "write_method": None,
+            "write_batches": 0,
+            "max_write_batch_seconds": 0.0,
+            "backpressure_seconds": {"fetch": 0.0, "clean": 0.0, "infer": 0.0},
+        }
+        started = time.perf_counter()
+
+        to_clean = queue.Queue(maxsize=self.queue_size)
+        to_infer = queue.Queue(maxsize=self.queue_size)
+        to_write = queue.Queue(maxsize=max(1, self.queue_size // self.batch_size))
+
+        stages = [
+            ("fetch", lambda: self._fetch(source, to_clean, stats)),
+            ("clean", lambda: self._clean(to_clean, to_infer, stats)),
+            ("infer", lambda: self._infer(to_infer, to_write, stats)),
+        ]
+        threads = [
+            threading.Thread(target=self._run_stage, args=(name, target, errors), name=f"pipeline-{name}", daemon=True)
+            for name, target in stages
+        ]
+        for thread in threads:
+            thread.start()
+
+        # The writer runs in the calling thread so the session never crosses threads
+        self._run_stage("write", lambda: self._write(to_write, stats, on_commit, on_failure), errors)
+        for thread in threads:
+            thread.join()
+
+        stats["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+        stats["infer_seconds"] = round(stats["infer_seconds"], 3)
+        stats["write_seconds"] = round(stats["write_seconds"], 3)
+        stats["rows_per_write_second"] = round(stats["saved"] / stats["write_seconds"], 1) if stats["write_seconds"] else 0.0
+        stats["backpressure_seconds"] = {
+            stage: round(seconds, 3) for stage, seconds in stats["backpressure_seconds"].items()
+        }
+        logger.info(f"Ingestion pipeline finished: {stats}")
+
+        if errors:
+            raise errors[0]
+        return stats
@@ -0,0 +1,280 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "redis")  # redis, local, none
+RATE_LIMIT_URL = os.getenv("RATE_LIMIT_URL", os.getenv("REDIS_URL", "redis://localhost:6379"))
+
+# Per-source budgets, shared by every process using the same Redis
+REDDIT_REQUESTS_PER_MINUTE = float(os.getenv("REDDIT_REQUESTS_PER_MINUTE", "90"))
+REDDIT_RATE_BURST = int(os.getenv("REDDIT_RATE_BURST", "10"))
+NEWS_API_REQUESTS_PER_MINUTE = float(os.getenv("NEWS_API_REQUESTS_PER_MINUTE", "30"))
+NEWS_API_RATE_BURST = int(os.getenv("NEWS_API_RATE_BURST", "10"))
+NEWS_API_DAILY_QUOTA = int(os.getenv("NEWS_API_DAILY_QUOTA", "100"))  # 0 for no daily limit
+
+
+class Priority:
+    """Request priorities; lower-priority requests leave part of the bucket for higher ones"""
+
+    HIGH = 0     # e.g. news headlines
+    NORMAL = 1   # e.g. subreddit listings
+    LOW = 2      # e.g. expanding comment trees
+
+
+# Share of a source's burst that a request of each priority must leave in the bucket
+PRIORITY_RESERVE = {
+    Priority.HIGH: 0.0,
+    Priority.NORMAL: 0.25,
+    Priority.LOW: 0.5,
+}
+
+
+class SourceBudget:
+    """Token-bucket rate and optional daily quota for one external source"""
+
+    def __init__(self, requests_per_minute: float, burst: int, daily_quota: int = 0):
+        self.rate = requests_per_minute / 60
+        self.burst = max(1, burst)
+        self.daily_quota = daily_quota
+
+    def reserve(self, priority: int) -> float:
+        # Never reserve the whole bucket, so every priority can still make progress
+        return min(self.burst * PRIORITY_RESERVE.get(priority, 0.0), self.burst - 1)
+
+
+SOURCE_BUDGETS = {
+    "reddit": SourceBudget(REDDIT_REQUESTS_PER_MINUTE, REDDIT_RATE_BURST),
+    "news": SourceBudget(NEWS_API_REQUESTS_PER_MINUTE, NEWS_API_RATE_BURST, NEWS_API_DAILY_QUOTA),
+}
+
+
+class QuotaExhausted(Exception):
+    """Raised when a source's daily request quota is used up"""
+
+
+# Atomic refill-and-take. Returns the seconds to wait before retrying (0 when a
+# token was taken), or -1 when the daily quota is exhausted. Uses the Redis
+# clock so workers on different hosts agree on refill timing.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local reserve = tonumber(ARGV[3])
+local quota = tonumber(ARGV[4])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+if quota > 0 and tonumber(redis.call('GET', KEYS[2]) or '0') >= quota then
+    return '-1'
+end
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+
+local wait = 0
+if tokens - 1 >= reserve then
+    tokens = tokens - 1
+    if quota > 0 then
+        redis.call('INCR', KEYS[2])
+        redis.call('EXPIRE', KEYS[2], 2 * 86400)
+    end
+else
+    wait = (reserve + 1 - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 60)
+return tostring(wait)
+"""
+
+
+class RedisBucketStore:
+    """Token buckets and daily quota counters shared through Redis"""
+
+    def __init__(self, url: str):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.script = self.client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def try_acquire(self, source: str, budget: SourceBudget, reserve: float) -> float:
+        day = datetime.now(timezone.utc).strftime("%Y%m%d")
+        wait = self.script(
+            keys=[f"ratelimit:{source}", f"quota:{source}:{day}"],
+            args=[budget.rate, budget.burst, reserve, budget.daily_quota]
+        )
+        return float(wait)
+
+
+class LocalBucketStore:
+    """In-process token buckets, used when Redis is disabled or unavailable"""
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._quota: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def try_acquire(self, source: str, budget: SourceBudget, reserve: float) -> float:
+        now = time.monotonic()
+        day_key = f"{source}:{datetime.now(timezone.utc).strftime('%Y%m%d')}"
+
+        with self._lock:
+            if budget.daily_quota > 0 and self._quota.get(day_key, 0) >= budget.daily_quota:
+                return -1.0
+
+            tokens, ts = self._buckets.get(source, (budget.burst, now))
+            tokens = min(budget.burst, tokens + (now - ts) * budget.rate)
+
+            wait = 0.0
+            if tokens - 1 >= reserve:
+                tokens -= 1
+                if budget.daily_quota > 0:
+                    self._quota[day_key] = self._quota.get(day_key, 0) + 1
+            else:
+                wait = (reserve + 1 - tokens) / budget.rate
+
+            self._buckets[source] = (tokens, now)
+            return wait
+
+
+_priority = contextvars.ContextVar("request_priority", default=Priority.NORMAL)
+
+
+@contextmanager
+def request_priority(priority: int):
+    """Run requests made inside the block (in this thread or task) at the given priority"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class RateLimiter:
+    """Central scheduler every outbound request acquires a token from"""
+
+    def __init__(self, store=None, budgets: Dict[str, SourceBudget] = SOURCE_BUDGETS):
+        self.store = store
+        self.budgets = budgets
+        self._fallback = LocalBucketStore()
+        self._metrics: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _try_acquire(self, source: str, priority: int) -> float:
+        budget = self.budgets.get(source)
+        if budget is None or budget.rate <= 0:
+            return 0.0
+
+        reserve = budget.reserve(priority)
+        try:
+            return self.store.try_acquire(source, budget, reserve)
+        except Exception as e:
+            # A missing shared store must never stop ingestion; fall back to this process's own buckets
+            logger.warning(f"Shared rate limiter unavailable, limiting in-process: {e}")
+            return self._fallback.try_acquire(source, budget, reserve)
+
+    def _record(self, source: str, waited: float, throttled: bool = False, exhausted: bool = False):
+        with self._lock:
+            metrics = self._metrics.setdefault(source, {
+                "acquired": 0, "throttled": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0, "quota_exhausted": 0
+            })
+            if exhausted:
+                metrics["quota_exhausted"] += 1
+                return
+            metrics["acquired"] += 1
+            metrics["wait_seconds"] += waited
+            metrics["max_wait_seconds"] = max(metrics["max_wait_seconds"], waited)
+            if throttled:
+                metrics["throttled"] += 1
+
+    def acquire(self, source: str, priority: Optional[int] = None) -> float:
+        """Block until a request to source may be sent; returns the seconds waited"""
+        if self.store is None:
+            return 0.0
+
+        priority = _priority.get() if priority is None else priority
+        started = time.monotonic()
+        throttled = False
+        while True:
+            wait = self._try_acquire(source, priority)
+            if wait < 0:
+                self._record(source, 0.0, exhausted=True)
+                raise QuotaExhausted(f"Daily request quota for {source} is exhausted")
+            if wait == 0:
+                break
+            time.sleep(wait)
+            throttled = True
+
+        waited = time.monotonic() - started
+        self._record(source, waited, throttled)
+        return waited
+
+    async def acquire_async(self, source: str, priority: Optional[int] = None) -> float:
+        """Async variant of acquire that sleeps without blocking the event loop"""
+        if self.store is None:
+            return 0.0
+
+        priority = _priority.get() if priority is None else priority
+        started = time.monotonic()
+        throttled = False
+        while True:
+            wait = await asyncio.to_thread(self._try_acquire, source, priority)
+            if wait < 0:
+                self._record(source, 0.0, exhausted=True)
+                raise QuotaExhausted(f"Daily request quota for {source} is exhausted")
+            if wait == 0:
+                break
+            await asyncio.sleep(wait)
+            throttled = True
+
+        waited = time.monotonic() - started
+        self._record(source, waited, throttled)
+        return waited
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-source acquisitions, throttling, wait time and quota exhaustion in this process"""
+        with self._lock:
+            result = {}
+            for source, metrics in self._metrics.items():
+                result[source] = {
+                    **metrics,
+                    "wait_seconds": round(metrics["wait_seconds"], 3),
+                    "max_wait_seconds": round(metrics["max_wait_seconds"], 3),
+                    "mean_wait_seconds": round(metrics["wait_seconds"] / metrics["acquired"], 3) if metrics["acquired"] else 0.0,
+                }
+            return result
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def _build_store():
+    """Create the configured bucket store, or None when rate limiting is disabled"""
+    if RATE_LIMIT_BACKEND == "none":
+        return None
+    if RATE_LIMIT_BACKEND == "redis":
+        try:
+            return RedisBucketStore(RATE_LIMIT_URL)
+        except Exception as e:
+            logger.warning(f"Shared rate limiter unavailable, limiting in-process: {e}")
+    return LocalBucketStore()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Process-wide rate limiter shared by every scraper"""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter(_build_store())
+    return _limiter
@@ -1,135 +1,284 @@
 import praw
+import prawcore
 import os
-from typing import List, Dict
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Tuple
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from .sentiment_analyzer import FinBERTAnalyzer
+from .seen_filter import get_seen_filter
+from .pipeline import IngestionPipeline
+from .rate_limiter import Priority, get_rate_limiter, request_priority
 
 logger = logging.getLogger(__name__)
 
+# Cap on in-flight Reddit requests, shared by every client in the process. The
+# request rate is budgeted across processes by the shared rate limiter.
+REDDIT_MAX_CONCURRENT_REQUESTS = int(os.getenv("REDDIT_MAX_CONCURRENT_REQUESTS", "4"))
+
+class ThrottledRequestor(prawcore.Requestor):
+    """prawcore requestor that bounds concurrency and takes a token from the shared Reddit budget per request"""
+
+    _semaphore = threading.BoundedSemaphore(REDDIT_MAX_CONCURRENT_REQUESTS)
+
+    def request(self, *args, **kwargs):
+        with self._semaphore:
+            get_rate_limiter().acquire("reddit")
+            return super().request(*args, **kwargs)
+
 class RedditScraper:
     def __init__(self):
-        self.reddit = praw.Reddit(
+        self.subreddits = ["stocks", "wallstreetbets", "investing", "SecurityAnalysis"]
+        # Subreddits scraped at the same time; 1 scrapes them one after another
+        self.workers = int(os.getenv("REDDIT_SCRAPE_WORKERS", "4"))
+        # Hot posts per subreddit whose comments are expanded
+        self.comment_posts = 20
+        # PRAW is not thread safe, so every worker thread gets its own client
+        self._local = threading.local()
+        self.reddit = self._create_client()
+        self._local.reddit = self.reddit
+        self.analyzer = FinBERTAnalyzer()
+        # Posts and comments already ingested by an earlier run are skipped before inference
+        self.seen_filter = get_seen_filter("reddit")
+
+    def _create_client(self) -> praw.Reddit:
+        # Endpoint overrides, e.g. to point at benchmarks/fake_apis.py
+        endpoints = {
+            setting: url
+            for setting, url in (("oauth_url", os.getenv("REDDIT_OAUTH_URL")), ("reddit_url", os.getenv("REDDIT_URL")))
+            if url
+        }
+        return praw.Reddit(
             client_id=os.getenv("REDDIT_CLIENT_ID"),
             client_secret=os.getenv("REDDIT_CLIENT_SECRET"),
-            user_agent=os.getenv("REDDIT_USER_AGENT", "StockSentimentBot/1.0")
+            user_agent=os.getenv("REDDIT_USER_AGENT", "StockSentimentBot/1.0"),
+            requestor_class=ThrottledRequestor,
+            **endpoints
         )
-        self.subreddits = ["stocks", "wallstreetbets", "investing", "SecurityAnalysis"]
-        self.analyzer = FinBERTAnalyzer()
-    
+
+    def _client(self) -> praw.Reddit:
+        """The calling thread's Reddit client"""
+        reddit = getattr(self._local, "reddit", None)
+        if reddit is None:
+            reddit = self._local.reddit = self._create_client()
+        return reddit
+
+    def _collect_subreddit(self, subreddit_name: str, post_limit: int,
+                           comment_limit: int) -> Tuple[List[Tuple[str, Dict]], List[Tuple[str, Dict]]]:
+        """
+        Walk one subreddit's hot listing once, yielding post and comment candidates together.
+        Posts older than 24 hours are skipped before their comments are expanded.
+        Returns: (post candidates, comment candidates) as (text, metadata) pairs
+        """
+        post_candidates = []
+        comment_candidates = []
+        comment_posts = self.comment_posts if comment_limit > 0 else 0
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=24)
+
+        try:
+            subreddit = self._client().subreddit(subreddit_name)
+
+            # One listing call serves both posts and comments
+            for position, post in enumerate(subreddit.hot(limit=max(post_limit, comment_posts))):
+                try:
+                    # Skip if post is too old (more than 24 hours)
+                    post_time = datetime.fromtimestamp(post.created_utc, tz=timezone.utc)
+                    if post_time < cutoff:
+                        continue
+
+                    if position < post_limit:
+                        post_candidates.append((f"{post.title} {post.selftext}", {
+                            "source": "reddit",
+                            "source_id": post.id,
+                            "subreddit": subreddit_name,
+                            "post_title": post.title,
+                            "created_at": post_time
+                        }))
+
+                    if position < comment_posts:
+                        comment_candidates.extend(self._collect_comments(post, subreddit_name, comment_limit, cutoff))
+
+                except Exception as e:
+                    logger.error(f"Error processing post {post.id}: {e}")
+                    continue
+
+        except Exception as e:
+            logger.error(f"Error scraping subreddit {subreddit_name}: {e}")
+
+        return post_candidates, comment_candidates
+
+    def _collect_comments(self, post, subreddit_name: str, limit: int, cutoff: datetime) -> List[Tuple[str, Dict]]:
+        """Expand one post's comment forest into (text, metadata) candidates"""
+        candidates = []
+
+        try:
+            # Comment trees are the lowest-priority requests in the shared budget
+            with request_priority(Priority.LOW):
+                post.comments.replace_more(limit=0)  # Get all comments
+                comments = post.comments.list()[:limit]
+
+            for comment in comments:
+                try:
+                    # Skip if comment is too old
+                    comment_time = datetime.fromtimestamp(comment.created_utc, tz=timezone.utc)
+                    if comment_time < cutoff:
+                        continue
+
+                    # Skip deleted/removed comments
+                    if hasattr(comment, 'body') and comment.body in ['[deleted]', '[removed]']:
+                        continue
+
+                    candidates.append((comment.body, {
+                        "source": "reddit",
+                        "source_id": comment.id,
+                        "subreddit": subreddit_name,
+                        "post_title": post.title,
+                        "created_at": comment_time
+                    }))
+
+                except Exception as e:
+                    logger.error(f"Error processing comment {comment.id}: {e}")
+                    continue
+
+        except Exception as e:
+            logger.error(f"Error processing post comments {post.id}: {e}")
+
+        return candidates
+
+    def _skip_seen(self, candidates: List[Tuple[str, Dict]], kind: str) -> Tuple[List[Tuple[str, Dict]], List[str]]:
+        """Drop candidates whose Reddit fullname (t3_ post, t1_ comment) was already processed"""
+        fullnames = [f"{kind}_{metadata['source_id']}" for _, metadata in candidates]
+        unseen = self.seen_filter.filter_unseen(fullnames)
+        return (
+            [candidate for candidate, keep in zip(candidates, unseen) if keep],
+            [fullname for fullname, keep in zip(fullnames, unseen) if keep]
+        )
+
+    def _analyze_collected(self, collected: Tuple[List[Tuple[str, Dict]], List[Tuple[str, Dict]]]) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Analyze new post and comment candidates in one batched call.
+        Nothing is marked as seen: these results are not saved here, so ingest() still picks the items up.
+        """
+        post_candidates, _ = self._skip_seen(collected[0], "t3")
+        comment_candidates, _ = self._skip_seen(collected[1], "t1")
+
+        mentions_per_text = self.analyzer.process_texts(
+            [text for text, _ in post_candidates] + [text for text, _ in comment_candidates]
+        )
+
+        return (
+            self._to_results(post_candidates, mentions_per_text[:len(post_candidates)]),
+            self._to_results(comment_candidates, mentions_per_text[len(post_candidates):])
+        )
+
+    def scrape_subreddits(self, post_limit: int = 100, comment_limit: int = 200) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Scrape posts and comments from finance subreddits in a single listing traversal.
+        With several workers, subreddits are fetched concurrently and each subreddit's
+        texts are analyzed as soon as it finishes, while the others are still fetching.
+        Results are always returned in subreddit order, as in sequential mode.
+        Returns: (post mentions, comment mentions)
+        """
+        post_limit = post_limit // len(self.subreddits)
+        comment_limit = comment_limit // len(self.subreddits)
+
+        if self.workers <= 1:
+            collected = [self._collect_subreddit(name, post_limit, comment_limit) for name in self.subreddits]
+            return self._analyze_collected((
+                [candidate for posts, _ in collected for candidate in posts],
+                [candidate for _, comments in collected for candidate in comments]
+            ))
+
+        results_by_subreddit = {}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="reddit-scraper") as executor:
+            futures = {
+                executor.submit(self._collect_subreddit, name, post_limit, comment_limit): name
+                for name in self.subreddits
+            }
+            for future in as_completed(futures):
+                results_by_subreddit[futures[future]] = self._analyze_collected(future.result())
+
+        return (
+            [result for name in self.subreddits for result in results_by_subreddit[name][0]],
+            [result for name in self.subreddits for result in results_by_subreddit[name][1]]
+        )
+
+    def iter_candidates(self, post_limit: int = 100, comment_limit: int = 200) -> Iterator[Tuple[str, Dict, str]]:
+        """
+        Yield new (text, metadata, fullname) items for the streaming pipeline,
+        one subreddit at a time as soon as each finishes fetching
+        """
+        post_limit = post_limit // len(self.subreddits)
+        comment_limit = comment_limit // len(self.subreddits)
+
+        def unseen(collected):
+            for kind, candidates in zip(("t3", "t1"), collected):
+                kept, fullnames = self._skip_seen(candidates, kind)
+                for (text, metadata), fullname in zip(kept, fullnames):
+                    yield text, metadata, fullname
+
+        if self.workers <= 1:
+            for name in self.subreddits:
+                yield from unseen(self._collect_subreddit(name, post_limit, comment_limit))
+            return
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="reddit-scraper") as executor:
+            futures = [
+                executor.submit(self._collect_subreddit, name, post_limit, comment_limit)
+                for name in self.subreddits
+            ]
+            for future in as_completed(futures):
+                yield from unseen(future.result())
+
+    def ingest(self) -> Dict[str, Any]:
+        """
+        Stream new posts and comments through inference into the database in chunks.
+        Items are only marked as seen once their mentions are committed.
+        """
+        logger.info("Starting Reddit ingestion...")
+        stats = IngestionPipeline(self.analyzer).run(self.iter_candidates(), on_commit=self.seen_filter.mark_seen)
+        stats["seen_filter"] = self.seen_filter.stats()
+        stats["rate_limits"] = get_rate_limiter().stats()
+        return stats
+
     def scrape_posts(self, limit: int = 100) -> List[Dict]:
         """Scrape recent posts from finance subreddits"""
-        posts_data = []
-        
-        for subreddit_name in self.subreddits:
-            try:
-                subreddit = self.reddit.subreddit(subreddit_name)
-                
-                # Get hot posts
-                for post in subreddit.hot(limit=limit // len(self.subreddits)):
-                    try:
-                        # Skip if post is too old (more than 24 hours)
-                        post_time = datetime.fromtimestamp(post.created_utc)
-                        if post_time < datetime.now() - timedelta(hours=24):
-                            continue
-                        
-                        # Extract stock mentions and analyze sentiment
-                        text = f"{post.title} {post.selftext}"
-                        mentions = self.analyzer.process_text(text)
-                        
-                        for mention in mentions:
-                            posts_data.append({
-                                "ticker": mention["ticker"],
-                                "text": mention["text"],
-                                "sentiment": mention["sentiment"],
-                                "sentiment_score": mention["sentiment_score"],
-                                "source": "reddit",
-                                "source_id": post.id,
-                                "subreddit": subreddit_name,
-                                "post_title": post.title,
-                                "created_at": post_time
-                            })
-                    
-                    except Exception as e:
-                        logger.error(f"Error processing post {post.id}: {e}")
-                        continue
-            
-            except Exception as e:
-                logger.error(f"Error scraping subreddit {subreddit_name}: {e}")
-                continue
-        
-        return posts_data
-    
+        return self.scrape_subreddits(post_limit=limit, comment_limit=0)[0]
+
     def scrape_comments(self, limit: int = 200) -> List[Dict]:
         """Scrape recent comments from finance subreddits"""
-        comments_data = []
-        
-        for subreddit_name in self.subreddits:
-            try:
-                subreddit = self.reddit.subreddit(subreddit_name)
-                
-                # Get hot posts and their comments
-                for post in subreddit.hot(limit=20):
-                    try:
-                        post.comments.replace_more(limit=0)  # Get all comments
-                        
-                        for comment in post.comments.list()[:limit // len(self.subreddits)]:
-                            try:
-                                # Skip if comment is too old
-                                comment_time = datetime.fromtimestamp(comment.created_utc)
-                                if comment_time < datetime.now() - timedelta(hours=24):
-                                    continue
-                                
-                                # Skip deleted/removed comments
-                                if hasattr(comment, 'body') and comment.body in ['[deleted]', '[removed]']:
-                                    continue
-                                
-                                # Extract stock mentions and analyze sentiment
-                                text = comment.body
-                                mentions = self.analyzer.process_text(text)
-                                
-                                for mention in mentions:
-                                    comments_data.append({
-                                        "ticker": mention["ticker"],
-                                        "text": mention["text"],
-                                        "sentiment": mention["sentiment"],
-                                        "sentiment_score": mention["sentiment_score"],
-                                        "source": "reddit",
-                                        "source_id": comment.id,
-                                        "subreddit": subreddit_name,
-                                        "post_title": post.title,
-                                        "created_at": comment_time
-                                    })
-                            
-                            except Exception as e:
-                                logger.error(f"Error processing comment {comment.id}: {e}")
-                                continue
-                    
-                    except Exception as e:
-                        logger.error(f"Error processing post comments {post.id}: {e}")
-                        continue
-            
-            except Exception as e:
-                logger.error(f"Error scraping comments from {subreddit_name}: {e}")
-                continue
-        
-        return comments_data
-    
+        return self.scrape_subreddits(post_limit=0, comment_limit=limit)[1]
+
+    def _to_results(self, candidates: List[Tuple[str, Dict]], mentions_per_text: List[List[Dict]]) -> List[Dict]:
+        """Combine analyzed stock mentions with their candidate's (text, metadata) pair"""
+        results = []
+
+        for (_, metadata), mentions in zip(candidates, mentions_per_text):
+            for mention in mentions:
+                results.append({
+                    "ticker": mention["ticker"],
+                    "text": mention["text"],
+                    "sentiment": mention["sentiment"],
+                    "sentiment_score": mention["sentiment_score"],
+                    **metadata
+                })
+
+        return results
+
     def scrape_all(self) -> List[Dict]:
         """Scrape both posts and comments"""
         all_data = []
-        
+
         logger.info("Starting Reddit scraping...")
-        
-        # Scrape posts
-        posts_data = self.scrape_posts(limit=100)
+
+        # Scrape posts and comments in one pass over each subreddit
+        posts_data, comments_data = self.scrape_subreddits(post_limit=100, comment_limit=200)
         all_data.extend(posts_data)
         logger.info(f"Scraped {len(posts_data)} post mentions")
-        
-        # Scrape comments
-        comments_data = self.scrape_comments(limit=200)
         all_data.extend(comments_data)
         logger.info(f"Scraped {len(comments_data)} comment mentions")
-        
+
+        logger.info(f"Seen filter: {self.seen_filter.stats()}")
         logger.info(f"Total Reddit mentions scraped: {len(all_data)}")
         return all_data
@@ -0,0 +1,198 @@
+import os
+import signal
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .database import SessionLocal
+from .models import StreamCheckpoint
+from .pipeline import IngestionPipeline
+from .reddit_scraper import RedditScraper
+
+logger = logging.getLogger(__name__)
+
+REDDIT_STREAM_FLUSH_SIZE = int(os.getenv("REDDIT_STREAM_FLUSH_SIZE", "200"))
+REDDIT_STREAM_FLUSH_SECONDS = float(os.getenv("REDDIT_STREAM_FLUSH_SECONDS", "10"))
+REDDIT_STREAM_IDLE_SECONDS = float(os.getenv("REDDIT_STREAM_IDLE_SECONDS", "2"))
+REDDIT_STREAM_MAX_BACKOFF = float(os.getenv("REDDIT_STREAM_MAX_BACKOFF", "300"))
+
+
+class RedditStreamer:
+    """
+    Long-running Reddit ingestion built on PRAW's submission and comment streams.
+
+    Both streams cover every configured subreddit through one combined
+    subreddit ("stocks+wallstreetbets+...") and are polled in turn from a
+    single thread, so new items flow continuously into the micro-batched
+    ingestion pipeline instead of arriving in a burst every polling cycle.
+    The newest committed item of each stream is checkpointed, and on restart
+    items at or before the checkpoint are skipped. PRAW streams start from the
+    newest 100 items, so a longer outage can only be backfilled by a polling scrape.
+    """
+
+    def __init__(self, scraper: Optional[RedditScraper] = None):
+        self.scraper = scraper or RedditScraper()
+        self.subreddit_names = "+".join(self.scraper.subreddits)
+        self._stop = threading.Event()
+        # Creation time and stream of every yielded item until its rows are committed
+        self._pending: Dict[str, Tuple[str, datetime]] = {}
+        self._pending_lock = threading.Lock()
+        self.checkpoints = self._load_checkpoints()
+
+    def _stream_key(self, kind: str) -> str:
+        return f"reddit:{self.subreddit_names}:{kind}"
+
+    def _load_checkpoints(self) -> Dict[str, Tuple[str, datetime]]:
+        """Load each stream's checkpoint: (newest committed fullname, its creation time)"""
+        keys = [self._stream_key("submissions"), self._stream_key("comments")]
+        db = SessionLocal()
+        try:
+            checkpoints = db.query(StreamCheckpoint).filter(StreamCheckpoint.stream.in_(keys)).all()
+            return {cp.stream: (cp.last_id, cp.last_created_at) for cp in checkpoints}
+        except Exception as e:
+            logger.error(f"Error loading stream checkpoints, starting from the newest items: {e}")
+            return {}
+        finally:
+            db.close()
+
+    def _save_checkpoints(self, checkpoints: Dict[str, Tuple[str, datetime]]):
+        db = SessionLocal()
+        try:
+            for stream, (last_id, created_at) in checkpoints.items():
+                db.merge(StreamCheckpoint(stream=stream, last_id=last_id, last_created_at=created_at))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error saving stream checkpoints: {e}")
+        finally:
+            db.close()
+
+    def _is_checkpointed(self, stream: str, fullname: str, created_at: datetime) -> bool:
+        """True for items at or before the stream's checkpoint"""
+        checkpoint = self.checkpoints.get(stream)
+        if checkpoint is None:
+            return False
+        last_id, last_created_at = checkpoint
+        return fullname == last_id or created_at < last_created_at
+
+    def _post_item(self, post) -> Tuple[str, Dict]:
+        return f"{post.title} {post.selftext}", {
+            "source": "reddit",
+            "source_id": post.id,
+            "subreddit": post.subreddit.display_name,
+            "post_title": post.title,
+            "created_at": datetime.fromtimestamp(post.created_utc, tz=timezone.utc)
+        }
+
+    def _comment_item(self, comment) -> Tuple[str, Dict]:
+        return comment.body, {
+            "source": "reddit",
+            "source_id": comment.id,
+            "subreddit": comment.subreddit.display_name,
+            # Listing comments carry their post's title, so this never fetches the post
+            "post_title": getattr(comment, "link_title", ""),
+            "created_at": datetime.fromtimestamp(comment.created_utc, tz=timezone.utc)
+        }
+
+    def _accept(self, stream: str, fullname: str, created_utc: float) -> bool:
+        """Checkpoint and seen-filter check for one streamed item; remembers accepted items until commit"""
+        created_at = datetime.fromtimestamp(created_utc, tz=timezone.utc)
+        if self._is_checkpointed(stream, fullname, created_at):
+            return False
+        if not self.scraper.seen_filter.filter_unseen([fullname])[0]:
+            return False
+        with self._pending_lock:
+            self._pending[fullname] = (stream, created_at)
+        return True
+
+    def iter_items(self) -> Iterator[Tuple[str, Dict, str]]:
+        """Yield new (text, metadata, fullname) items until stop() is called, reconnecting on errors"""
+        backoff = 1.0
+
+        while not self._stop.is_set():
+            try:
+                subreddit = self.scraper._client().subreddit(self.subreddit_names)
+                # pause_after=-1 makes each stream yield None once it has no new items,
+                # so one thread can alternate between them
+                submissions = subreddit.stream.submissions(pause_after=-1)
+                comments = subreddit.stream.comments(pause_after=-1)
+
+                while not self._stop.is_set():
+                    idle = True
+
+                    for post in submissions:
+                        if post is None or self._stop.is_set():
+                            break
+                        idle = False
+                        if self._accept(self._stream_key("submissions"), post.fullname, post.created_utc):
+                            text, metadata = self._post_item(post)
+                            yield text, metadata, post.fullname
+
+                    for comment in comments:
+                        if comment is None or self._stop.is_set():
+                            break
+                        idle = False
+                        if comment.body in ["[deleted]", "[removed]"]:
+                            continue
+                        if self._accept(self._stream_key("comments"), comment.fullname, comment.created_utc):
+                            text, metadata = self._comment_item(comment)
+                            yield text, metadata, comment.fullname
+
+                    backoff = 1.0
+                    if idle:
+                        self._stop.wait(REDDIT_STREAM_IDLE_SECONDS)
+
+            except Exception as e:
+                logger.error(f"Reddit stream error, reconnecting in {backoff:.0f}s: {e}")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, REDDIT_STREAM_MAX_BACKOFF)
+
+    def _on_commit(self, fullnames: List[str]):
+        """Mark committed items as seen and advance each stream's checkpoint"""
+        self.scraper.seen_filter.mark_seen(fullnames)
+
+        advanced = {}
+        with self._pending_lock:
+            for fullname in fullnames:
+                pending = self._pending.pop(fullname, None)
+                if pending is None:
+                    continue
+                stream, created_at = pending
+                newest = advanced.get(stream) or self.checkpoints.get(stream)
+                if newest is None or created_at >= newest[1]:
+                    advanced[stream] = (fullname, created_at)
+
+        if advanced:
+            self.checkpoints.update(advanced)
+            self._save_checkpoints(advanced)
+
+    def _on_failure(self, fullnames: List[str]):
+        """Forget items whose flush failed, so a stream with repeated write errors does not grow _pending"""
+        with self._pending_lock:
+            for fullname in fullnames:
+                self._pending.pop(fullname, None)
+        logger.warning(f"Dropped {len(fullnames)} streamed items after a failed write; a polling scrape can backfill them")
+
+    def stop(self, *args):
+        """Stop streaming; items already fetched are still scored and committed"""
+        logger.info("Stopping Reddit stream...")
+        self._stop.set()
+
+    def run(self) -> Dict:
+        """Stream until stopped, then return the pipeline statistics"""
+        logger.info(f"Streaming r/{self.subreddit_names} (checkpoints: {self.checkpoints})")
+        pipeline = IngestionPipeline(
+            self.scraper.analyzer,
+            flush_size=REDDIT_STREAM_FLUSH_SIZE,
+            flush_interval=REDDIT_STREAM_FLUSH_SECONDS
+        )
+        return pipeline.run(self.iter_items(), on_commit=self._on_commit, on_failure=self._on_failure)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    streamer = RedditStreamer()
+    signal.signal(signal.SIGTERM, streamer.stop)
+    signal.signal(signal.SIGINT, streamer.stop)
+    logger.info(f"Reddit stream stopped: {streamer.run()}")
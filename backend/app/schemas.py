@@ -14,7 +14,7 @@ class StockMentionCreate(StockMentionBase):
     pass
 
 class StockMention(StockMentionBase):
-    id: int
+    id: int  # the document's id, shared by every ticker it names
     created_at: datetime
     processed_at: datetime
 
@@ -71,3 +71,13 @@ class StockDetailResponse(BaseModel):
     current_sentiment: StockSentiment
     historical_sentiment: List[StockSentiment]
     recent_mentions: List[StockMention]
+
+class InferenceRequest(BaseModel):
+    texts: List[str]
+
+class InferenceResult(BaseModel):
+    sentiment: str
+    sentiment_score: float
+
+class InferenceResponse(BaseModel):
+    results: List[InferenceResult]
@@ -0,0 +1,300 @@
+import os
+import json
+import math
+import time
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SEEN_FILTER_BACKEND = os.getenv("SEEN_FILTER_BACKEND", "redis")  # redis, bloom, none
+SEEN_FILTER_URL = os.getenv("SEEN_FILTER_URL", os.getenv("REDIS_URL", "redis://localhost:6379"))
+SEEN_FILTER_PATH = os.getenv("SEEN_FILTER_PATH", "seen_filter.bloom")
+SEEN_FILTER_TTL = int(os.getenv("SEEN_FILTER_TTL", str(3 * 24 * 60 * 60)))  # 3 days
+SEEN_FILTER_CAPACITY = int(os.getenv("SEEN_FILTER_CAPACITY", "100000"))
+SEEN_FILTER_ERROR_RATE = float(os.getenv("SEEN_FILTER_ERROR_RATE", "0.001"))
+
+
+class RedisSeenSet:
+    """
+    Exact seen-set shared by every worker, stored as one Redis set per TTL window.
+    Members are checked against the current and previous window, so an ID is
+    remembered for between one and two TTLs after it was last added.
+    """
+
+    def __init__(self, url: str, ttl: int, namespace: str = "seen"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.namespace = namespace
+
+    def _window_keys(self) -> List[str]:
+        window = int(time.time() // self.ttl)
+        return [f"{self.namespace}:{window}", f"{self.namespace}:{window - 1}"]
+
+    def contains_many(self, ids: List[str]) -> List[bool]:
+        pipe = self.client.pipeline(transaction=False)
+        for key in self._window_keys():
+            pipe.smismember(key, ids)
+        current, previous = pipe.execute()
+        return [bool(a) or bool(b) for a, b in zip(current, previous)]
+
+    def add_many(self, ids: List[str]):
+        key = self._window_keys()[0]
+        pipe = self.client.pipeline(transaction=False)
+        pipe.sadd(key, *ids)
+        pipe.expire(key, 2 * self.ttl)
+        pipe.execute()
+
+    def stats(self) -> Dict[str, float]:
+        pipe = self.client.pipeline(transaction=False)
+        keys = self._window_keys()
+        for key in keys:
+            pipe.scard(key)
+        for key in keys:
+            pipe.memory_usage(key)
+        results = pipe.execute()
+        return {
+            "items": sum(results[:len(keys)]),
+            "memory_bytes": sum(usage or 0 for usage in results[len(keys):]),
+            # Set membership is exact
+            "false_positive_rate": 0.0,
+        }
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter sized for a capacity and target false-positive rate"""
+
+    def __init__(self, capacity: int, error_rate: float, bits: Optional[bytearray] = None, count: int = 0):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bits if bits is not None else bytearray((self.num_bits + 7) // 8)
+        self.count = count
+
+    def _positions(self, item: str) -> List[int]:
+        # Kirsch-Mitzenmacher double hashing from one 128-bit digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def add(self, item: str) -> bool:
+        """Add item; returns False when it was (probably) already present"""
+        added = False
+        for p in self._positions(item):
+            mask = 1 << (p & 7)
+            if not self.bits[p >> 3] & mask:
+                self.bits[p >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def is_full(self) -> bool:
+        return self.count >= self.capacity
+
+    def false_positive_rate(self) -> float:
+        """Estimated current false-positive rate from the number of items added"""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+
+class ScalableBloomFilter:
+    """
+    Local seen-set that grows by stacking Bloom filters (Almeida et al.).
+    Each new filter doubles the capacity and halves the error rate, so the
+    compound false-positive rate stays below the configured target. The
+    filter is persisted to a file, reloaded when another process rewrites it,
+    and has no expiry; delete the file to reset it. Writers hold an exclusive
+    flock on a sidecar .lock file from load to rename, so concurrent worker
+    processes merge their additions instead of overwriting each other's; on
+    platforms without fcntl, only one process may use the file.
+    """
+
+    def __init__(self, path: str, capacity: int, error_rate: float):
+        self.path = path
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.filters: List[BloomFilter] = []
+        self._version = None
+        self._lock = threading.Lock()
+        self._load()
+
+    def _grow(self):
+        n = len(self.filters)
+        # Geometric error tightening keeps the sum of error rates below error_rate
+        self.filters.append(BloomFilter(self.capacity * 2 ** n, self.error_rate * 0.5 ** (n + 1)))
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock shared with other processes using the same filter file"""
+        if fcntl is None:
+            yield
+            return
+        # A separate lock file, since every save replaces the filter file's inode
+        with open(f"{self.path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _file_version(stat: os.stat_result):
+        # The inode changes on every rename, even when two saves share an mtime tick
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _load(self):
+        """(Re)load the filter file if it changed since it was last read"""
+        try:
+            version = self._file_version(os.stat(self.path))
+        except OSError:
+            version = None
+
+        if version is not None and version != self._version:
+            try:
+                filters = []
+                with open(self.path, "rb") as bloom_file:
+                    header = json.loads(bloom_file.readline())
+                    for meta in header["filters"]:
+                        bits = bytearray(bloom_file.read(meta["bytes"]))
+                        filters.append(BloomFilter(meta["capacity"], meta["error_rate"], bits, meta["count"]))
+                self.filters = filters
+            except Exception as e:
+                logger.warning(f"Could not load seen filter from {self.path}: {e}")
+            self._version = version
+
+        if not self.filters:
+            self._grow()
+
+    def _save(self):
+        header = {"filters": [
+            {"capacity": f.capacity, "error_rate": f.error_rate, "count": f.count, "bytes": len(f.bits)}
+            for f in self.filters
+        ]}
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as bloom_file:
+            bloom_file.write(json.dumps(header).encode("utf-8") + b"\n")
+            for f in self.filters:
+                bloom_file.write(f.bits)
+        # Atomic rename so a crash never leaves a truncated filter behind
+        os.replace(tmp_path, self.path)
+        self._version = self._file_version(os.stat(self.path))
+
+    def contains_many(self, ids: List[str]) -> List[bool]:
+        with self._lock:
+            self._load()
+            return [any(item in f for f in self.filters) for item in ids]
+
+    def add_many(self, ids: List[str]):
+        # Load, add and save under the file lock, so no other process saves in between
+        with self._lock, self._file_lock():
+            self._load()
+            for item in ids:
+                if any(item in f for f in self.filters):
+                    continue
+                if self.filters[-1].is_full():
+                    self._grow()
+                self.filters[-1].add(item)
+            self._save()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            miss_probability = 1.0
+            for f in self.filters:
+                miss_probability *= 1 - f.false_positive_rate()
+            return {
+                "items": sum(f.count for f in self.filters),
+                "memory_bytes": sum(len(f.bits) for f in self.filters),
+                "false_positive_rate": 1 - miss_probability,
+                "filters": len(self.filters),
+            }
+
+
+class SeenFilter:
+    """Skips items whose source IDs were already processed, tracking how much work it saved"""
+
+    def __init__(self, store=None):
+        self.store = store
+        self.checked = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def filter_unseen(self, ids: List[str]) -> List[bool]:
+        """Return True for every id that has not been processed before"""
+        if self.store is None or not ids:
+            return [True] * len(ids)
+
+        try:
+            seen = self.store.contains_many(ids)
+        except Exception as e:
+            logger.warning(f"Seen filter lookup failed, processing all items: {e}")
+            return [True] * len(ids)
+
+        with self._lock:
+            self.checked += len(ids)
+            self.skipped += sum(seen)
+        return [not s for s in seen]
+
+    def mark_seen(self, ids: List[str]):
+        """Record ids as processed"""
+        if self.store is None or not ids:
+            return
+        try:
+            self.store.add_many(ids)
+        except Exception as e:
+            logger.warning(f"Seen filter write failed: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        """Skip counters plus the store's size, memory and false-positive rate"""
+        result = {
+            "backend": type(self.store).__name__ if self.store is not None else None,
+            "checked": self.checked,
+            "skipped": self.skipped,
+            "skip_rate": self.skipped / self.checked if self.checked else 0.0,
+        }
+        if self.store is not None:
+            try:
+                result.update(self.store.stats())
+            except Exception as e:
+                logger.warning(f"Seen filter stats unavailable: {e}")
+        return result
+
+
+_filters: Dict[str, SeenFilter] = {}
+_filters_lock = threading.Lock()
+
+
+def _build_store(namespace: str):
+    """Create the configured seen-set store, or None when disabled or unavailable"""
+    try:
+        if SEEN_FILTER_BACKEND == "redis":
+            return RedisSeenSet(SEEN_FILTER_URL, SEEN_FILTER_TTL, namespace=f"seen:{namespace}")
+        if SEEN_FILTER_BACKEND == "bloom":
+            root, ext = os.path.splitext(SEEN_FILTER_PATH)
+            return ScalableBloomFilter(f"{root}.{namespace}{ext}", SEEN_FILTER_CAPACITY, SEEN_FILTER_ERROR_RATE)
+    except Exception as e:
+        logger.warning(f"Seen filter unavailable, every item will be processed: {e}")
+    return None
+
+
+def get_seen_filter(namespace: str) -> SeenFilter:
+    """Process-wide seen filter for one source, e.g. 'reddit'"""
+    if namespace not in _filters:
+        with _filters_lock:
+            if namespace not in _filters:
+                _filters[namespace] = SeenFilter(_build_store(namespace))
+    return _filters[namespace]
@@ -1,130 +1,240 @@
-import re
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+import os
 from typing import List, Dict, Tuple
 import logging
+from .sentiment_cache import get_sentiment_cache, make_cache_key
+from .model_registry import FINBERT_MODEL_NAME, get_finbert_tokenizer
+from .inference_backends import FINBERT_BACKEND, get_backend
+from .lexicon import SENTIMENT_CASCADE, get_cascade
+from .ticker_index import get_ticker_index
+from .text_processing import clean_text, clean_batch, normalize_batch
+from .inference_service import get_inference_client
 
 logger = logging.getLogger(__name__)
 
+# FinBERT: 0=positive, 1=negative, 2=neutral
+SENTIMENT_MAP = {0: "positive", 1: "negative", 2: "neutral"}
+
 class FinBERTAnalyzer:
-    def __init__(self):
-        self.model_name = "ProsusAI/finbert"
+    def __init__(self, max_batch_size: int = None, backend: str = None, cascade: bool = None, remote: bool = True):
+        self.model_name = FINBERT_MODEL_NAME
+        self.backend_name = backend or FINBERT_BACKEND
+        # Results from different backends may differ slightly, so they are cached separately
+        self.model_id = f"{self.model_name}:{self.backend_name}"
         self.tokenizer = None
-        self.model = None
+        self.backend = None
         self._model_loaded = False
-    
+        self.max_length = 512
+        self.max_batch_size = max_batch_size or int(os.getenv("FINBERT_MAX_BATCH_SIZE", "32"))
+        self.cache = get_sentiment_cache()
+        # Lexicon-first cascade: only low-confidence texts reach FinBERT
+        use_cascade = SENTIMENT_CASCADE if cascade is None else cascade
+        self.cascade = get_cascade() if use_cascade else None
+        # Shared inference service, when configured; None scores in-process
+        self.inference_client = get_inference_client() if remote else None
+
     def _load_model(self):
-        """Load the FinBERT model and tokenizer"""
+        """Load the FinBERT tokenizer and inference backend from the process-wide registry"""
         if self._model_loaded:
             return
-            
+
         try:
-            logger.info("Loading FinBERT model...")
-            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-            self.model = AutoModelForSequenceClassification.from_pretrained(self.model_name)
+            self.tokenizer = get_finbert_tokenizer(self.model_name)
+            self.backend = get_backend(self.backend_name, self.model_name)
             self._model_loaded = True
-            logger.info("FinBERT model loaded successfully")
         except Exception as e:
             logger.error(f"Error loading FinBERT model: {e}")
             raise
-    
+
     def extract_stock_tickers(self, text: str) -> List[str]:
-        """Extract stock tickers from text using regex pattern $TICKER"""
-        pattern = r'\$([A-Z]{1,5})'
-        tickers = re.findall(pattern, text.upper())
-        return list(set(tickers))  # Remove duplicates
-    
+        """Extract stock tickers from text: $TICKER cashtags and, with a ticker universe loaded, bare symbols"""
+        return get_ticker_index().extract(text)
+
     def clean_text(self, text: str) -> str:
         """Clean text by removing emojis, links, and extra whitespace"""
-        # Remove emojis
-        emoji_pattern = re.compile("["
-            u"\U0001F600-\U0001F64F"  # emoticons
-            u"\U0001F300-\U0001F5FF"  # symbols & pictographs
-            u"\U0001F680-\U0001F6FF"  # transport & map symbols
-            u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
-            u"\U00002702-\U000027B0"
-            u"\U000024C2-\U0001F251"
-            "]+", flags=re.UNICODE)
-        text = emoji_pattern.sub(r'', text)
-        
-        # Remove URLs
-        url_pattern = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
-        text = url_pattern.sub('', text)
-        
-        # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        return text
-    
-    def analyze_sentiment(self, text: str) -> Tuple[str, float]:
+        return clean_text(text)
+
+    def _score_to_sentiment(self, predicted_class: int, confidence: float) -> Tuple[str, float]:
+        """Convert a predicted class and its confidence to (label, score in -1..1)"""
+        sentiment_label = SENTIMENT_MAP[predicted_class]
+
+        if sentiment_label == "positive":
+            sentiment_score = confidence
+        elif sentiment_label == "negative":
+            sentiment_score = -confidence
+        else:  # neutral
+            sentiment_score = 0.0
+
+        return sentiment_label, sentiment_score
+
+    def _predict_batch(self, encodings: List[Dict]) -> List[Tuple[str, float]]:
+        """Run one forward pass over already tokenized, unpadded encodings"""
+        # Dynamic padding: pad only to the longest sequence in this batch
+        inputs = self.tokenizer.pad(encodings, padding=True, return_tensors=self.backend.tensor_type)
+
+        predictions = self.backend.predict_proba(dict(inputs))
+        predicted_classes = predictions.argmax(axis=-1)
+        confidences = predictions.max(axis=-1)
+
+        return [
+            self._score_to_sentiment(predicted_class, confidence)
+            for predicted_class, confidence in zip(predicted_classes.tolist(), confidences.tolist())
+        ]
+
+    def analyze_batch(self, texts: List[str]) -> List[Tuple[str, float]]:
         """
-        Analyze sentiment of text using FinBERT
-        Returns: (sentiment_label, confidence_score)
+        Analyze sentiment of many texts
+        With the cascade enabled, texts the finance lexicon scores confidently skip FinBERT
+        Returns: list of (sentiment_label, confidence_score) in the same order as texts
+        """
+        return self._analyze_cleaned(clean_batch(texts))
+
+    def _analyze_cleaned(self, cleaned_texts: List[str]) -> List[Tuple[str, float]]:
+        """Analyze sentiment of already cleaned texts, through the cascade when enabled"""
+        if self.cascade is None:
+            return self.score_cleaned(cleaned_texts)
+
+        results = [("neutral", 0.0)] * len(cleaned_texts)
+        resolved, escalate = self.cascade.split(cleaned_texts)
+
+        for i, result in resolved.items():
+            results[i] = result
+
+        if escalate:
+            model_results = self.score_cleaned([cleaned_texts[i] for i in escalate])
+            for i, result in zip(escalate, model_results):
+                results[i] = result
+
+        return results
+
+    def score_cleaned(self, cleaned_texts: List[str]) -> List[Tuple[str, float]]:
+        """
+        Analyze sentiment of many cleaned texts using FinBERT
+        Cached texts are served from the sentiment cache; the rest are sent to the
+        inference service when one is configured, or bucketed by token length and
+        scored in-process in batches of at most max_batch_size
+        Returns: list of (sentiment_label, confidence_score) in the same order as texts
         """
+        results = [("neutral", 0.0)] * len(cleaned_texts)
+
+        # Group positions by cache key so identical texts are scored once
+        positions_by_key = {}
+        cleaned_by_key = {}
+        for i, cleaned in enumerate(cleaned_texts):
+            if len(cleaned.strip()) < 3:
+                continue
+            key = make_cache_key(self.model_id, cleaned)
+            positions_by_key.setdefault(key, []).append(i)
+            cleaned_by_key[key] = cleaned
+
+        if not positions_by_key:
+            return results
+
+        cached = self.cache.get_many(list(positions_by_key))
+        for key, result in cached.items():
+            for i in positions_by_key[key]:
+                results[i] = result
+
+        pending = [key for key in positions_by_key if key not in cached]
+        if not pending:
+            return results
+
+        if self.inference_client is not None:
+            try:
+                # The service caches what it scores, so results are not cached again here
+                remote_results = self.inference_client.analyze([cleaned_by_key[key] for key in pending])
+                for key, result in zip(pending, remote_results):
+                    for i in positions_by_key[key]:
+                        results[i] = result
+                return results
+            except Exception as e:
+                logger.warning(f"Inference service unavailable, scoring in-process: {e}")
+
         try:
             # Load model if not already loaded
             self._load_model()
-            
-            # Clean the text
-            cleaned_text = self.clean_text(text)
-            
-            if len(cleaned_text.strip()) < 3:
-                return "neutral", 0.0
-            
-            # Tokenize and predict
-            inputs = self.tokenizer(cleaned_text, return_tensors="pt", truncation=True, max_length=512)
-            
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
-            
-            # Get the predicted class and confidence
-            predicted_class = torch.argmax(predictions, dim=-1).item()
-            confidence = predictions[0][predicted_class].item()
-            
-            # Map to sentiment labels (FinBERT: 0=positive, 1=negative, 2=neutral)
-            sentiment_map = {0: "positive", 1: "negative", 2: "neutral"}
-            sentiment_label = sentiment_map[predicted_class]
-            
-            # Convert confidence to sentiment score (-1 to 1)
-            if sentiment_label == "positive":
-                sentiment_score = confidence
-            elif sentiment_label == "negative":
-                sentiment_score = -confidence
-            else:  # neutral
-                sentiment_score = 0.0
-            
-            return sentiment_label, sentiment_score
-            
+
+            encoded = self.tokenizer(
+                [cleaned_by_key[key] for key in pending],
+                truncation=True,
+                max_length=self.max_length
+            )
+            encodings = [
+                {name: encoded[name][j] for name in encoded.keys()}
+                for j in range(len(pending))
+            ]
         except Exception as e:
             logger.error(f"Error analyzing sentiment: {e}")
-            return "neutral", 0.0
-    
-    def process_text(self, text: str) -> List[Dict[str, any]]:
+            return results
+
+        # Length bucketing: neighbouring texts in a batch have similar lengths,
+        # so little compute is spent on padding
+        order = sorted(range(len(pending)), key=lambda j: len(encodings[j]["input_ids"]))
+
+        for start in range(0, len(order), self.max_batch_size):
+            batch = order[start:start + self.max_batch_size]
+            try:
+                batch_results = self._predict_batch([encodings[j] for j in batch])
+            except Exception as e:
+                logger.error(f"Error analyzing sentiment batch: {e}")
+                continue
+
+            scored = {}
+            for j, result in zip(batch, batch_results):
+                scored[pending[j]] = result
+                for i in positions_by_key[pending[j]]:
+                    results[i] = result
+            self.cache.set_many(scored)
+
+        return results
+
+    def analyze_sentiment(self, text: str) -> Tuple[str, float]:
         """
-        Process text to extract stock mentions and analyze sentiment
-        Returns: List of dicts with ticker, sentiment, and score
+        Analyze sentiment of text using FinBERT
+        Returns: (sentiment_label, confidence_score)
+        """
+        return self.analyze_batch([text])[0]
+
+    def process_texts(self, texts: List[str]) -> List[List[Dict[str, any]]]:
         """
-        results = []
-        
-        # Extract stock tickers
-        tickers = self.extract_stock_tickers(text)
-        
-        if not tickers:
+        Process many texts to extract stock mentions and analyze sentiment in batches
+        Returns: one list of dicts with ticker, sentiment, and score per input text
+        """
+        # Clean and extract stock tickers in one pass
+        return self.process_normalized(texts, normalize_batch(texts))
+
+    def process_normalized(self, texts: List[str], normalized: List[Tuple[str, List[str]]]) -> List[List[Dict[str, any]]]:
+        """
+        Analyze sentiment for texts already cleaned by text_processing.normalize
+        Returns: one list of dicts with ticker, sentiment, and score per input text
+        """
+        results = [[] for _ in texts]
+
+        # Only texts that mention a ticker need a model call
+        candidates = [i for i, (_, tickers) in enumerate(normalized) if tickers]
+
+        if not candidates:
             return results
-        
-        # Analyze sentiment for the entire text
-        sentiment_label, sentiment_score = self.analyze_sentiment(text)
-        
+
+        # Analyze sentiment for the entire text of every candidate at once
+        sentiments = self._analyze_cleaned([normalized[i][0] for i in candidates])
+
         # Create result for each ticker found
-        for ticker in tickers:
-            results.append({
-                "ticker": ticker,
-                "text": text,
-                "sentiment": sentiment_label,
-                "sentiment_score": sentiment_score
-            })
-        
+        for i, (sentiment_label, sentiment_score) in zip(candidates, sentiments):
+            for ticker in normalized[i][1]:
+                results[i].append({
+                    "ticker": ticker,
+                    "text": texts[i],
+                    "sentiment": sentiment_label,
+                    "sentiment_score": sentiment_score
+                })
+
         return results
 
+    def process_text(self, text: str) -> List[Dict[str, any]]:
+        """
+        Process text to extract stock mentions and analyze sentiment
+        Returns: List of dicts with ticker, sentiment, and score
+        """
+        return self.process_texts([text])[0]
+
 # Note: Create analyzer instances as needed to avoid loading the model at import time
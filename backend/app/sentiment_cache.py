@@ -0,0 +1,216 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SENTIMENT_CACHE_BACKEND = os.getenv("SENTIMENT_CACHE_BACKEND", "redis")  # redis, sqlite, none
+SENTIMENT_CACHE_URL = os.getenv("SENTIMENT_CACHE_URL", os.getenv("REDIS_URL", "redis://localhost:6379"))
+SENTIMENT_CACHE_PATH = os.getenv("SENTIMENT_CACHE_PATH", "sentiment_cache.sqlite3")
+SENTIMENT_CACHE_TTL = int(os.getenv("SENTIMENT_CACHE_TTL", str(7 * 24 * 60 * 60)))  # 7 days
+SENTIMENT_CACHE_LRU_SIZE = int(os.getenv("SENTIMENT_CACHE_LRU_SIZE", "50000"))
+SENTIMENT_CACHE_MAX_ENTRIES = int(os.getenv("SENTIMENT_CACHE_MAX_ENTRIES", "1000000"))
+
+
+def make_cache_key(model_id: str, cleaned_text: str) -> str:
+    """Content-addressed key for a cleaned text scored by a given model"""
+    digest = hashlib.sha256(f"{model_id}\0{cleaned_text}".encode("utf-8")).hexdigest()
+    return f"sentiment:{digest}"
+
+
+class LRUTier:
+    """In-process least-recently-used tier"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> Dict[str, Tuple[str, float]]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._data:
+                    self._data.move_to_end(key)
+                    found[key] = self._data[key]
+        return found
+
+    def set_many(self, items: Dict[str, Tuple[str, float]]):
+        with self._lock:
+            for key, value in items.items():
+                self._data[key] = value
+                self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisTier:
+    """Shared tier backed by Redis with a per-key TTL"""
+
+    def __init__(self, url: str, ttl: int):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        # Fail here when Redis is down, so the cache runs on its LRU tier instead of
+        # attempting (and logging) a connection on every lookup and write
+        self.client.ping()
+
+    def get_many(self, keys: List[str]) -> Dict[str, Tuple[str, float]]:
+        values = self.client.mget(keys)
+        return {
+            key: tuple(json.loads(value))
+            for key, value in zip(keys, values)
+            if value is not None
+        }
+
+    def set_many(self, items: Dict[str, Tuple[str, float]]):
+        pipe = self.client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.set(key, json.dumps(value), ex=self.ttl)
+        pipe.execute()
+
+
+class SQLiteTier:
+    """Shared tier backed by a local SQLite file with TTL and a size limit"""
+
+    def __init__(self, path: str, ttl: int, max_entries: int):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sentiment_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_sentiment_cache_expires_at ON sentiment_cache (expires_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection per call keeps the tier safe across threads and forked workers
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get_many(self, keys: List[str]) -> Dict[str, Tuple[str, float]]:
+        found = {}
+        now = time.time()
+        with self._connect() as conn:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT key, value FROM sentiment_cache WHERE expires_at > ? AND key IN ({placeholders})",
+                    [now, *chunk]
+                ).fetchall()
+                for key, value in rows:
+                    found[key] = tuple(json.loads(value))
+        return found
+
+    def set_many(self, items: Dict[str, Tuple[str, float]]):
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO sentiment_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                [(key, json.dumps(value), now + self.ttl) for key, value in items.items()]
+            )
+            conn.execute("DELETE FROM sentiment_cache WHERE expires_at <= ?", (now,))
+            # Evict the entries closest to expiry once the size limit is exceeded
+            conn.execute(
+                "DELETE FROM sentiment_cache WHERE key IN ("
+                "SELECT key FROM sentiment_cache ORDER BY expires_at "
+                "LIMIT MAX((SELECT COUNT(*) FROM sentiment_cache) - ?, 0))",
+                (self.max_entries,)
+            )
+
+
+class SentimentCache:
+    """Two-tier sentiment cache: an in-process LRU in front of an optional shared tier"""
+
+    def __init__(self, lru_size: int = SENTIMENT_CACHE_LRU_SIZE, shared_tier=None):
+        self.lru = LRUTier(lru_size)
+        self.shared = shared_tier
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> Dict[str, Tuple[str, float]]:
+        """Look up keys in the LRU tier, then the shared tier; shared hits are promoted to the LRU"""
+        found = self.lru.get_many(keys)
+        local_hits = len(found)
+        remote = {}
+
+        missing = [key for key in keys if key not in found]
+        if missing and self.shared is not None:
+            try:
+                remote = self.shared.get_many(missing)
+            except Exception as e:
+                logger.warning(f"Shared sentiment cache lookup failed: {e}")
+            if remote:
+                self.lru.set_many(remote)
+                found.update(remote)
+
+        with self._lock:
+            self.hits += local_hits
+            self.shared_hits += len(remote)
+            self.misses += len(keys) - len(found)
+
+        return found
+
+    def set_many(self, items: Dict[str, Tuple[str, float]]):
+        """Store freshly scored results in both tiers"""
+        if not items:
+            return
+
+        self.lru.set_many(items)
+        if self.shared is not None:
+            try:
+                self.shared.set_many(items)
+            except Exception as e:
+                logger.warning(f"Shared sentiment cache write failed: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters for monitoring"""
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+            "lru_size": len(self.lru),
+        }
+
+
+_cache: Optional[SentimentCache] = None
+_cache_lock = threading.Lock()
+
+
+def _build_shared_tier():
+    """Create the configured shared tier, or None when disabled or unavailable"""
+    try:
+        if SENTIMENT_CACHE_BACKEND == "redis":
+            return RedisTier(SENTIMENT_CACHE_URL, SENTIMENT_CACHE_TTL)
+        if SENTIMENT_CACHE_BACKEND == "sqlite":
+            return SQLiteTier(SENTIMENT_CACHE_PATH, SENTIMENT_CACHE_TTL, SENTIMENT_CACHE_MAX_ENTRIES)
+    except Exception as e:
+        logger.warning(f"Shared sentiment cache unavailable, using in-process cache only: {e}")
+    return None
+
+
+def get_sentiment_cache() -> SentimentCache:
+    """Process-wide sentiment cache shared by every analyzer"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SentimentCache(shared_tier=_build_shared_tier())
+    return _cache
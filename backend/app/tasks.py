@@ -10,7 +10,7 @@ from .database import SessionLocal
 from .reddit_scraper import RedditScraper
 from .news_scraper import NewsScraper
 from .aggregator import SentimentAggregator
-from .models import StockMention
+from .partitions import maintain_partitions
 
 logger = logging.getLogger(__name__)
 
@@ -26,41 +26,17 @@ def scrape_reddit_task(self):
         # Initialize scraper
         reddit_scraper = RedditScraper()
         
-        # Scrape data
-        mentions_data = reddit_scraper.scrape_all()
+        # Stream scraped posts and comments through inference into the database
+        stats = reddit_scraper.ingest()
+        logger.info(f"Saved {stats['saved']} Reddit mentions")
         
-        # Save to database
-        db = SessionLocal()
-        saved_count = 0
-        
-        try:
-            for mention_data in mentions_data:
-                try:
-                    mention = StockMention(
-                        ticker=mention_data["ticker"],
-                        text=mention_data["text"],
-                        sentiment=mention_data["sentiment"],
-                        sentiment_score=mention_data["sentiment_score"],
-                        source=mention_data["source"],
-                        source_id=mention_data["source_id"]
-                    )
-                    db.add(mention)
-                    saved_count += 1
-                except Exception as e:
-                    logger.error(f"Error saving mention: {e}")
-                    continue
-            
-            db.commit()
-            logger.info(f"Saved {saved_count} Reddit mentions")
-            
-            return {
-                "status": "completed",
-                "saved_count": saved_count,
-                "total_found": len(mentions_data)
-            }
-        
-        finally:
-            db.close()
+        return {
+            "status": "completed",
+            "saved_count": stats["saved"],
+            "total_found": stats["mentions"],
+            "skipped_duplicates": stats["skipped_duplicates"],
+            "pipeline": stats
+        }
     
     except Exception as e:
         logger.error(f"Error in Reddit scraping task: {e}")
@@ -82,41 +58,17 @@ def scrape_news_task(self):
         # Initialize scraper
         news_scraper = NewsScraper()
         
-        # Scrape data
-        mentions_data = news_scraper.scrape_all()
-        
-        # Save to database
-        db = SessionLocal()
-        saved_count = 0
-        
-        try:
-            for mention_data in mentions_data:
-                try:
-                    mention = StockMention(
-                        ticker=mention_data["ticker"],
-                        text=mention_data["text"],
-                        sentiment=mention_data["sentiment"],
-                        sentiment_score=mention_data["sentiment_score"],
-                        source=mention_data["source"],
-                        source_id=mention_data["source_id"]
-                    )
-                    db.add(mention)
-                    saved_count += 1
-                except Exception as e:
-                    logger.error(f"Error saving mention: {e}")
-                    continue
-            
-            db.commit()
-            logger.info(f"Saved {saved_count} news mentions")
-            
-            return {
-                "status": "completed",
-                "saved_count": saved_count,
-                "total_found": len(mentions_data)
-            }
+        # Stream scraped articles through inference into the database
+        stats = news_scraper.ingest()
+        logger.info(f"Saved {stats['saved']} news mentions")
         
-        finally:
-            db.close()
+        return {
+            "status": "completed",
+            "saved_count": stats["saved"],
+            "total_found": stats["mentions"],
+            "skipped_duplicates": stats["skipped_duplicates"],
+            "pipeline": stats
+        }
     
     except Exception as e:
         logger.error(f"Error in news scraping task: {e}")
@@ -140,20 +92,13 @@ def aggregate_sentiment_task(self):
         aggregator = SentimentAggregator(db)
         
         try:
-            # Aggregate today's sentiment
-            sentiment_records = aggregator.aggregate_daily_sentiment()
-            
-            # Calculate trending stocks
-            bullish_stocks, bearish_stocks = aggregator.calculate_trending_stocks()
+            # Aggregate today and any earlier days that late-arriving items were published on,
+            # then calculate each day's trending stocks
+            result = aggregator.aggregate_recent()
             
-            logger.info(f"Aggregated sentiment for {len(sentiment_records)} stocks")
+            logger.info(f"Aggregated sentiment for {result['stocks_processed']} stocks over {result['days']}")
             
-            return {
-                "status": "completed",
-                "stocks_processed": len(sentiment_records),
-                "bullish_stocks": len(bullish_stocks),
-                "bearish_stocks": len(bearish_stocks)
-            }
+            return {"status": "completed", **result}
         
         finally:
             db.close()
@@ -166,6 +111,29 @@ def aggregate_sentiment_task(self):
         )
         raise
 
+@celery_app.task(bind=True)
+def maintain_partitions_task(self):
+    """Celery task to create upcoming document and mention partitions and expire old ones"""
+    try:
+        logger.info("Starting partition maintenance task")
+        
+        db = SessionLocal()
+        try:
+            result = maintain_partitions(db)
+            logger.info(f"Partition maintenance: {result}")
+            return result
+        
+        finally:
+            db.close()
+    
+    except Exception as e:
+        logger.error(f"Error in partition maintenance task: {e}")
+        self.update_state(
+            state="FAILURE",
+            meta={"error": str(e)}
+        )
+        raise
+
 @celery_app.task(bind=True)
 def full_scraping_task(self):
     """Full scraping task that runs all scrapers and aggregates data"""
@@ -0,0 +1,58 @@
+import re
+from typing import List, Optional, Tuple
+
+from .ticker_index import TickerIndex, get_ticker_index
+
+# All patterns are compiled once at import time
+
+_EMOJI = (
+    "["
+    "\U0001F600-\U0001F64F"  # emoticons
+    "\U0001F300-\U0001F5FF"  # symbols & pictographs
+    "\U0001F680-\U0001F6FF"  # transport & map symbols
+    "\U0001F1E0-\U0001F1FF"  # flags (iOS)
+    "\U00002702-\U000027B0"
+    "\U000024C2-\U0001F251"
+    "]"
+)
+_URL = r"http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+"
+
+_EMOJI_PATTERN = re.compile(_EMOJI + "+")
+_URL_PATTERN = re.compile(_URL)
+
+
+def clean_text(text: str) -> str:
+    """Remove emojis, links, and extra whitespace"""
+    # Emojis are never ASCII and URLs always contain "http"; both checks run in C
+    # and let the common case skip a regex scan entirely
+    if not text.isascii():
+        text = _EMOJI_PATTERN.sub("", text)
+    if "http" in text:
+        text = _URL_PATTERN.sub("", text)
+    # str.split() splits on the same characters as \s and also strips the ends
+    return " ".join(text.split())
+
+
+def clean_batch(texts: List[str]) -> List[str]:
+    return [clean_text(text) for text in texts]
+
+
+def normalize(text: str, index: Optional[TickerIndex] = None) -> Tuple[str, List[str]]:
+    """
+    Clean text and extract its stock tickers
+    Returns: (cleaned_text, unique tickers in order of first appearance)
+
+    Cleaning and extraction are deliberately two scans. A single finditer over
+    one URL|emoji|ticker alternation, splicing the text as it goes, measured
+    ~27us vs ~10us per comment (cashtags only) and ~40us vs ~21us (bare symbols)
+    in benchmarks/bench_text_normalization.py's corpus, because it drops the
+    isascii/"http" fast paths and runs Python per match.
+    """
+    index = index or get_ticker_index()
+    return clean_text(text), index.extract(text)
+
+
+def normalize_batch(texts: List[str], index: Optional[TickerIndex] = None) -> List[Tuple[str, List[str]]]:
+    """normalize() over a list of texts, resolving the ticker index once"""
+    index = index or get_ticker_index()
+    return [normalize(text, index) for text in texts]
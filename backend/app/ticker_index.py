@@ -0,0 +1,143 @@
+import os
+import re
+import csv
+import logging
+from typing import FrozenSet, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TICKER_UNIVERSE_PATH = os.getenv("TICKER_UNIVERSE_PATH", os.path.join("data", "tickers.csv"))
+BARE_TICKER_MATCHING = os.getenv("BARE_TICKER_MATCHING", "true").lower() == "true"
+
+# Cashtags that are never equities: currencies, crypto and common slang
+CASHTAG_BLOCKLIST = frozenset({
+    "USD", "EUR", "GBP", "JPY", "CNY", "CAD", "AUD", "CHF", "HKD", "INR", "MXN",
+    "BTC", "ETH", "DOGE", "USDT", "USDC", "XRP", "SOL",
+    "K", "M", "B",
+})
+
+# Listed symbols that are also everyday words, acronyms or forum slang. These are
+# only matched as cashtags, never as bare uppercase words.
+BARE_STOP_WORDS = frozenset({
+    "A", "I", "AM", "AN", "AS", "AT", "BE", "BY", "DO", "GO", "HE", "IF", "IN", "IS", "IT",
+    "ME", "MY", "NO", "OF", "OH", "OK", "ON", "OR", "SO", "TO", "UP", "US", "WE",
+    "ALL", "AND", "ANY", "ARE", "BIG", "CAN", "DAY", "FOR", "GET", "HAS", "NEW", "NOW",
+    "ONE", "OUT", "OWN", "RUN", "SEE", "THE", "TWO", "WAY", "WHO", "WHY", "YOU",
+    "BEST", "CASH", "CEO", "CFO", "DD", "EOD", "EPS", "ETF", "FOMO", "FUD", "GDP", "IMO",
+    "IPO", "IRA", "ATH", "ATM", "ITM", "OTM", "LOL", "MOON", "NYSE", "OTC", "PE", "PM",
+    "SEC", "USA", "WSB", "YOLO", "AI", "EV", "API", "CPI", "FED", "IRS", "TV",
+    "EDIT", "HOLD", "LOVE", "REAL", "TLDR", "WELL", "VERY", "JUST", "GOOD", "NEXT",
+})
+
+# Candidate tokens on word boundaries: a cashtag in any case, or a 2-5 letter
+# capitalised word. Lowercase prose never matches, and leading with the
+# "$"/capital lets the regex engine skip ahead to candidate positions.
+CASHTAG_REGEX = r"\$(?<![\w$]\$)(?P<cashtag>[A-Za-z]{1,5})(?!\w)"
+BARE_REGEX = r"(?<![\w$])(?P<bare>[A-Z]{2,5})(?!\w)"
+
+_CASHTAG_PATTERN = re.compile(CASHTAG_REGEX)
+_TOKEN_PATTERN = re.compile(rf"(?=[$A-Z])(?:{CASHTAG_REGEX}|{BARE_REGEX})")
+
+
+def load_universe(path: str) -> FrozenSet[str]:
+    """
+    Load listed symbols from a CSV (or pipe-delimited, e.g. nasdaqlisted.txt) file.
+    Uses a 'Symbol' column when present, otherwise the first column.
+    """
+    with open(path, newline="", encoding="utf-8") as universe_file:
+        sample = universe_file.read(4096)
+        universe_file.seek(0)
+        delimiter = "|" if sample.count("|") > sample.count(",") else ","
+        reader = csv.reader(universe_file, delimiter=delimiter)
+        header = next(reader, [])
+
+        lowered = [column.strip().lower() for column in header]
+        if "symbol" in lowered:
+            column = lowered.index("symbol")
+            rows = reader
+        else:
+            # No recognisable header: the first row is already data
+            column = 0
+            rows = [header, *reader]
+
+        symbols = set()
+        for row in rows:
+            if len(row) > column:
+                symbol = row[column].strip().upper()
+                if symbol.isalpha() and 1 <= len(symbol) <= 5:
+                    symbols.add(symbol)
+
+    return frozenset(symbols)
+
+
+class TickerIndex:
+    """
+    Matches stock tickers against a universe of listed symbols.
+
+    Symbols are whole 1-5 letter tokens, so candidate tokens are found in one
+    compiled-regex pass and checked against a hashed symbol set; this finds the
+    same matches as a word-bounded Aho-Corasick scan without a per-character
+    Python loop.
+    """
+
+    def __init__(self, universe: Optional[Iterable[str]] = None, bare_matching: bool = BARE_TICKER_MATCHING):
+        self.universe = frozenset(symbol.upper() for symbol in universe) if universe is not None else None
+        self.bare_matching = bare_matching and self.universe is not None
+
+    def _accept_cashtag(self, symbol: str, raw: str) -> bool:
+        if symbol in CASHTAG_BLOCKLIST:
+            return False
+        if len(symbol) == 1 and raw != symbol:
+            # "$a" is far more often a typo than a single-letter listing
+            return False
+        return self.universe is None or symbol in self.universe
+
+    def _accept_bare(self, symbol: str) -> bool:
+        # Bare symbols are only matched in capitals and never when they are a common word
+        return symbol not in BARE_STOP_WORDS and symbol in self.universe
+
+    def match_symbol(self, cashtag: Optional[str], bare: Optional[str]) -> Optional[str]:
+        """Validate a candidate token matched by CASHTAG_REGEX or BARE_REGEX; returns the ticker or None"""
+        if cashtag:
+            symbol = cashtag.upper()
+            return symbol if self._accept_cashtag(symbol, cashtag) else None
+        if bare and self.bare_matching and self._accept_bare(bare):
+            return bare
+        return None
+
+    def extract(self, text: str) -> List[str]:
+        """Unique tickers in text, in order of first appearance"""
+        found = {}
+
+        if not self.bare_matching:
+            for raw in _CASHTAG_PATTERN.findall(text):
+                symbol = self.match_symbol(raw, None)
+                if symbol:
+                    found[symbol] = None
+            return list(found)
+
+        for cashtag, bare in _TOKEN_PATTERN.findall(text):
+            symbol = self.match_symbol(cashtag, bare)
+            if symbol:
+                found[symbol] = None
+        return list(found)
+
+
+_index: Optional[TickerIndex] = None
+
+
+def get_ticker_index() -> TickerIndex:
+    """Process-wide ticker index, loaded from TICKER_UNIVERSE_PATH when the file exists"""
+    global _index
+    if _index is None:
+        universe = None
+        if os.path.exists(TICKER_UNIVERSE_PATH):
+            try:
+                universe = load_universe(TICKER_UNIVERSE_PATH)
+                logger.info(f"Loaded {len(universe)} ticker symbols from {TICKER_UNIVERSE_PATH}")
+            except Exception as e:
+                logger.error(f"Error loading ticker universe: {e}")
+        else:
+            logger.warning(f"Ticker universe {TICKER_UNIVERSE_PATH} not found, matching cashtags only")
+        _index = TickerIndex(universe)
+    return _index
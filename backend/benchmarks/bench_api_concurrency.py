@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+API latency under parallel load: many concurrent /dashboard requests mixed
+with slow /mentions calls, against one uvicorn worker
+
+"before" serves the read endpoints the way they used to be written, async
+routes running synchronous Session queries on the event loop, so every query
+stalls every other request. "after" serves app.main, whose read endpoints use
+the AsyncSession from get_async_db. Needs a migrated scratch PostgreSQL
+database, seeded like benchmarks/bench_query_plans.py.
+
+Keep --concurrency within DB_POOL_SIZE + DB_MAX_OVERFLOW: beyond it, "before"
+waits for a free connection on the event loop itself, stalling for the full
+DB_POOL_TIMEOUT and failing requests instead of just slowing them.
+
+With the database on the same host the comparison is mostly CPU-bound; pass
+--db-latency-ms to route the API's connections through a local proxy that adds
+network round-trip time, which is what the async sessions overlap.
+
+Usage: DATABASE_URL=postgresql://.../scratch python benchmarks/bench_api_concurrency.py [--concurrency 25] [--requests 2000] [--mode both] [--db-latency-ms 2] [--json out.json]
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import itertools
+import subprocess
+import urllib.request
+from typing import Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Add the backend directory to the path
+sys.path.append(BACKEND_DIR)
+
+APPS = {
+    "before": ["benchmarks.bench_api_concurrency:build_baseline_app", "--factory"],
+    "after": ["app.main:app"],
+}
+# Tickers the slow /mentions calls rotate through; seeded by bench_query_plans
+MENTION_TICKERS = 50
+
+
+def build_baseline_app():
+    """The read endpoints as they were before the async port, for comparison"""
+    from datetime import datetime
+
+    from fastapi import Depends, FastAPI
+    from sqlalchemy.orm import Session
+
+    from app.aggregator import SentimentAggregator
+    from app.database import get_db
+    from app.models import TrendingStock
+
+    baseline = FastAPI()
+
+    @baseline.get("/")
+    async def root():
+        return {"message": "baseline"}
+
+    @baseline.get("/dashboard")
+    async def get_dashboard(db: Session = Depends(get_db)):
+        start_date = datetime.combine(datetime.now().date(), datetime.min.time())
+        stocks = {}
+        for category in ("bullish", "bearish"):
+            stocks[category] = [
+                {"ticker": stock.ticker, "rank": stock.rank, "score": stock.score}
+                for stock in db.query(TrendingStock).filter(
+                    TrendingStock.category == category,
+                    TrendingStock.date == start_date
+                ).order_by(TrendingStock.rank).limit(5).all()
+            ]
+        return stocks
+
+    @baseline.get("/mentions/{ticker}")
+    async def get_stock_mentions(ticker: str, limit: int = 50, db: Session = Depends(get_db)):
+        mentions = SentimentAggregator(db).get_recent_mentions(ticker.upper(), limit)
+        return {"ticker": ticker, "mentions": mentions, "count": len(mentions)}
+
+    return baseline
+
+
+def start_latency_proxy(database_url: str, latency_ms: float) -> str:
+    """
+    Forward TCP connections to the database through a local proxy that delays every
+    chunk by half of latency_ms each way, like a database on another host
+    Returns: database_url rewritten to connect through the proxy
+    """
+    import threading
+
+    from sqlalchemy.engine import make_url
+
+    url = make_url(database_url)
+    socket_dir = url.query.get("host")
+    port = url.port or 5432
+    delay = latency_ms / 2000
+
+    async def pipe(reader, writer):
+        # Chunks queue with their due time, so the delay adds latency without limiting throughput
+        queue = asyncio.Queue()
+
+        async def receive():
+            while data := await reader.read(65536):
+                await queue.put((time.monotonic() + delay, data))
+            await queue.put((0, b""))
+
+        receiver = asyncio.ensure_future(receive())
+        try:
+            while True:
+                due, data = await queue.get()
+                if not data:
+                    break
+                await asyncio.sleep(max(0, due - time.monotonic()))
+                writer.write(data)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            receiver.cancel()
+            writer.close()
+
+    async def handle(client_reader, client_writer):
+        if socket_dir:
+            server_reader, server_writer = await asyncio.open_unix_connection(f"{socket_dir}/.s.PGSQL.{port}")
+        else:
+            server_reader, server_writer = await asyncio.open_connection(url.host or "localhost", port)
+        await asyncio.gather(pipe(client_reader, server_writer), pipe(server_reader, client_writer))
+
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(asyncio.start_server(handle, "127.0.0.1", 0))
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+    proxy_port = server.sockets[0].getsockname()[1]
+    proxied = url.set(host="127.0.0.1", port=proxy_port).difference_update_query(["host"])
+    return proxied.render_as_string(hide_password=False)
+
+
+def start_api(mode: str, args) -> subprocess.Popen:
+    """Start one uvicorn worker for mode and wait until it answers /"""
+    command = [sys.executable, "-m", "uvicorn", *APPS[mode], "--port", str(args.port), "--log-level", "warning"]
+    # A window wider than the default 7 days is what makes /mentions the slow call
+    env = {**os.environ, "RECENT_MENTIONS_DAYS": str(args.mentions_days)}
+    if args.database_url:
+        env.update(DATABASE_URL=args.database_url, ASYNC_DATABASE_URL="")
+    server = subprocess.Popen(command, cwd=BACKEND_DIR, env=env)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"API server exited with code {server.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{args.port}/", timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise SystemExit("API server did not start within 30s")
+
+
+def percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] if ordered else 0.0
+
+
+async def load(args) -> Dict:
+    """Fire args.requests requests from args.concurrency clients; every slow_every-th is a slow /mentions call"""
+    import httpx
+
+    latencies = {"dashboard": [], "mentions": []}
+    errors = {"dashboard": 0, "mentions": 0}
+    counter = itertools.count()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", limits=limits, timeout=120) as client:
+        async def client_loop(total: int, record: bool):
+            while (n := next(counter)) < total:
+                if n % args.slow_every == 0:
+                    name, path = "mentions", f"/mentions/ZZ{n % MENTION_TICKERS}?limit={args.mentions_limit}"
+                else:
+                    name, path = "dashboard", "/dashboard"
+                started = time.perf_counter()
+                try:
+                    ok = (await client.get(path)).status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                if not record:
+                    continue
+                if ok:
+                    latencies[name].append(time.perf_counter() - started)
+                else:
+                    # e.g. a 500 after the server's connection pool timed out
+                    errors[name] += 1
+
+        # Warm up the connection pools and statement caches first
+        await asyncio.gather(*(client_loop(args.concurrency * 2, False) for _ in range(args.concurrency)))
+        counter = itertools.count()
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(args.requests, True) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests_per_second": round(args.requests / elapsed, 1),
+        "endpoints": {
+            name: {
+                "requests": len(values),
+                "errors": errors[name],
+                **{f"p{p}_ms": round(percentile(values, p) * 1000, 1) for p in (50, 95, 99)},
+                "max_ms": round(max(values, default=0) * 1000, 1),
+            }
+            for name, values in latencies.items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API latency under parallel load, sync vs async database sessions")
+    parser.add_argument("--mode", choices=["before", "after", "both"], default="both")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--concurrency", type=int, default=25, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=2000, help="Measured requests per mode")
+    parser.add_argument("--slow-every", type=int, default=10, help="Every n-th request is a slow /mentions call")
+    parser.add_argument("--mentions-limit", type=int, default=50, help="limit= for the slow /mentions calls")
+    parser.add_argument("--mentions-days", type=int, default=365, help="RECENT_MENTIONS_DAYS for the API server")
+    parser.add_argument("--db-latency-ms", type=float, default=0,
+                        help="Round-trip latency added between the API server and PostgreSQL, as for a remote database")
+    parser.add_argument("--documents", type=int, default=200_000, help="Documents to seed")
+    parser.add_argument("--no-seed", action="store_true", help="Use the data already in the database")
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded rows afterwards")
+    parser.add_argument("--force", action="store_true", help="Seed even if the tables already hold data")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results to PATH")
+    args = parser.parse_args()
+
+    from sqlalchemy import text
+
+    from app.database import DATABASE_URL, SessionLocal, engine
+    from benchmarks.bench_query_plans import clean_up, seed
+
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("The async read endpoints use asyncpg; point DATABASE_URL at a scratch PostgreSQL database")
+    args.database_url = start_latency_proxy(DATABASE_URL, args.db_latency_ms) if args.db_latency_ms else None
+
+    db = SessionLocal()
+    seeded = False
+    results = {}
+    try:
+        if not args.no_seed:
+            existing = db.execute(text("SELECT EXISTS (SELECT 1 FROM stock_sentiments)")).scalar()
+            if existing and not args.force:
+                raise SystemExit("stock_sentiments is not empty; use a scratch database, --no-seed or --force")
+            seed(db, args.documents)
+            seeded = True
+
+        for mode in (["before", "after"] if args.mode == "both" else [args.mode]):
+            server = start_api(mode, args)
+            try:
+                results[mode] = asyncio.run(load(args))
+            finally:
+                server.terminate()
+                server.wait(timeout=10)
+    finally:
+        if seeded and not args.keep:
+            db.rollback()
+            clean_up(db)
+        db.close()
+
+    print(f"\n{'mode':<8}{'endpoint':<12}{'requests':>10}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}"
+          f"{'p99 ms':>10}{'max ms':>10}{'req/s':>10}")
+    for mode, result in results.items():
+        for name, endpoint in result["endpoints"].items():
+            print(f"{mode:<8}{name:<12}{endpoint['requests']:>10}{endpoint['errors']:>8}{endpoint['p50_ms']:>10}"
+                  f"{endpoint['p95_ms']:>10}{endpoint['p99_ms']:>10}{endpoint['max_ms']:>10}{result['requests_per_second']:>10}")
+
+    if args.json:
+        with open(args.json, "w") as results_file:
+            json.dump(results, results_file, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
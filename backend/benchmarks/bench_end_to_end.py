@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+End-to-end scrape benchmark: Reddit and NewsAPI scrapes, sentiment scoring,
+the database write and daily aggregation, run against the local fake APIs in
+benchmarks/fake_apis.py so results are repeatable and need no credentials
+
+By default sentiment comes from the lexicon alone so no model is loaded; pass
+--model to score with FinBERT as configured. DATABASE_URL defaults to a
+throwaway SQLite file.
+
+Usage: python benchmarks/bench_end_to_end.py [--latency-ms 50] [--posts 100] [--replay recordings/] [--model] [--json out.json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_APIS = os.path.join(BACKEND_DIR, "benchmarks", "fake_apis.py")
+
+# Add the backend directory to the path
+sys.path.append(BACKEND_DIR)
+
+
+def start_fake_apis(args) -> subprocess.Popen:
+    """Start the fake API server and wait until it answers /health"""
+    command = [
+        sys.executable, FAKE_APIS,
+        "--port", str(args.port),
+        "--latency-ms", str(args.latency_ms),
+        "--jitter-ms", str(args.jitter_ms),
+        "--posts", str(args.posts),
+        "--comments-per-post", str(args.comments_per_post),
+        "--news-per-hour", str(args.news_per_hour),
+    ]
+    if args.replay:
+        command += ["--replay", args.replay]
+    server = subprocess.Popen(command, cwd=BACKEND_DIR)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"Fake API server exited with code {server.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{args.port}/health", timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise SystemExit("Fake API server did not start within 30s")
+
+
+def configure_environment(args):
+    """Point the scrapers at the fake server; must run before any app module is imported"""
+    base_url = f"http://127.0.0.1:{args.port}"
+    os.environ["REDDIT_OAUTH_URL"] = base_url
+    os.environ["REDDIT_URL"] = base_url
+    os.environ["REDDIT_CLIENT_ID"] = "benchmark"
+    os.environ["REDDIT_CLIENT_SECRET"] = "benchmark"
+    os.environ["NEWS_API_BASE_URL"] = f"{base_url}/v2"
+    os.environ["NEWS_API_KEY"] = "benchmark"
+
+    # Isolated from any real deployment unless overridden in the environment
+    os.environ.setdefault("DATABASE_URL", "sqlite:///bench_e2e.sqlite3")
+    os.environ.setdefault("SEEN_FILTER_BACKEND", "none")
+    os.environ.setdefault("SENTIMENT_CACHE_BACKEND", "none")
+    os.environ.setdefault("NEWS_INCREMENTAL", "false")
+    os.environ.setdefault("RATE_LIMIT_BACKEND", "local")
+    os.environ.setdefault("REDDIT_REQUESTS_PER_MINUTE", "0")
+    os.environ.setdefault("NEWS_API_REQUESTS_PER_MINUTE", "0")
+    os.environ.setdefault("NEWS_API_DAILY_QUOTA", "0")
+    os.environ.setdefault("INFERENCE_SERVICE_URL", "")
+
+    if not args.model:
+        # A threshold of 0 resolves every text with the lexicon, so FinBERT is never loaded
+        os.environ["SENTIMENT_CASCADE"] = "true"
+        os.environ["LEXICON_CONFIDENCE_THRESHOLD"] = "0"
+
+
+def timed(name, func, results):
+    started = time.perf_counter()
+    value = func()
+    elapsed = time.perf_counter() - started
+    results[name] = {"seconds": round(elapsed, 3)}
+    return value
+
+
+def run(args):
+    from app import models
+    from app.database import SessionLocal, engine
+    from app.reddit_scraper import RedditScraper
+    from app.news_scraper import NewsScraper
+    from app.aggregator import SentimentAggregator
+
+    models.Base.metadata.create_all(bind=engine)
+
+    results = {}
+    started = time.perf_counter()
+
+    reddit_stats = timed("reddit", lambda: RedditScraper().ingest(), results)
+    news_stats = timed("news", lambda: NewsScraper().ingest(), results)
+
+    db = SessionLocal()
+    try:
+        aggregator = SentimentAggregator(db)
+        timed("aggregate", aggregator.aggregate_recent, results)
+    finally:
+        db.close()
+
+    total_seconds = time.perf_counter() - started
+    for name, stats in (("reddit", reddit_stats), ("news", news_stats)):
+        seconds = results[name]["seconds"] or 1e-9
+        results[name].update({
+            "items_per_second": round(stats.get("fetched", 0) / seconds, 1),
+            "mentions_per_second": round(stats.get("saved", 0) / seconds, 1),
+            "stats": stats,
+        })
+    results["total_seconds"] = round(total_seconds, 3)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end scrape benchmark against the fake APIs")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--posts", type=int, default=100)
+    parser.add_argument("--comments-per-post", type=int, default=50)
+    parser.add_argument("--news-per-hour", type=float, default=60)
+    parser.add_argument("--replay", metavar="DIR", help="Serve responses recorded with fake_apis.py --record")
+    parser.add_argument("--model", action="store_true", help="Score with FinBERT instead of the lexicon alone")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results to PATH")
+    args = parser.parse_args()
+
+    configure_environment(args)
+    server = start_fake_apis(args)
+    try:
+        results = run(args)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    print(f"\n{'stage':<12}{'seconds':>10}{'items/s':>12}{'mentions/s':>14}{'saved':>10}")
+    for name in ("reddit", "news", "aggregate"):
+        stage = results[name]
+        print(f"{name:<12}{stage['seconds']:>10.2f}{stage.get('items_per_second', ''):>12}"
+              f"{stage.get('mentions_per_second', ''):>14}{stage.get('stats', {}).get('saved', ''):>10}")
+    print(f"{'total':<12}{results['total_seconds']:>10.2f}")
+
+    if args.json:
+        with open(args.json, "w") as results_file:
+            json.dump(results, results_file, indent=2, default=str)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
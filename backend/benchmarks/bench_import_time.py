@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark for the API process, based on python -X importtime
+
+Fails when a heavy module (torch, transformers, praw) is imported by the
+read-only API path, or when the import takes longer than the budget.
+
+Usage: python benchmarks/bench_import_time.py [--module app.main] [--max-ms 1500] [--top 15]
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FORBIDDEN_MODULES = ["torch", "transformers", "praw"]
+
+
+def measure(module):
+    """Run a fresh interpreter importing module and parse its -X importtime report"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"Importing {module} failed:\n{result.stderr}")
+
+    # Lines look like: "import time:   self [us] | cumulative | imported package"
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--max-ms", type=float, default=1500)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    timings = measure(args.module)
+    total_ms = timings[args.module][1] / 1000
+
+    print(f"import {args.module}: {total_ms:.1f} ms cumulative, {len(timings)} modules")
+    print(f"{'self ms':>9} {'cum ms':>9}  module")
+    for name, (self_us, cumulative_us) in sorted(timings.items(), key=lambda item: -item[1][0])[:args.top]:
+        print(f"{self_us / 1000:9.1f} {cumulative_us / 1000:9.1f}  {name}")
+
+    failures = []
+    heavy = sorted({name.split(".")[0] for name in timings} & set(FORBIDDEN_MODULES))
+    if heavy:
+        failures.append(f"heavy modules imported: {', '.join(heavy)}")
+    if total_ms > args.max_ms:
+        failures.append(f"{total_ms:.1f} ms exceeds the {args.max_ms:.0f} ms budget")
+
+    if failures:
+        raise SystemExit("FAIL: " + "; ".join(failures))
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
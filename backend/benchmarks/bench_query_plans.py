@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Check that the hot read queries are served by their indexes on a realistically
+sized table, using PostgreSQL's EXPLAIN
+
+Seeds a scratch database (migrated with `alembic upgrade head`) with a million
+documents naming two tickers each on average and a year of rollups, then EXPLAINs the queries issued by the
+aggregator and the dashboard and stock endpoints. Fails when a query does not
+use its expected index.
+
+Usage: DATABASE_URL=postgresql://.../scratch python benchmarks/bench_query_plans.py [--documents 1000000] [--analyze]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime, timedelta, timezone
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from app.database import SessionLocal, engine
+from app.aggregator import daily_sentiment_statement, recent_mentions_statement
+from app.models import StockSentiment, TrendingStock
+from app.partitions import PARTITIONED_TABLES, ensure_partitions, is_partitioned
+
+TICKERS = 500
+DAYS = 365
+SEED_SOURCE = "bench"
+# Seeded tickers (ZZ0..ZZ499) cannot collide with real symbols, so clean-up only removes seeded rows
+SEED_PREFIX = "ZZ"
+
+
+def seed(db, documents: int):
+    """Insert synthetic rows spread over the last DAYS days, in created_at order like live ingestion"""
+    started = time.perf_counter()
+    if is_partitioned(db):
+        today = datetime.utcnow().date()
+        for parent in PARTITIONED_TABLES:
+            ensure_partitions(db, parent, today - timedelta(days=DAYS), today)
+    db.execute(text("""
+        INSERT INTO documents (text, sentiment, sentiment_score, source, source_id, created_at)
+        SELECT 'seeded document', (ARRAY['positive', 'negative', 'neutral'])[1 + g % 3],
+               0.5, :source, g::text, now() - make_interval(secs => (:documents - g) * :seconds_per_row)
+        FROM generate_series(1, :documents) AS g
+    """), {"source": SEED_SOURCE, "documents": documents, "seconds_per_row": DAYS * 86400 / documents})
+    # One to three distinct tickers per document
+    mentions = db.execute(text("""
+        INSERT INTO mentions (document_id, ticker, created_at)
+        SELECT d.id, :prefix || ((d.source_id::int + k * 7) % :tickers), d.created_at
+        FROM documents d, generate_series(0, d.source_id::int % 3) AS k
+        WHERE d.source = :source
+    """), {"prefix": SEED_PREFIX, "tickers": TICKERS, "source": SEED_SOURCE}).rowcount
+    db.execute(text("""
+        INSERT INTO stock_sentiments (ticker, date, mentions_count, sentiment_index, bullish_score, bearish_score)
+        SELECT :prefix || t, date_trunc('day', now()) - make_interval(days => d), 10, 0.1, 1, 0
+        FROM generate_series(0, :tickers - 1) AS t, generate_series(0, :days - 1) AS d
+    """), {"prefix": SEED_PREFIX, "tickers": TICKERS, "days": DAYS})
+    db.execute(text("""
+        INSERT INTO trending_stocks (ticker, rank, category, score, mentions_count, sentiment_index, date)
+        SELECT :prefix || (r + c * 10), r, (ARRAY['bullish', 'bearish'])[1 + c], 1, 10, 0.1,
+               date_trunc('day', now()) - make_interval(days => d)
+        FROM generate_series(1, 10) AS r, generate_series(0, 1) AS c, generate_series(0, :days - 1) AS d
+    """), {"prefix": SEED_PREFIX, "days": DAYS})
+    db.commit()
+    print(f"Seeded {documents:,} documents with {mentions:,} mentions in {time.perf_counter() - started:.1f}s")
+
+    # VACUUM also summarizes the BRIN ranges the seed filled, as autovacuum would in time
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        for table in ("documents", "mentions", "stock_sentiments", "trending_stocks"):
+            connection.exec_driver_sql(f"VACUUM ANALYZE {table}")
+
+
+def clean_up(db):
+    db.execute(text("DELETE FROM documents WHERE source = :source"), {"source": SEED_SOURCE})
+    for table in ("mentions", "stock_sentiments", "trending_stocks"):
+        db.execute(text(f"DELETE FROM {table} WHERE ticker LIKE :pattern"), {"pattern": f"{SEED_PREFIX}%"})
+    db.commit()
+
+
+def hot_queries(db):
+    """(name, query, expected index) for the app's hot read paths, built the way the app builds them"""
+    ticker = f"{SEED_PREFIX}42"
+    day = datetime.combine(datetime.now().date() - timedelta(days=DAYS // 2), datetime.min.time())
+    return [
+        (
+            "get_recent_mentions",
+            recent_mentions_statement(ticker, 20, 7),
+            "ix_mentions_ticker_created_at",
+        ),
+        (
+            "aggregate_daily_sentiment",
+            daily_sentiment_statement(day.replace(tzinfo=timezone.utc), day.replace(tzinfo=timezone.utc) + timedelta(days=1)),
+            "ix_mentions_created_at_brin",
+        ),
+        (
+            "get_historical_sentiment",
+            db.query(StockSentiment).filter(
+                StockSentiment.ticker == ticker,
+                StockSentiment.date >= day - timedelta(days=7),
+                StockSentiment.date <= day
+            ).order_by(StockSentiment.date.desc()),
+            "uq_stock_sentiments_ticker_date",
+        ),
+        (
+            "stock_detail",
+            db.query(StockSentiment).filter(StockSentiment.ticker == ticker, StockSentiment.date == day),
+            "uq_stock_sentiments_ticker_date",
+        ),
+        (
+            "dashboard",
+            db.query(TrendingStock).filter(TrendingStock.category == "bullish", TrendingStock.date == day)
+            .order_by(TrendingStock.rank).limit(5),
+            "ix_trending_stocks_date_category_rank",
+        ),
+    ]
+
+
+def index_parents(db):
+    """Map each partition's index to the partitioned index it was created from"""
+    rows = db.execute(text("""
+        SELECT child.relname, parent.relname FROM pg_inherits i
+        JOIN pg_class child ON child.oid = i.inhrelid
+        JOIN pg_class parent ON parent.oid = i.inhparent
+        WHERE child.relkind = 'i'
+    """)).all()
+    return dict(rows)
+
+
+def plan_scans(node, parents, indexes=None, relations=None):
+    """Names of every index (as its partitioned parent) and table scanned anywhere in a JSON plan tree"""
+    indexes = set() if indexes is None else indexes
+    relations = set() if relations is None else relations
+    if "Index Name" in node:
+        indexes.add(parents.get(node["Index Name"], node["Index Name"]))
+    if "Relation Name" in node:
+        relations.add(node["Relation Name"])
+    for child in node.get("Plans", []):
+        plan_scans(child, parents, indexes, relations)
+    return indexes, relations
+
+
+def explain(db, query, analyze: bool):
+    # ORM queries and Core statements alike
+    compiled = getattr(query, "statement", query).compile(dialect=engine.dialect)
+    options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+    result = db.connection().exec_driver_sql(f"EXPLAIN ({options}) {compiled}", compiled.params).scalar()
+    plan = result if isinstance(result, list) else json.loads(result)
+    return plan[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN the hot read queries against seeded data")
+    parser.add_argument("--documents", type=int, default=1_000_000, help="Documents to seed")
+    parser.add_argument("--analyze", action="store_true", help="Run EXPLAIN ANALYZE and report timings")
+    parser.add_argument("--no-seed", action="store_true", help="Use the data already in the database")
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded rows afterwards")
+    parser.add_argument("--force", action="store_true", help="Seed even if the tables already hold data")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("EXPLAIN checks need PostgreSQL; point DATABASE_URL at a scratch database")
+
+    db = SessionLocal()
+    seeded = False
+    failures = []
+    try:
+        if not args.no_seed:
+            existing = db.execute(text("SELECT EXISTS (SELECT 1 FROM stock_sentiments)")).scalar()
+            if existing and not args.force:
+                raise SystemExit("stock_sentiments is not empty; use a scratch database or pass --force")
+            seed(db, args.documents)
+            seeded = True
+
+        parents = index_parents(db)
+        print(f"\n{'query':<28}{'expected index':<42}{'used':<6}{'tables':>8}{'ms':>10}")
+        for name, query, expected in hot_queries(db):
+            plan = explain(db, query, args.analyze)
+            used, relations = plan_scans(plan["Plan"], parents)
+            # A range pruned to its own partitions needs no index: the whole partition is the answer
+            ok = expected in used or (expected == "ix_mentions_created_at_brin"
+                                      and len(relations) <= 2 * len(PARTITIONED_TABLES)
+                                      and all(r.startswith(tuple(f"{p}_p" for p in PARTITIONED_TABLES)) for r in relations))
+            if not ok:
+                failures.append((name, expected, used, plan["Plan"]["Node Type"]))
+            elapsed = f"{plan['Execution Time']:.2f}" if "Execution Time" in plan else "-"
+            # With partitioning, "tables" is the number of partitions left after pruning
+            print(f"{name:<28}{expected:<42}{'yes' if ok else 'NO':<6}{len(relations):>8}{elapsed:>10}")
+
+        for name, expected, used, node_type in failures:
+            print(f"\n{name}: expected {expected}, plan is {node_type} using {sorted(used) or 'no index'}")
+    finally:
+        if seeded and not args.keep:
+            db.rollback()
+            clean_up(db)
+        db.close()
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
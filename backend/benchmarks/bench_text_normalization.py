@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark per-document text normalization cost: the original clean_text and
+extract_stock_tickers against the precompiled single-pass pipeline
+
+Usage: python benchmarks/bench_text_normalization.py [--docs 10000] [--corpus comments.txt]
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.text_processing import clean_text, normalize_batch
+from app.ticker_index import TickerIndex
+
+FRAGMENTS = [
+    "I think", "the market", "is going to", "rip tomorrow", "after earnings", "puts are", "printing",
+    "bought the dip", "holding", "since", "last week", "no way", "this is", "financial advice",
+    "$TSLA", "$GME", "$AAPL", "NVDA", "$amc", "\n\n", "  ", "lol", "DD", "YOLO", "EPS", "CEO",
+]
+EMOJIS = ["🚀🚀🚀", "💎🙌", "📈"]
+URLS = ["https://www.reddit.com/r/stocks/comments/abc123/", "https://finance.yahoo.com/quote/TSLA?p=TSLA"]
+
+
+def legacy_clean_text(text):
+    emoji_pattern = re.compile("["
+        u"\U0001F600-\U0001F64F"
+        u"\U0001F300-\U0001F5FF"
+        u"\U0001F680-\U0001F6FF"
+        u"\U0001F1E0-\U0001F1FF"
+        u"\U00002702-\U000027B0"
+        u"\U000024C2-\U0001F251"
+        "]+", flags=re.UNICODE)
+    text = emoji_pattern.sub(r'', text)
+    url_pattern = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+    text = url_pattern.sub('', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def legacy_normalize(text):
+    tickers = list(set(re.findall(r'\$([A-Z]{1,5})', text.upper())))
+    return legacy_clean_text(text), tickers
+
+
+def reddit_comments(docs, seed=42):
+    """Comments of roughly Reddit length: a median of a few dozen words, with a long tail"""
+    rng = random.Random(seed)
+    comments = []
+    for _ in range(docs):
+        words = rng.choices(FRAGMENTS, k=min(int(rng.expovariate(1 / 25)) + 3, 400))
+        # Roughly one comment in five has emojis and one in twenty a link
+        if rng.random() < 0.2:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(EMOJIS))
+        if rng.random() < 0.05:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(URLS))
+        comments.append(" ".join(words))
+    return comments
+
+
+def run(name, func, corpus):
+    started = time.perf_counter()
+    func(corpus)
+    elapsed = time.perf_counter() - started
+    print(f"{name:<34} {elapsed:8.3f}s  {elapsed / len(corpus) * 1e6:8.2f}us/doc")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=10000)
+    parser.add_argument("--corpus", help="Text file with one document per line")
+    args = parser.parse_args()
+
+    if args.corpus:
+        with open(args.corpus, encoding="utf-8") as corpus_file:
+            corpus = [line.rstrip("\n") for line in corpus_file]
+    else:
+        corpus = reddit_comments(args.docs)
+
+    print(f"{len(corpus)} documents, {sum(map(len, corpus)) / len(corpus):.0f} chars on average")
+
+    cashtags = TickerIndex(None)
+    universe = TickerIndex(["TSLA", "GME", "AAPL", "NVDA", "AMC"], bare_matching=True)
+
+    run("legacy clean_text", lambda texts: [legacy_clean_text(t) for t in texts], corpus)
+    run("precompiled clean_text", lambda texts: [clean_text(t) for t in texts], corpus)
+    run("legacy clean + extract", lambda texts: [legacy_normalize(t) for t in texts], corpus)
+    run("normalize_batch, cashtags", lambda texts: normalize_batch(texts, cashtags), corpus)
+    run("normalize_batch, universe + bare", lambda texts: normalize_batch(texts, universe), corpus)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark ticker extraction: the original $TICKER regex against TickerIndex
+
+Usage: python benchmarks/bench_ticker_extraction.py [--docs 100000] [--universe data/tickers.csv] [--corpus comments.txt]
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ticker_index import TickerIndex, load_universe
+
+LEGACY_PATTERN = r'\$([A-Z]{1,5})'
+
+WORDS = (
+    "the market is looking strong today i think we see a breakout soon earnings beat "
+    "guidance cut puts calls holding bought sold dip rally CEO DD YOLO IMO ATH EPS USA "
+    "for all new one out see now can are it on"
+).split()
+SYMBOLS = ["AAPL", "TSLA", "GME", "AMC", "NVDA", "MSFT", "AMD", "PLTR", "SPY", "F", "T", "BB"]
+JUNK_CASHTAGS = ["$USD", "$BTC", "$a", "$EUR", "$K"]
+
+
+def legacy_extract(text):
+    return list(set(re.findall(LEGACY_PATTERN, text.upper())))
+
+
+def synthetic_corpus(docs, seed=42):
+    """Reddit-comment-sized documents with a mix of cashtags, bare symbols and junk"""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(docs):
+        words = rng.choices(WORDS, k=rng.randint(8, 60))
+        for _ in range(rng.randint(0, 3)):
+            symbol = rng.choice(SYMBOLS)
+            words.insert(rng.randrange(len(words) + 1), rng.choice([f"${symbol}", symbol, f"${symbol.lower()}"]))
+        if rng.random() < 0.1:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(JUNK_CASHTAGS))
+        corpus.append(" ".join(words))
+    return corpus
+
+
+def run(name, extract, corpus):
+    started = time.perf_counter()
+    matches = sum(len(extract(text)) for text in corpus)
+    elapsed = time.perf_counter() - started
+    print(f"{name:<28} {elapsed:8.3f}s  {elapsed / len(corpus) * 1e6:8.2f}us/doc  {matches:>8} matches")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--universe", help="CSV of listed symbols (default: the synthetic symbols)")
+    parser.add_argument("--corpus", help="Text file with one document per line")
+    args = parser.parse_args()
+
+    if args.corpus:
+        with open(args.corpus, encoding="utf-8") as corpus_file:
+            corpus = [line.rstrip("\n") for line in corpus_file]
+    else:
+        corpus = synthetic_corpus(args.docs)
+
+    universe = load_universe(args.universe) if args.universe else SYMBOLS
+    print(f"{len(corpus)} documents, {len(universe)} symbols in universe")
+
+    run("legacy regex", legacy_extract, corpus)
+    run("index, cashtags only", TickerIndex(None).extract, corpus)
+    run("index, universe + bare", TickerIndex(universe, bare_matching=True).extract, corpus)
+
+
+if __name__ == "__main__":
+    main()
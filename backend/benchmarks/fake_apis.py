@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Reddit OAuth API endpoints praw uses and for NewsAPI's
+/v2/everything, serving synthetic or recorded payloads at a configurable
+latency and volume, so scrapes can be benchmarked without credentials
+
+Point the scrapers at it with:
+    REDDIT_OAUTH_URL=http://localhost:8002 REDDIT_URL=http://localhost:8002
+    NEWS_API_BASE_URL=http://localhost:8002/v2
+
+Usage:
+    python benchmarks/fake_apis.py [--port 8002] [--latency-ms 50] [--posts 100]
+    python benchmarks/fake_apis.py --record recordings/   # proxy to the live APIs and save responses
+    python benchmarks/fake_apis.py --replay recordings/   # serve saved responses, synthetic otherwise
+"""
+
+import os
+import re
+import json
+import time
+import zlib
+import random
+import asyncio
+import hashlib
+import argparse
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+TICKERS = ["AAPL", "TSLA", "NVDA", "MSFT", "AMZN", "GME", "AMC", "META", "GOOGL", "PLTR", "AMD", "SPY"]
+OPENERS = ["I think", "Honestly", "DD:", "Quick take:", "Not financial advice but", "Just saw that", "Anyone else notice"]
+CLAIMS = [
+    "is going to the moon", "just beat estimates", "is heavily overvalued", "looks like a short squeeze",
+    "is tanking after earnings", "calls printing today", "bagholders everywhere", "announced a dividend",
+    "got upgraded to buy", "missed expectations again", "is holding support", "had record revenue",
+]
+CLOSERS = ["🚀🚀🚀", "lol", "thoughts?", "https://finance.yahoo.com/quote/TSLA", "", "💎🙌", "this is the way"]
+HEADLINES = [
+    "{ticker} shares rally after earnings beat", "{ticker} stock falls on weak guidance",
+    "Analysts upgrade {ticker} citing strong demand", "{ticker} faces regulatory probe",
+    "{ticker} announces buyback program", "Why {ticker} is the market's most crowded trade",
+]
+
+# Params that change every run and must not be part of a recording's key
+VOLATILE_PARAMS = {"raw_json", "from", "to", "before", "after"}
+
+# Synthetic timeline: posts, stream items and articles are created at a steady
+# rate from this point on, so incremental cursors and streams behave as they would live
+TIMELINE_HOURS = 36
+
+# Id ranges that keep hot posts, their comment trees and stream items apart
+STREAM_POST_OFFSET = 10 ** 11
+STREAM_COMMENT_OFFSET = 10 ** 12
+
+
+def to_base36(number: int) -> str:
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    result = ""
+    while True:
+        number, remainder = divmod(number, 36)
+        result = digits[remainder] + result
+        if number == 0:
+            return result
+
+
+def from_base36(value: str) -> int:
+    return int(value, 36)
+
+
+def listing(children: List[Dict], after: Optional[str] = None) -> Dict:
+    return {
+        "kind": "Listing",
+        "data": {"after": after, "before": None, "dist": len(children), "modhash": None, "children": children},
+    }
+
+
+class FakeData:
+    """Deterministic synthetic Reddit and NewsAPI payloads"""
+
+    def __init__(self, args):
+        self.posts_per_listing = args.posts
+        self.comments_per_post = args.comments_per_post
+        self.stream_interval = 60.0 / max(args.stream_per_minute, 0.001)
+        self.news_interval = 3600.0 / max(args.news_per_hour, 0.001)
+        self.seed = args.seed
+        self.origin = time.time() - TIMELINE_HOURS * 3600
+        self.slot_names: Dict[int, str] = {}
+
+    def _rng(self, *key) -> random.Random:
+        return random.Random(zlib.crc32(f"{self.seed}:{key}".encode("utf-8")))
+
+    def _text(self, rng: random.Random) -> str:
+        ticker = rng.choice(TICKERS)
+        cashtag = f"${ticker}" if rng.random() < 0.7 else ticker
+        return f"{rng.choice(OPENERS)} {cashtag} {rng.choice(CLAIMS)} {rng.choice(CLOSERS)}".strip()
+
+    @staticmethod
+    def _subreddit_slot(name: str) -> int:
+        return zlib.crc32(name.lower().encode("utf-8")) % 64
+
+    def post(self, number: int, subreddit: str, created_utc: float) -> Dict:
+        rng = self._rng("post", number)
+        post_id = to_base36(number)
+        return {"kind": "t3", "data": {
+            "id": post_id,
+            "name": f"t3_{post_id}",
+            "title": self._text(rng),
+            "selftext": self._text(rng) if rng.random() < 0.6 else "",
+            "subreddit": subreddit,
+            "author": f"user{rng.randint(1, 50000)}",
+            "created_utc": created_utc,
+            "num_comments": self.comments_per_post,
+            "score": rng.randint(1, 5000),
+            "permalink": f"/r/{subreddit}/comments/{post_id}/",
+            "url": f"https://www.reddit.com/r/{subreddit}/comments/{post_id}/",
+            "is_self": True,
+        }}
+
+    def comment(self, number: int, subreddit: str, link_id: str, link_title: str, created_utc: float) -> Dict:
+        rng = self._rng("comment", number)
+        comment_id = to_base36(number)
+        body = "[deleted]" if rng.random() < 0.03 else self._text(rng)
+        return {"kind": "t1", "data": {
+            "id": comment_id,
+            "name": f"t1_{comment_id}",
+            "body": body,
+            "subreddit": subreddit,
+            "author": f"user{rng.randint(1, 50000)}",
+            "created_utc": created_utc,
+            "link_id": link_id,
+            "link_title": link_title,
+            "parent_id": link_id,
+            "depth": 0,
+            "score": rng.randint(-10, 500),
+            "replies": "",
+        }}
+
+    def _hot_spacing(self) -> float:
+        return TIMELINE_HOURS * 3600 / max(self.posts_per_listing, 1)
+
+    def hot(self, subreddit: str, limit: int, after: Optional[str]) -> Dict:
+        """The newest posts_per_listing posts, spread over the whole timeline so some are older than 24 hours"""
+        slot = self._subreddit_slot(subreddit)
+        self.slot_names[slot] = subreddit
+        spacing = self._hot_spacing()
+        latest = int((time.time() - self.origin) / spacing)
+        oldest = latest - self.posts_per_listing + 1
+
+        start = latest
+        if after:
+            start = from_base36(after.split("_", 1)[1]) // 64 - 1
+        end = max(start - limit, oldest - 1, 0)
+
+        children = [
+            self.post(j * 64 + slot, subreddit, self.origin + j * spacing)
+            for j in range(start, end, -1)
+        ]
+        next_after = children[-1]["data"]["name"] if children and end > max(oldest - 1, 0) else None
+        return listing(children, next_after)
+
+    def submission(self, post_id: str) -> List[Dict]:
+        """A hot post and its comment forest"""
+        number = from_base36(post_id)
+        created = self.origin + (number // 64) * self._hot_spacing()
+        subreddit = self.slot_names.get(number % 64, "stocks")
+        post = self.post(number, subreddit, created)
+        comments = [
+            self.comment(number * 1000 + j, subreddit, f"t3_{post_id}", post["data"]["title"],
+                         min(created + 60 * (j + 1), time.time()))
+            for j in range(self.comments_per_post)
+        ]
+        return [listing([post]), listing(comments)]
+
+    def stream(self, kind: str, subreddit: str, limit: int, before: Optional[str]) -> Dict:
+        """Newest items first; with before, only items newer than it (praw's stream polling)"""
+        offset = STREAM_POST_OFFSET if kind == "t3" else STREAM_COMMENT_OFFSET
+        latest = int((time.time() - self.origin) / self.stream_interval)
+        oldest = max(latest - limit + 1, 0)
+        if before:
+            oldest = max(oldest, (from_base36(before.split("_", 1)[1]) - offset) // 64 + 1)
+
+        slot = self._subreddit_slot(subreddit)
+        names = subreddit.split("+")
+        children = []
+        for sequence in range(latest, oldest - 1, -1):
+            created = self.origin + sequence * self.stream_interval
+            name = names[sequence % len(names)]
+            number = offset + sequence * 64 + slot
+            if kind == "t3":
+                children.append(self.post(number, name, created))
+            else:
+                link_id = f"t3_{to_base36(STREAM_POST_OFFSET + sequence * 64 + slot)}"
+                children.append(self.comment(number, name, link_id, "Synthetic thread", created))
+        return listing(children)
+
+    def everything(self, params: Dict[str, str]) -> Dict:
+        """Articles for a query at a steady rate, newest first, paginated like NewsAPI"""
+        query = params.get("q", "")
+        page = int(params.get("page", 1))
+        page_size = int(params.get("pageSize", 100))
+        now = time.time()
+        to_ts = min(self._parse_time(params.get("to"), now), now)
+        from_ts = max(self._parse_time(params.get("from"), to_ts - 86400), self.origin)
+
+        newest = int((to_ts - self.origin) / self.news_interval)
+        oldest = int((from_ts - self.origin) / self.news_interval) + 1
+        total = max(newest - oldest + 1, 0)
+
+        start = newest - (page - 1) * page_size
+        articles = []
+        for k in range(start, max(start - page_size, oldest - 1), -1):
+            rng = self._rng("article", query, k)
+            ticker = rng.choice(TICKERS)
+            # Every fourth article is syndicated under every query, exercising URL dedup
+            url = f"https://news.example.com/markets/{k}" if k % 4 == 0 else f"https://news.example.com/{zlib.crc32(query.encode())}/{k}"
+            published = datetime.fromtimestamp(self.origin + k * self.news_interval, tz=timezone.utc)
+            articles.append({
+                "source": {"id": None, "name": "Example News"},
+                "author": "Staff",
+                "title": rng.choice(HEADLINES).format(ticker=ticker),
+                "description": self._text(rng),
+                "url": url,
+                "publishedAt": published.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "content": None,
+            })
+        return {"status": "ok", "totalResults": total, "articles": articles}
+
+    @staticmethod
+    def _parse_time(value: Optional[str], default: float) -> float:
+        if not value:
+            return default
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return default
+        return (parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)).timestamp()
+
+
+class Recordings:
+    """Responses saved by --record and served by --replay, keyed by method, path and stable params"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.responses: Dict[str, Tuple[int, bytes]] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(method: str, path: str, params: Dict[str, str]) -> str:
+        stable = sorted((name, value) for name, value in params.items() if name not in VOLATILE_PARAMS)
+        return f"{method} /{path.strip('/')} {json.dumps(stable)}"
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(key.encode("utf-8")).hexdigest()[:20] + ".json")
+
+    def load(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                with open(os.path.join(self.directory, name), encoding="utf-8") as recording:
+                    entry = json.load(recording)
+                self.responses[entry["key"]] = (entry["status"], json.dumps(entry["body"]).encode("utf-8"))
+        print(f"Loaded {len(self.responses)} recorded responses from {self.directory}")
+
+    def save(self, key: str, status: int, body: bytes):
+        try:
+            parsed = json.loads(body)
+        except ValueError:
+            return
+        with open(self._file(key), "w", encoding="utf-8") as recording:
+            json.dump({"key": key, "status": status, "body": parsed}, recording)
+
+
+def create_app(args) -> FastAPI:
+    app = FastAPI(title="Fake Reddit and NewsAPI")
+    data = FakeData(args)
+    recordings = Recordings(args.record or args.replay) if (args.record or args.replay) else None
+    if args.replay:
+        recordings.load()
+    upstream = httpx.AsyncClient(timeout=30) if args.record else None
+    counters = {"requests": 0, "replayed": 0, "recorded": 0}
+
+    routes = [
+        (re.compile(r"^r/(?P<name>[^/]+)/hot/?$"),
+         lambda m, p: data.hot(m["name"], int(p.get("limit", 25)), p.get("after"))),
+        (re.compile(r"^r/(?P<name>[^/]+)/new/?$"),
+         lambda m, p: data.stream("t3", m["name"], int(p.get("limit", 100)), p.get("before"))),
+        (re.compile(r"^r/(?P<name>[^/]+)/comments/?$"),
+         lambda m, p: data.stream("t1", m["name"], int(p.get("limit", 100)), p.get("before"))),
+        (re.compile(r"^comments/(?P<id>[0-9a-z]+)/?$"), lambda m, p: data.submission(m["id"])),
+        (re.compile(r"^v2/everything/?$"), lambda m, p: data.everything(p)),
+    ]
+
+    def upstream_url(path: str) -> str:
+        if path.startswith("api/v1/access_token"):
+            return f"{args.reddit_auth_upstream}/{path}"
+        if path.startswith("v2/"):
+            return f"{args.news_upstream}/{path}"
+        return f"{args.reddit_upstream}/{path}"
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy", **counters}
+
+    @app.post("/api/v1/access_token")
+    async def access_token(request: Request):
+        if args.record:
+            # Tokens are forwarded but never written to disk
+            response = await upstream.post(upstream_url("api/v1/access_token"), content=await request.body(),
+                                           headers={k: v for k, v in request.headers.items() if k.lower() != "host"})
+            return Response(response.content, status_code=response.status_code, media_type="application/json")
+        return {"access_token": "fake-token", "token_type": "bearer", "expires_in": 86400, "scope": "*"}
+
+    @app.api_route("/{path:path}", methods=["GET", "POST"])
+    async def dispatch(path: str, request: Request):
+        counters["requests"] += 1
+        params = dict(request.query_params)
+        key = Recordings.key(request.method, path, params)
+
+        if args.latency_ms or args.jitter_ms:
+            await asyncio.sleep((args.latency_ms + random.uniform(0, args.jitter_ms)) / 1000)
+
+        if args.record:
+            response = await upstream.request(
+                request.method, upstream_url(path), params=request.query_params, content=await request.body(),
+                headers={k: v for k, v in request.headers.items() if k.lower() not in ("host", "accept-encoding")}
+            )
+            if response.status_code == 200:
+                recordings.save(key, response.status_code, response.content)
+                counters["recorded"] += 1
+            return Response(response.content, status_code=response.status_code, media_type="application/json")
+
+        if recordings is not None and key in recordings.responses:
+            counters["replayed"] += 1
+            status, body = recordings.responses[key]
+            return Response(body, status_code=status, media_type="application/json")
+
+        for pattern, handler in routes:
+            match = pattern.match(path)
+            if match:
+                return JSONResponse(handler(match, params))
+        return JSONResponse({"error": 404, "message": f"No fake for /{path}"}, status_code=404)
+
+    return app
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fake Reddit and NewsAPI server for offline scrape benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--latency-ms", type=float, default=50, help="Added to every response")
+    parser.add_argument("--jitter-ms", type=float, default=20, help="Random extra latency, up to this much")
+    parser.add_argument("--posts", type=int, default=100, help="Posts in each subreddit's hot listing")
+    parser.add_argument("--comments-per-post", type=int, default=50)
+    parser.add_argument("--stream-per-minute", type=float, default=120, help="New posts and comments per minute for streams")
+    parser.add_argument("--news-per-hour", type=float, default=60, help="Articles per hour for each query")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--record", metavar="DIR", help="Proxy to the live APIs and save their responses to DIR")
+    parser.add_argument("--replay", metavar="DIR", help="Serve responses saved in DIR, synthetic ones otherwise")
+    parser.add_argument("--reddit-upstream", default="https://oauth.reddit.com")
+    parser.add_argument("--reddit-auth-upstream", default="https://www.reddit.com")
+    parser.add_argument("--news-upstream", default="https://newsapi.org")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    uvicorn.run(create_app(args), host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Script to download the ticker universe from NASDAQ Trader's symbol directory
+
+Writes every listed, non-test common symbol from nasdaqlisted.txt (NASDAQ) and
+otherlisted.txt (NYSE, NYSE American, NYSE Arca, Cboe) to TICKER_UNIVERSE_PATH
+as a one-column CSV. Rerun it now and then to pick up new listings.
+
+Usage: python fetch_tickers.py [--output data/tickers.csv]
+"""
+
+import os
+import sys
+import csv
+import argparse
+from typing import Iterable, List, Set
+
+import requests
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.ticker_index import TICKER_UNIVERSE_PATH
+
+SYMBOL_DIRECTORY = "https://www.nasdaqtrader.com/dynamic/SymDir"
+# Listing file and the name of its symbol column
+LISTINGS = [("nasdaqlisted.txt", "Symbol"), ("otherlisted.txt", "ACT Symbol")]
+
+
+def parse_listing(lines: Iterable[str], symbol_column: str) -> Set[str]:
+    """Symbols from one pipe-delimited listing, skipping test issues and the trailing timestamp row"""
+    reader = csv.DictReader(lines, delimiter="|")
+    symbols = set()
+    for row in reader:
+        symbol = (row.get(symbol_column) or "").strip().upper()
+        if row.get("Test Issue") == "Y":
+            continue
+        # Preferreds, units and share classes (e.g. "BRK.A") can't be matched as tickers
+        if symbol.isalpha() and len(symbol) <= 5:
+            symbols.add(symbol)
+    return symbols
+
+
+def fetch_tickers() -> List[str]:
+    symbols = set()
+    for filename, symbol_column in LISTINGS:
+        response = requests.get(f"{SYMBOL_DIRECTORY}/{filename}", timeout=30)
+        response.raise_for_status()
+        listed = parse_listing(response.text.splitlines(), symbol_column)
+        print(f"{filename}: {len(listed)} symbols")
+        symbols |= listed
+    return sorted(symbols)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download the ticker universe from NASDAQ Trader")
+    parser.add_argument("--output", default=TICKER_UNIVERSE_PATH, help="CSV file to write")
+    args = parser.parse_args()
+
+    symbols = fetch_tickers()
+    if not symbols:
+        raise SystemExit("No symbols downloaded; leaving the existing universe file in place")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", newline="", encoding="utf-8") as universe_file:
+        writer = csv.writer(universe_file)
+        writer.writerow(["Symbol"])
+        writer.writerows([symbol] for symbol in symbols)
+    print(f"Wrote {len(symbols)} symbols to {args.output}")
+
+
+if __name__ == "__main__":
+    main()